@@ -0,0 +1,306 @@
+"""
+Benchmark the explorer geo lookups against synthetic points.
+Run with: python bench_geo.py
+
+Sections, in order:
+
+* the old full-table haversine scan against the in-process GridIndex
+  backend of explorer.spatial, at 1k, 100k and 1M points spread across India;
+* the scalar haversine loop against the vectorised haversine_many and
+  haversine_matrix engines;
+* the old icontains LIKE search against the FTS5 index of
+  explorer.fulltext, over 100k synthetic places, and a page of a term
+  common to half of them ranked in Python against in SQL;
+* the cold start of a GridIndex against mapping an explorer.snapshot file;
+* the memory a nearby-places request allocates when it builds full Place
+  rows against an (id, lat, lng) projection hydrated with in_bulk.
+"""
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+
+from explorer.geo import CoordinateArray, bounding_box, haversine, haversine_matrix, np
+from explorer.snapshot import Snapshot, write_snapshot_file
+from explorer.spatial import GridIndex
+
+SIZES = [1_000, 100_000, 1_000_000]
+QUERIES = 20
+RADIUS_KM = 50
+
+# Rough bounding box of India
+LAT_RANGE = (8.0, 34.0)
+LNG_RANGE = (68.0, 97.0)
+
+
+def synthetic_points(n, seed=42):
+    rng = random.Random(seed)
+    return [
+        (pk, rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE))
+        for pk in range(n)
+    ]
+
+
+def full_scan(points, lat, lng, radius_km):
+    hits = []
+    for pk, p_lat, p_lng in points:
+        dist = haversine(lng, lat, p_lng, p_lat)
+        if dist <= radius_km:
+            hits.append((dist, 'place', pk))
+    hits.sort()
+    return hits
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def bench_index():
+    rng = random.Random(7)
+    origins = [(rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE)) for _ in range(QUERIES)]
+
+    print(f"{'points':>10} {'build (s)':>10} {'scan (ms)':>10} {'grid (ms)':>10} {'speedup':>8}")
+    for size in SIZES:
+        points = synthetic_points(size)
+
+        index = GridIndex()
+        _, build_time = timed(lambda: [index.add('place', pk, lat, lng) for pk, lat, lng in points])
+
+        scan_total = grid_total = 0.0
+        for lat, lng in origins:
+            expected, scan_time = timed(full_scan, points, lat, lng, RADIUS_KM)
+            actual, grid_time = timed(index.within, lat, lng, RADIUS_KM)
+            assert [pk for _, _, pk in expected] == [pk for _, _, pk in actual]
+            scan_total += scan_time
+            grid_total += grid_time
+
+        scan_ms = scan_total / QUERIES * 1000
+        grid_ms = grid_total / QUERIES * 1000
+        print(f"{size:>10} {build_time:>10.2f} {scan_ms:>10.2f} {grid_ms:>10.3f} {scan_ms / grid_ms:>7.0f}x")
+
+
+def bench_vectorised():
+    rng = random.Random(11)
+    engine = 'numpy' if np is not None else 'pure python fallback'
+    print(f"\nOne origin to N points ({engine})")
+    print(f"{'points':>10} {'scalar (ms)':>12} {'vector (ms)':>12} {'speedup':>8}")
+    for size in SIZES:
+        points = synthetic_points(size)
+        coords = CoordinateArray(*zip(*points))
+        lat, lng = rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE)
+
+        expected, scalar_time = timed(lambda: [haversine(lng, lat, p_lng, p_lat) for _, p_lat, p_lng in points])
+        actual, vector_time = timed(coords.distances_from, lat, lng)
+        assert all(abs(a - b) < 1e-6 for a, b in zip(expected, actual))
+        print(f"{size:>10} {scalar_time * 1000:>12.2f} {vector_time * 1000:>12.2f} {scalar_time / vector_time:>7.0f}x")
+
+    origins, targets = synthetic_points(100, seed=3), synthetic_points(10_000, seed=5)
+    o_lats, o_lngs = [lat for _, lat, _ in origins], [lng for _, _, lng in origins]
+    t_lats, t_lngs = [lat for _, lat, _ in targets], [lng for _, _, lng in targets]
+    _, scalar_time = timed(lambda: [
+        [haversine(o_lng, o_lat, t_lng, t_lat) for t_lat, t_lng in zip(t_lats, t_lngs)]
+        for o_lat, o_lng in zip(o_lats, o_lngs)
+    ])
+    _, vector_time = timed(haversine_matrix, o_lats, o_lngs, t_lats, t_lngs)
+    print(f"\n100 x 10k matrix: scalar {scalar_time * 1000:.2f} ms, "
+          f"vector {vector_time * 1000:.2f} ms, {scalar_time / vector_time:.0f}x")
+
+
+FTS_SIZE = 100_000
+FTS_VOCABULARY = 20_000
+FTS_QUERIES = 20
+# A word in every other description, like "temple" or "beach" on the real site
+FTS_COMMON_WORD = 'temple'
+FTS_PAGE_SIZE = 24
+
+
+def synthetic_words(n, seed=17):
+    rng = random.Random(seed)
+    syllables = ['ka', 'la', 'ma', 'na', 'pa', 'ra', 'ta', 'va', 'gi', 'ri', 'ko', 'du', 'shi', 'pur', 'bad', 'ore']
+    words = set()
+    while len(words) < n:
+        words.add(''.join(rng.choice(syllables) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def bench_fulltext():
+    rng = random.Random(13)
+    db = sqlite3.connect(':memory:')
+    db.execute('CREATE TABLE place (id INTEGER PRIMARY KEY, name TEXT, location TEXT, description TEXT)')
+    db.execute(
+        'CREATE VIRTUAL TABLE place_fts USING fts5('
+        "name, location, description, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    words = synthetic_words(FTS_VOCABULARY)
+    rows = [
+        (pk, ' '.join(rng.sample(words, 2)).title(), f'Town {pk % 500}',
+         ' '.join(rng.choice(words) for _ in range(60)) + (f' {FTS_COMMON_WORD}' if pk % 2 else ''))
+        for pk in range(FTS_SIZE)
+    ]
+    db.executemany('INSERT INTO place VALUES (?, ?, ?, ?)', rows)
+    db.executemany('INSERT INTO place_fts (rowid, name, location, description) VALUES (?, ?, ?, ?)', rows)
+
+    like_total = fts_total = 0.0
+    for _ in range(FTS_QUERIES):
+        query = rng.choice(words)
+        like = f'%{query}%'
+        _, like_time = timed(lambda: db.execute(
+            'SELECT id FROM place WHERE name LIKE ? OR location LIKE ? OR description LIKE ?',
+            [like, like, like],
+        ).fetchall())
+        # Same shape as explorer.fulltext.search: ranked and limited in SQL
+        _, fts_time = timed(lambda: db.execute(
+            'SELECT rowid, bm25(place_fts, 10.0, 4.0, 1.0) AS score FROM place_fts '
+            'WHERE place_fts MATCH ? ORDER BY score, rowid LIMIT ?',
+            [f'"{query}"*', FTS_PAGE_SIZE + 1],
+        ).fetchall())
+        like_total += like_time
+        fts_total += fts_time
+
+    like_ms = like_total / FTS_QUERIES * 1000
+    fts_ms = fts_total / FTS_QUERIES * 1000
+    print(f"\nText search over {FTS_SIZE} places: icontains {like_ms:.2f} ms, "
+          f"fts5 {fts_ms:.2f} ms, {like_ms / fts_ms:.0f}x")
+
+    # A common term matches half the table; every match is scored either way
+    expression = f'"{FTS_COMMON_WORD}"*'
+    _, all_rows_time = timed(lambda: sorted(
+        (score, rowid) for rowid, score in db.execute(
+            'SELECT rowid, bm25(place_fts, 10.0, 4.0, 1.0) FROM place_fts WHERE place_fts MATCH ?',
+            [expression],
+        )
+    ))
+    page, first_time = timed(lambda: db.execute(
+        'SELECT rowid, bm25(place_fts, 10.0, 4.0, 1.0) AS score FROM place_fts '
+        'WHERE place_fts MATCH ? ORDER BY score, rowid LIMIT ?',
+        [expression, FTS_PAGE_SIZE + 1],
+    ).fetchall())
+    rowid, score = page[FTS_PAGE_SIZE - 1]
+    _, next_time = timed(lambda: db.execute(
+        'SELECT rowid, bm25(place_fts, 10.0, 4.0, 1.0) AS score FROM place_fts '
+        'WHERE place_fts MATCH ? AND (score > ? OR (score = ? AND rowid > ?)) '
+        'ORDER BY score, rowid LIMIT ?',
+        [expression, score, score, rowid, FTS_PAGE_SIZE + 1],
+    ).fetchall())
+    print(f"Common term in {FTS_SIZE // 2} places: every match sorted in Python {all_rows_time * 1000:.1f} ms, "
+          f"first page in SQL {first_time * 1000:.1f} ms, next page {next_time * 1000:.1f} ms")
+
+
+def bench_snapshot():
+    print(f"\nWorker cold start to first {RADIUS_KM} km lookup")
+    print(f"{'points':>10} {'grid (ms)':>10} {'mmap (ms)':>10} {'file (MB)':>10}")
+    lat, lng = 20.0, 78.0
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'poi.bin')
+        for size in SIZES:
+            points = synthetic_points(size)
+            write_snapshot_file(path, (('place', pk, p_lat, p_lng, 'OTHER') for pk, p_lat, p_lng in points), 1)
+
+            def grid_cold_start():
+                index = GridIndex()
+                for pk, p_lat, p_lng in points:
+                    index.add('place', pk, p_lat, p_lng)
+                return index.within(lat, lng, RADIUS_KM)
+
+            def snapshot_cold_start():
+                snap = Snapshot(path)
+                return [(kind, pk) for kind, pk, _, _ in snap.in_box(*bounding_box(lat, lng, RADIUS_KM))]
+
+            _, grid_time = timed(grid_cold_start)
+            _, snap_time = timed(snapshot_cold_start)
+            size_mb = os.path.getsize(path) / 1e6
+            print(f"{size:>10} {grid_time * 1000:>10.1f} {snap_time * 1000:>10.1f} {size_mb:>10.1f}")
+
+
+HYDRATE_SIZE = 20_000
+NEARBY_RADIUS_KM = 25
+
+
+def full_row_nearby(model, lat, lng):
+    """The old get_nearby_places: every row built as a model instance to measure one distance."""
+    nearby = []
+    for row in model.objects.filter(latitude__isnull=False, longitude__isnull=False):
+        row.distance_km = haversine(lng, lat, row.longitude, row.latitude)
+        if row.distance_km <= NEARBY_RADIUS_KM:
+            nearby.append(row)
+    nearby.sort(key=lambda row: row.distance_km)
+    return nearby[:6]
+
+
+def projected_nearby(model, lat, lng):
+    """Distances over an (id, lat, lng) projection, then in_bulk for the six winners."""
+    candidates = CoordinateArray()
+    coords = model.objects.filter(latitude__isnull=False, longitude__isnull=False)
+    for pk, p_lat, p_lng in coords.values_list('pk', 'latitude', 'longitude'):
+        candidates.append(pk, p_lat, p_lng)
+    winners = candidates.within(lat, lng, NEARBY_RADIUS_KM)[:6]
+    rows = model.objects.in_bulk([pk for _, pk in winners])
+    return [rows[pk] for _, pk in winners]
+
+
+def allocated(fn, *args):
+    """Peak bytes allocated by one call, and its wall time."""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak, elapsed
+
+
+def bench_hydration():
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tourist_project.settings')
+    django.setup()
+    from django.db import connection, transaction
+    from explorer.models import Place
+    from explorer.spatial import RTreeIndex
+    from explorer.views import get_nearby_places
+
+    rng = random.Random(19)
+    test_db = connection.creation.create_test_db(verbosity=0)
+    try:
+        description = ' '.join(synthetic_words(300))
+        rows = [
+            Place(name=f'Place {pk}', location='Somewhere', description=description, image='explorer/bench.jpg',
+                  latitude=p_lat, longitude=p_lng)
+            for pk, p_lat, p_lng in synthetic_points(HYDRATE_SIZE)
+        ]
+        with transaction.atomic():
+            # bulk_create skips the signals, so index the rows directly
+            for place in Place.objects.bulk_create(rows):
+                RTreeIndex().add('place', place.pk, place.latitude, place.longitude)
+
+        origins = [(rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE)) for _ in range(5)]
+        engines = [
+            ('full rows', lambda lat, lng: full_row_nearby(Place, lat, lng)),
+            ('projection', lambda lat, lng: projected_nearby(Place, lat, lng)),
+            ('index', get_nearby_places),
+        ]
+        print(f"\nNearby places over {HYDRATE_SIZE} places with {len(description)}-char descriptions, per request")
+        print(f"{'engine':>12} {'peak (KB)':>10} {'time (ms)':>10}")
+        for name, engine in engines:
+            runs = [allocated(engine, lat, lng) for lat, lng in origins]
+            peak = sum(run[0] for run in runs) / len(runs)
+            elapsed = sum(run[1] for run in runs) / len(runs)
+            print(f"{name:>12} {peak / 1024:>10.0f} {elapsed * 1000:>10.1f}")
+    finally:
+        connection.creation.destroy_test_db(test_db, verbosity=0)
+
+
+def main():
+    bench_index()
+    bench_vectorised()
+    bench_fulltext()
+    bench_snapshot()
+    bench_hydration()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Place, HillStation
+from .models import Place, HillStation, NearbyPlace, PointOfInterest, PointOfInterestTag
 
 
 @admin.register(Place)
@@ -33,3 +33,23 @@ class HillStationAdmin(admin.ModelAdmin):
             'fields': ('created_date',)
         }),
     )
+
+
+@admin.register(NearbyPlace)
+class NearbyPlaceAdmin(admin.ModelAdmin):
+    list_display = ('source_type', 'source_id', 'rank', 'target_type', 'target_id', 'distance_km')
+    list_filter = ('source_type', 'target_type')
+
+
+class PointOfInterestTagInline(admin.TabularInline):
+    model = PointOfInterestTag
+    extra = 0
+
+
+@admin.register(PointOfInterest)
+class PointOfInterestAdmin(admin.ModelAdmin):
+    list_display = ('name', 'kind', 'category', 'location', 'updated_at')
+    list_filter = ('kind', 'category', 'tags__tag')
+    search_fields = ('name', 'search_text')
+    readonly_fields = ('updated_at',)
+    inlines = [PointOfInterestTagInline]
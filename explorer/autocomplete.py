@@ -0,0 +1,134 @@
+"""
+In-memory type-ahead suggestions for the explorer location box.
+
+A prefix trie is built once per process over POI names, hill-station
+cities and states, and every gazetteer name and alias. Each node keeps
+its own top-k suggestions ranked by popularity, so a lookup is a walk
+down the prefix and a slice, with no database access. A PointOfInterest
+write drops the trie in the writing process straight away and, through
+the shared version counter (see explorer.versions), in every other
+process once it commits; it is rebuilt lazily on the next lookup.
+"""
+import threading
+from collections import Counter
+
+from tourist_project.services.geocoder import GeocoderService
+
+from . import versions
+
+
+TOP_K = 10
+
+# Base popularity per gazetteer entry kind
+KIND_WEIGHTS = {'city': 3, 'landmark': 2, 'district': 2, 'state': 1}
+
+
+class SuggestionTrie:
+    """Prefix trie whose nodes cache their best TOP_K suggestions."""
+
+    def __init__(self, k=TOP_K):
+        self.k = k
+        self._root = {}
+        self._suggestions = {}
+
+    def insert(self, term, suggestion, weight):
+        """
+        Index `suggestion` (a dict with at least a 'label') under `term`.
+        Suggestions sharing a label and kind are merged, keeping the
+        highest weight.
+        """
+        term = GeocoderService.normalise(term)
+        if not term:
+            return
+        key = (suggestion['label'], suggestion.get('kind'))
+        current = self._suggestions.get(key)
+        if current is None or current[0] < weight:
+            self._suggestions[key] = (weight, suggestion)
+        node = self._root
+        for char in term:
+            node = node.setdefault(char, {})
+        node.setdefault('', set()).add(key)
+
+    def finalize(self):
+        """Compute the top-k list at every node, bottom up."""
+        def rank(node):
+            keys = set(node.get('', ()))
+            best = []
+            for char, child in node.items():
+                if char in ('', 'top'):
+                    continue
+                best.extend(rank(child))
+            candidates = {key: self._suggestions[key][0] for key in keys}
+            for weight, key in best:
+                candidates[key] = max(weight, candidates.get(key, 0))
+            top = sorted(((w, k) for k, w in candidates.items()), key=lambda item: (-item[0], item[1][0]))
+            node['top'] = top[:self.k]
+            return node['top']
+
+        rank(self._root)
+        return self
+
+    def search(self, prefix, limit=TOP_K):
+        node = self._root
+        for char in GeocoderService.normalise(prefix):
+            node = node.get(char)
+            if node is None:
+                return []
+        return [self._suggestions[key][1] for _, key in node.get('top', [])[:limit]]
+
+
+def build_trie():
+    from .models import PointOfInterest
+
+    trie = SuggestionTrie()
+    mentions = Counter()
+    points = PointOfInterest.objects.values_list('name', 'kind', 'location', 'latitude', 'longitude')
+    for name, kind, location, lat, lng in points:
+        parts = [GeocoderService.normalise(part) for part in location.split(',')]
+        mentions.update(part for part in parts if part)
+        trie.insert(name, {
+            'label': name, 'kind': kind, 'latitude': lat, 'longitude': lng,
+        }, weight=2 if lat is not None else 1)
+        if kind == 'hill_station':
+            city, _, state = location.partition(', ')
+            for value, value_kind in ((city, 'city'), (state, 'state')):
+                if value:
+                    trie.insert(value, {'label': value, 'kind': value_kind}, weight=1)
+
+    for entry in GeocoderService.entries():
+        weight = KIND_WEIGHTS.get(entry['kind'], 1) + mentions[GeocoderService.normalise(entry['name'])]
+        suggestion = {
+            'label': entry['name'], 'kind': entry['kind'],
+            'latitude': entry['latitude'], 'longitude': entry['longitude'],
+        }
+        for term in [entry['name']] + entry.get('aliases', []):
+            trie.insert(term, suggestion, weight)
+    return trie.finalize()
+
+
+# (trie, versions.stamp) for the copy this process built
+_trie = None
+_trie_lock = threading.Lock()
+
+
+def get_trie():
+    global _trie
+    entry = _trie
+    if entry is None or not versions.is_fresh('autocomplete', entry[1]):
+        with _trie_lock:
+            entry = _trie
+            if entry is None or not versions.is_fresh('autocomplete', entry[1]):
+                built = versions.stamp('autocomplete')
+                entry = _trie = (build_trie(), built)
+    return entry[0]
+
+
+def suggest(prefix, limit=TOP_K):
+    return get_trie().search(prefix, limit)
+
+
+def invalidate():
+    global _trie
+    with _trie_lock:
+        _trie = None
+    versions.bump('autocomplete')
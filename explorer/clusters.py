@@ -0,0 +1,114 @@
+"""
+Server-side marker clustering for the explorer maps.
+
+For each zoom level the POIs with coordinates are aggregated once into a
+grid whose cells are a fraction of a map tile wide. A bounding-box query
+then only reads the pre-aggregated cells it overlaps, so the payload
+depends on the viewport and zoom rather than on the catalogue size.
+Grids are kept per process. A PointOfInterest write drops them in the
+writing process straight away and, through the shared version counter
+(see explorer.versions), in every other process once it commits.
+"""
+import threading
+from math import floor
+
+from . import versions
+
+
+MAX_ZOOM = 18
+# Grid cells per map tile edge; 4 gives clusters roughly 64px apart
+CELLS_PER_TILE = 4
+REPRESENTATIVES = 3
+
+
+def cell_size(zoom):
+    """Cell edge in degrees for a zoom level."""
+    return 360.0 / (2 ** zoom) / CELLS_PER_TILE
+
+
+class ClusterGrid:
+    """Pre-aggregated POI counts and centroids for one zoom level."""
+
+    def __init__(self, zoom):
+        self.zoom = zoom
+        self.size = cell_size(zoom)
+        self._cells = {}
+
+    def _cell(self, lat, lng):
+        return (floor(lat / self.size), floor(lng / self.size))
+
+    def add(self, poi_id, name, url, lat, lng):
+        cell = self._cells.setdefault(self._cell(lat, lng), {
+            'count': 0, 'lat_sum': 0.0, 'lng_sum': 0.0, 'representatives': [],
+        })
+        cell['count'] += 1
+        cell['lat_sum'] += lat
+        cell['lng_sum'] += lng
+        if len(cell['representatives']) < REPRESENTATIVES:
+            cell['representatives'].append({'id': poi_id, 'name': name, 'url': url})
+
+    def clusters(self, south, west, north, east):
+        min_row, min_col = self._cell(south, west)
+        max_row, max_col = self._cell(north, east)
+        results = []
+        if (max_row - min_row + 1) * (max_col - min_col + 1) > len(self._cells):
+            # Viewport wider than the data: walk the occupied cells instead
+            cells = (
+                (key, cell) for key, cell in self._cells.items()
+                if min_row <= key[0] <= max_row and min_col <= key[1] <= max_col
+            )
+        else:
+            cells = (
+                ((row, col), self._cells[(row, col)])
+                for row in range(min_row, max_row + 1)
+                for col in range(min_col, max_col + 1)
+                if (row, col) in self._cells
+            )
+        for _, cell in cells:
+            results.append({
+                'count': cell['count'],
+                'latitude': round(cell['lat_sum'] / cell['count'], 6),
+                'longitude': round(cell['lng_sum'] / cell['count'], 6),
+                'representatives': cell['representatives'],
+            })
+        return results
+
+
+def build_grid(zoom):
+    from .models import PointOfInterest
+
+    grid = ClusterGrid(zoom)
+    points = PointOfInterest.objects.filter(latitude__isnull=False, longitude__isnull=False)
+    for poi in points.only('id', 'kind', 'source_id', 'name', 'latitude', 'longitude'):
+        grid.add(poi.pk, poi.name, poi.get_absolute_url(), poi.latitude, poi.longitude)
+    return grid
+
+
+_grids = {}
+_grids_lock = threading.Lock()
+
+
+def clamp_zoom(zoom):
+    return max(0, min(int(zoom), MAX_ZOOM))
+
+
+def get_grid(zoom):
+    zoom = clamp_zoom(zoom)
+    entry = _grids.get(zoom)
+    if entry is None or not versions.is_fresh('clusters', entry[1]):
+        with _grids_lock:
+            entry = _grids.get(zoom)
+            if entry is None or not versions.is_fresh('clusters', entry[1]):
+                built = versions.stamp('clusters')
+                entry = _grids[zoom] = (build_grid(zoom), built)
+    return entry[0]
+
+
+def clusters_in_bbox(south, west, north, east, zoom):
+    return get_grid(zoom).clusters(south, west, north, east)
+
+
+def invalidate():
+    with _grids_lock:
+        _grids.clear()
+    versions.bump('clusters')
@@ -0,0 +1,95 @@
+"""
+Corridor search: points of interest along a route.
+
+A route is a polyline of (lat, lng) waypoints. Each leg is cut into
+stretches no longer than a few corridor widths and every stretch costs
+one bounding-box probe of the spatial index, so a long drive is a handful
+of index lookups rather than a radius search per waypoint. Candidates are
+then projected onto the route in a local flat approximation (accurate to
+well under a percent at the scale of a day's drive) to get their offset
+from the route and their position along it.
+"""
+from math import ceil, cos, hypot, radians
+
+from .geo import KM_PER_DEGREE, bounding_box
+from .spatial import get_index
+
+
+MIN_WIDTH_KM = 0.5
+MAX_WIDTH_KM = 50
+MAX_VIA_POINTS = 20
+# Longest stretch of route covered by a single index probe, in corridor widths
+STRETCH_WIDTHS = 4
+# Upper bound on index probes per search; long thin corridors get longer stretches
+MAX_PROBES = 200
+
+
+def _projector(path):
+    """Map (lat, lng) to planar km around the route's mean latitude."""
+    scale = cos(radians(sum(lat for lat, _ in path) / len(path)))
+    return lambda lat, lng: (lng * KM_PER_DEGREE * scale, lat * KM_PER_DEGREE)
+
+
+def route_length(path):
+    project = _projector(path)
+    points = [project(lat, lng) for lat, lng in path]
+    return sum(hypot(x2 - x1, y2 - y1) for (x1, y1), (x2, y2) in zip(points, points[1:]))
+
+
+def probe_boxes(path, width_km):
+    """
+    Bounding boxes covering the corridor, one per stretch of route and no
+    more than MAX_PROBES in all (plus one per leg).
+    """
+    project = _projector(path)
+    stretch = max(STRETCH_WIDTHS * width_km, route_length(path) / MAX_PROBES)
+    boxes = []
+    for (lat1, lng1), (lat2, lng2) in zip(path, path[1:]):
+        (x1, y1), (x2, y2) = project(lat1, lng1), project(lat2, lng2)
+        steps = max(1, ceil(hypot(x2 - x1, y2 - y1) / stretch))
+        for step in range(steps):
+            a, b = step / steps, (step + 1) / steps
+            lats = (lat1 + (lat2 - lat1) * a, lat1 + (lat2 - lat1) * b)
+            lngs = (lng1 + (lng2 - lng1) * a, lng1 + (lng2 - lng1) * b)
+            low = bounding_box(min(lats), min(lngs), width_km)
+            high = bounding_box(max(lats), max(lngs), width_km)
+            boxes.append((low[0], high[1], low[2], high[3]))
+    return boxes
+
+
+def along_route(path, width_km, tag=None):
+    """
+    Return [(along_km, offset_km, kind, pk), ...] for indexed POIs within
+    width_km of the polyline `path`, ordered by position along it.
+    `tag` optionally restricts the candidates to POIs carrying it.
+    """
+    if len(path) == 1:
+        path = [path[0], path[0]]
+    index = get_index()
+    candidates = {}
+    for box in probe_boxes(path, width_km):
+        for kind, pk, lat, lng in index.candidates(*box, tag=tag):
+            candidates[(kind, pk)] = (lat, lng)
+
+    project = _projector(path)
+    points = [project(lat, lng) for lat, lng in path]
+    legs = []
+    start = 0.0
+    for (x1, y1), (x2, y2) in zip(points, points[1:]):
+        length = hypot(x2 - x1, y2 - y1)
+        legs.append((x1, y1, x2 - x1, y2 - y1, length, start))
+        start += length
+
+    matches = []
+    for (kind, pk), (lat, lng) in candidates.items():
+        px, py = project(lat, lng)
+        best = None
+        for x1, y1, dx, dy, length, leg_start in legs:
+            t = 0.0 if length == 0 else max(0.0, min(1.0, ((px - x1) * dx + (py - y1) * dy) / length ** 2))
+            offset = hypot(px - (x1 + t * dx), py - (y1 + t * dy))
+            if best is None or offset < best[1]:
+                best = (leg_start + t * length, offset)
+        if best[1] <= width_km:
+            matches.append((round(best[0], 2), round(best[1], 2), kind, pk))
+    matches.sort()
+    return matches
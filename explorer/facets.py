@@ -0,0 +1,63 @@
+"""
+Filter counts for the explorer list pages.
+
+Counts per place category and per hill-station state and city live in
+the FacetCount table and are adjusted by the receivers in explorer.models
+as rows are created, edited and deleted, so rendering the filters is one
+indexed read instead of a GROUP BY or DISTINCT over the source tables.
+"""
+from django.db.models import F
+
+
+# facet name -> (source kind, model field)
+FACETS = {
+    'place_category': ('place', 'category'),
+    'hill_station_state': ('hill_station', 'state'),
+    'hill_station_city': ('hill_station', 'city'),
+}
+
+
+def facet_fields(kind):
+    """{facet: field} for the facets counted over one source kind."""
+    return {facet: field for facet, (facet_kind, field) in FACETS.items() if facet_kind == kind}
+
+
+def facet_values(kind, obj):
+    return {facet: getattr(obj, field) for facet, field in facet_fields(kind).items()}
+
+
+def adjust(facet, value, delta):
+    """Atomically add `delta` to one count, dropping values that reach zero."""
+    from .models import FacetCount
+
+    if not value:
+        return
+    if delta > 0:
+        FacetCount.objects.get_or_create(facet=facet, value=value)
+    FacetCount.objects.filter(facet=facet, value=value).update(count=F('count') + delta)
+    if delta < 0:
+        FacetCount.objects.filter(facet=facet, value=value, count__lte=0).delete()
+
+
+def record_change(before, after):
+    """
+    Apply one write: `before` and `after` are {facet: value} for the row
+    before and after it (empty for a create or a delete respectively).
+    """
+    for facet in set(before) | set(after):
+        old, new = before.get(facet), after.get(facet)
+        if old == new:
+            continue
+        adjust(facet, old, -1)
+        adjust(facet, new, 1)
+
+
+def counts(*facets):
+    """{facet: [(value, count), ...]} sorted by value, in a single query."""
+    from .models import FacetCount
+
+    result = {facet: [] for facet in facets}
+    rows = FacetCount.objects.filter(facet__in=facets).values_list('facet', 'value', 'count')
+    for facet, value, count in rows:
+        result[facet].append((value, count))
+    return result
@@ -0,0 +1,124 @@
+"""
+Ranked full-text search over places, hill stations and destinations.
+
+On SQLite the searchable text of each row is mirrored into an FTS5 table
+(explorer_search_fts) whose rowid packs kind and primary key the same way
+as the R*Tree mirror in explorer.spatial. A query is one probe of the
+inverted index, ranked with bm25 weighting the name above the location
+above the description, instead of a leading-wildcard LIKE over every
+description. Other databases fall back to icontains filters in the views.
+"""
+import re
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .spatial import RTreeIndex
+
+
+TABLE = 'explorer_search_fts'
+KINDS = RTreeIndex.KINDS
+# bm25 column weights for (name, location, description)
+WEIGHTS = (10.0, 4.0, 1.0)
+SNIPPET_TOKENS = 16
+
+# Control characters stand in for the highlight tags until the snippet is escaped
+_OPEN, _CLOSE = '\x02', '\x03'
+
+
+def fulltext_available():
+    return connection.vendor == 'sqlite'
+
+
+def document(kind, obj):
+    """The (name, location, description) text indexed for a source row."""
+    if kind == 'hill_station':
+        location = ', '.join(part for part in (obj.city, obj.district, obj.state) if part)
+    else:
+        location = obj.location
+    return obj.name, location, obj.description or ''
+
+
+def index_document(kind, obj):
+    rowid = RTreeIndex.rtree_id(kind, obj.pk)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [rowid])
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, name, location, description) VALUES (%s, %s, %s, %s)',
+            [rowid, *document(kind, obj)],
+        )
+
+
+def remove_document(kind, pk):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [RTreeIndex.rtree_id(kind, pk)])
+
+
+def match_expression(query):
+    """
+    Turn typed text into an FTS5 query: every word must match, the last
+    one as a prefix so results keep up with the user's typing.
+    """
+    words = re.findall(r'\w+', query.lower())
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def search(query, kinds=None, after=None, limit=None):
+    """
+    Return [(score, kind, pk), ...] best first. bm25 scores are negative,
+    so ascending order is most relevant first and the hits sort like
+    index hits for explorer.pagination. Ranking and paging happen in
+    SQL: `after` is the last hit already shown, and only the next
+    `limit` matches come back rather than every match for the term.
+    """
+    expression = match_expression(query)
+    if expression is None:
+        return []
+    sql = f'SELECT rowid, bm25({TABLE}, %s, %s, %s) AS score FROM {TABLE} WHERE {TABLE} MATCH %s'
+    params = [*WEIGHTS, expression]
+    if kinds:
+        codes = [KINDS.index(kind) for kind in kinds]
+        sql += f" AND rowid %% {len(KINDS)} IN ({', '.join(['%s'] * len(codes))})"
+        params += codes
+    if after is not None:
+        # Keyset on (score, rowid), the order the rows come back in
+        score, kind, pk = after
+        sql += ' AND (score > %s OR (score = %s AND rowid > %s))'
+        params += [score, score, RTreeIndex.rtree_id(kind, pk)]
+    sql += ' ORDER BY score, rowid'
+    if limit is not None:
+        sql += ' LIMIT %s'
+        params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    return [(score, *RTreeIndex.decode_id(rowid)) for rowid, score in rows]
+
+
+def snippets(query, hits):
+    """
+    Highlighted description excerpts for a page of hits, as
+    {(kind, pk): safe HTML} with matched words wrapped in <mark>.
+    """
+    expression = match_expression(query)
+    if expression is None or not hits:
+        return {}
+    rowids = [RTreeIndex.rtree_id(kind, pk) for _, kind, pk in hits]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, snippet({TABLE}, 2, %s, %s, '…', %s) FROM {TABLE} "
+            f"WHERE {TABLE} MATCH %s AND rowid IN ({', '.join(['%s'] * len(rowids))})",
+            [_OPEN, _CLOSE, SNIPPET_TOKENS, expression, *rowids],
+        )
+        rows = cursor.fetchall()
+    return {
+        RTreeIndex.decode_id(rowid): mark_safe(
+            escape(text).replace(_OPEN, '<mark>').replace(_CLOSE, '</mark>')
+        )
+        for rowid, text in rows if text
+    }
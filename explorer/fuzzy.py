@@ -0,0 +1,128 @@
+"""
+Typo-tolerant matching for place and city searches.
+
+Each PointOfInterest contributes a few short terms (its name and the parts
+of its location, i.e. city and state for hill stations) and every term is
+broken into trigrams when the row is written. The trigrams are stored in
+the indexed SearchTrigram table, so a fuzzy query is a single lookup of
+the query's trigrams grouped per term; similarity is the pg_trgm-style
+ratio of shared to distinct trigrams.
+"""
+from django.db.models import Count, Q
+
+from tourist_project.services.geocoder import GeocoderService
+
+
+SIMILARITY_THRESHOLD = 0.3
+FUZZY_LIMIT = 12
+
+
+def trigrams(text):
+    """The set of trigrams of each word, padded like pg_trgm ("  m", " mu", ..., "ar ")."""
+    grams = set()
+    for word in GeocoderService.normalise(text).split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def poi_terms(name, location):
+    """Searchable terms for one POI: its name and each comma-separated part of its location."""
+    terms = {}
+    for term in [name] + (location or '').split(','):
+        term = term.strip()
+        if term:
+            terms.setdefault(term.lower(), term)
+    return list(terms.values())
+
+
+def trigram_rows(kind, source_id, name, location):
+    """Yield the SearchTrigram column values for one POI."""
+    for term in poi_terms(name, location):
+        grams = trigrams(term)
+        for gram in grams:
+            yield {
+                'trigram': gram, 'kind': kind, 'source_id': source_id,
+                'term': term[:200], 'size': len(grams),
+            }
+
+
+def index_poi(poi):
+    from .models import SearchTrigram
+
+    remove_poi(poi.kind, poi.source_id)
+    SearchTrigram.objects.bulk_create([
+        SearchTrigram(**row) for row in trigram_rows(poi.kind, poi.source_id, poi.name, poi.location)
+    ])
+
+
+def remove_poi(kind, source_id):
+    from .models import SearchTrigram
+
+    SearchTrigram.objects.filter(kind=kind, source_id=source_id).delete()
+
+
+def fuzzy_matches(text, kinds=None, limit=FUZZY_LIMIT, threshold=SIMILARITY_THRESHOLD):
+    """
+    Return [(similarity, kind, source_id, term), ...] best first, keeping
+    the best-matching term of each POI.
+    """
+    from .models import SearchTrigram
+
+    grams = trigrams(text)
+    if not grams:
+        return []
+    rows = SearchTrigram.objects.filter(trigram__in=grams)
+    if kinds:
+        rows = rows.filter(kind__in=kinds)
+    rows = rows.values('kind', 'source_id', 'term', 'size').annotate(shared=Count('id')).order_by()
+
+    best = {}
+    for row in rows:
+        similarity = row['shared'] / (len(grams) + row['size'] - row['shared'])
+        key = (row['kind'], row['source_id'])
+        if similarity >= threshold and similarity > best.get(key, (0,))[0]:
+            best[key] = (similarity, row['term'])
+    matches = sorted(
+        ((similarity, kind, source_id, term) for (kind, source_id), (similarity, term) in best.items()),
+        key=lambda match: (-match[0], match[1], match[2]),
+    )
+    return matches[:limit]
+
+
+def matched_points(matches, points):
+    """
+    PointOfInterest rows of `points` for fuzzy matches, in similarity
+    order, annotated with similarity and matched_term.
+    """
+    if not matches:
+        return []
+    match = Q()
+    for _, kind, source_id, _ in matches:
+        match |= Q(kind=kind, source_id=source_id)
+    rows = {(poi.kind, poi.source_id): poi for poi in points.filter(match)}
+    results = []
+    for similarity, kind, source_id, term in matches:
+        poi = rows.get((kind, source_id))
+        if poi is not None:
+            poi.similarity = round(similarity, 2)
+            poi.matched_term = term
+            results.append(poi)
+    return results
+
+
+def matched_rows(matches, queryset, kind):
+    """
+    Rows of `queryset` (a source model of `kind`) for fuzzy matches, in
+    similarity order, annotated with similarity and matched_term.
+    """
+    wanted = [match for match in matches if match[1] == kind]
+    rows = queryset.in_bulk([source_id for _, _, source_id, _ in wanted])
+    results = []
+    for similarity, _, source_id, term in wanted:
+        row = rows.get(source_id)
+        if row is not None:
+            row.similarity = round(similarity, 2)
+            row.matched_term = term
+            results.append(row)
+    return results
@@ -0,0 +1,145 @@
+from array import array
+from math import radians, cos, sin, asin, sqrt
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+EARTH_RADIUS_KM = 6371
+KM_PER_DEGREE = radians(1) * EARTH_RADIUS_KM
+
+
+def haversine(lon1, lat1, lon2, lat2):
+    """
+    Calculate the great circle distance between two points
+    on the earth (specified in decimal degrees)
+    Returns distance in kilometers
+    """
+    # convert decimal degrees to radians
+    lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
+    # haversine formula
+    dlon = lon2 - lon1
+    dlat = lat2 - lat1
+    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
+    c = 2 * asin(sqrt(a))
+    return c * EARTH_RADIUS_KM
+
+
+def bounding_box(lat, lng, radius_km):
+    """
+    Return (min_lat, max_lat, min_lng, max_lng) enclosing a radius around a
+    point. The box is a cheap superset of the circle, so it is safe to use
+    as a prefilter before the exact haversine check.
+    """
+    dlat = radius_km / KM_PER_DEGREE
+    # Use the latitude furthest from the equator so the box never undershoots.
+    widest = min(max(abs(lat - dlat), abs(lat + dlat)), 89.9)
+    dlng = radius_km / (KM_PER_DEGREE * cos(radians(widest)))
+    return lat - dlat, lat + dlat, lng - dlng, lng + dlng
+
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def geohash(lat, lng, precision):
+    """Encode a point as a geohash string of `precision` characters."""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, code, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        code <<= 1
+        if value >= mid:
+            code |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[code])
+            bits, code = 0, 0
+    return ''.join(chars)
+
+
+def geohash_bounds(cell):
+    """Return (min_lat, max_lat, min_lng, max_lng) of a geohash cell."""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in cell:
+        code = GEOHASH_ALPHABET.index(char)
+        for shift in range(4, -1, -1):
+            rng = lng_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if code >> shift & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+    return lat_range[0], lat_range[1], lng_range[0], lng_range[1]
+
+
+def haversine_many(lat, lng, lats, lngs):
+    """
+    Distances in kilometres from one origin to many points in a single
+    vectorised call. `lats`/`lngs` are sequences of decimal degrees; the
+    result is a float64 array aligned with them. Falls back to the scalar
+    haversine when NumPy is not installed.
+    """
+    if np is None:
+        return array('d', (haversine(lng, lat, p_lng, p_lat) for p_lat, p_lng in zip(lats, lngs)))
+    lat1 = np.radians(lat)
+    lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+    dlat = lat2 - lat1
+    dlng = np.radians(np.asarray(lngs, dtype=np.float64) - lng)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def haversine_matrix(origin_lats, origin_lngs, lats, lngs):
+    """
+    Distances in kilometres from every origin to every point, as a
+    len(origins) x len(points) matrix (a list of arrays without NumPy).
+    """
+    if np is None:
+        return [haversine_many(o_lat, o_lng, lats, lngs) for o_lat, o_lng in zip(origin_lats, origin_lngs)]
+    lat1 = np.radians(np.asarray(origin_lats, dtype=np.float64))[:, None]
+    lng1 = np.radians(np.asarray(origin_lngs, dtype=np.float64))[:, None]
+    lat2 = np.radians(np.asarray(lats, dtype=np.float64))[None, :]
+    lng2 = np.radians(np.asarray(lngs, dtype=np.float64))[None, :]
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class CoordinateArray:
+    """
+    POI coordinates held in contiguous float64 arrays, with a parallel
+    list of keys, so distance queries run over whole columns at once.
+    """
+
+    def __init__(self, keys=(), lats=(), lngs=()):
+        self.keys = list(keys)
+        self.lats = array('d', lats)
+        self.lngs = array('d', lngs)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def append(self, key, lat, lng):
+        self.keys.append(key)
+        self.lats.append(lat)
+        self.lngs.append(lng)
+
+    def distances_from(self, lat, lng):
+        return haversine_many(lat, lng, self.lats, self.lngs)
+
+    def within(self, lat, lng, radius_km):
+        """Return [(distance_km, key), ...] inside the radius, nearest first."""
+        if not self.keys:
+            return []
+        distances = self.distances_from(lat, lng)
+        hits = [(float(d), key) for d, key in zip(distances, self.keys) if d <= radius_km]
+        hits.sort()
+        return hits
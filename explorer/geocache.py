@@ -0,0 +1,126 @@
+"""
+In-process cache for radius searches from near-identical origins.
+
+Searches are grouped by (geohash cell, radius, place type), with the cell
+precision chosen so cells are no taller than the radius. The first search
+from a cell loads every candidate that any origin inside the cell could
+reach (the cell grown by the radius) from the spatial index; later
+searches from the same cell only recompute exact distances over those
+cached coordinates, so results are identical to an uncached search.
+Entries are evicted least-recently-used and dropped as soon as a POI
+inside their candidate area is written.
+
+The cache lives in each worker process, so writes also bump its shared
+version counter (see explorer.versions) and entries cached under an
+older version, or older than MAX_AGE_SECONDS, are discarded on read.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from . import versions
+from .geo import CoordinateArray, bounding_box, geohash, geohash_bounds, haversine
+from .spatial import get_index
+
+
+MAX_ENTRIES = 512
+MAX_AGE_SECONDS = versions.MAX_AGE_SECONDS
+
+# Approximate geohash cell height in km per precision
+CELL_HEIGHT_KM = {3: 156, 4: 19.5, 5: 4.9, 6: 0.61, 7: 0.153}
+
+
+def precision_for(radius_km):
+    """The coarsest geohash precision whose cells are no taller than the radius."""
+    for precision, height in sorted(CELL_HEIGHT_KM.items()):
+        if height <= radius_km:
+            return precision
+    return max(CELL_HEIGHT_KM)
+
+
+class GeoResultCache:
+    """LRU map of search keys to candidate coordinates and the area they cover."""
+
+    def __init__(self, max_entries=MAX_ENTRIES, max_age=MAX_AGE_SECONDS, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, version=0):
+        """Return (box, candidates), or None if missing, expired or cached under another version."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            box, candidates, entry_version, stored_at = entry
+            if entry_version != version or self.clock() - stored_at > self.max_age:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return box, candidates
+
+    def put(self, key, box, candidates, version=0):
+        with self._lock:
+            self._entries[key] = (box, candidates, version, self.clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_point(self, lat, lng):
+        """Drop every entry whose candidate area contains the point."""
+        with self._lock:
+            stale = [
+                key for key, ((min_lat, max_lat, min_lng, max_lng), *_) in self._entries.items()
+                if min_lat <= lat <= max_lat and min_lng <= lng <= max_lng
+            ]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = GeoResultCache()
+
+
+def within(lat, lng, radius_km, tag=None):
+    """Cached SpatialIndex.within(), optionally restricted to a tag."""
+    cell = geohash(lat, lng, precision_for(radius_km))
+    key = (cell, radius_km, tag or '')
+    version = versions.current('geocache')
+    entry = _cache.get(key, version)
+    if entry is None:
+        min_lat, max_lat, min_lng, max_lng = geohash_bounds(cell)
+        centre_lat, centre_lng = (min_lat + max_lat) / 2, (min_lng + max_lng) / 2
+        # Any origin in the cell is at most half a diagonal from its centre
+        reach = radius_km + haversine(centre_lng, centre_lat, max_lng, max_lat)
+        box = bounding_box(centre_lat, centre_lng, reach)
+        candidates = CoordinateArray()
+        for kind, pk, p_lat, p_lng in get_index().candidates(*box, tag=tag):
+            candidates.append((kind, pk), p_lat, p_lng)
+        _cache.put(key, box, candidates, version)
+    else:
+        _, candidates = entry
+    return [(dist, kind, pk) for dist, (kind, pk) in candidates.within(lat, lng, radius_km)]
+
+
+def invalidate_points(points):
+    """
+    Drop this worker's entries around the written points now, and every
+    worker's entries once the write commits (before it, other workers
+    could only recache the old rows).
+    """
+    for lat, lng in points:
+        if lat is not None and lng is not None:
+            _cache.invalidate_point(lat, lng)
+    versions.bump('geocache')
+
+
+def clear():
+    _cache.clear()
@@ -0,0 +1,46 @@
+# Generated by Django 6.0.2 on 2026-10-18 18:40
+
+from django.db import migrations
+
+
+KINDS = ('place', 'hill_station', 'destination')
+
+
+def create_rtree(apps, schema_editor):
+    """Create and populate the R*Tree mirror of POI coordinates (SQLite only)."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        'CREATE VIRTUAL TABLE IF NOT EXISTS explorer_poi_rtree '
+        'USING rtree(id, min_lat, max_lat, min_lng, max_lng)'
+    )
+    sources = (
+        ('place', apps.get_model('explorer', 'Place')),
+        ('hill_station', apps.get_model('explorer', 'HillStation')),
+        ('destination', apps.get_model('destinations', 'Destination')),
+    )
+    for kind, model in sources:
+        coords = model.objects.filter(latitude__isnull=False, longitude__isnull=False)
+        for pk, lat, lng in coords.values_list('pk', 'latitude', 'longitude'):
+            schema_editor.execute(
+                'INSERT OR REPLACE INTO explorer_poi_rtree VALUES (%s, %s, %s, %s, %s)',
+                [pk * len(KINDS) + KINDS.index(kind), lat, lat, lng, lng],
+            )
+
+
+def drop_rtree(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS explorer_poi_rtree')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('explorer', '0003_place_latitude_place_longitude'),
+        ('destinations', '0002_destination_latitude_destination_longitude'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_rtree, drop_rtree),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 6.0.2 on 2026-10-18 18:46
+
+from math import asin, ceil, cos, floor, radians, sin, sqrt
+
+from django.db import migrations, models
+
+
+NEARBY_RADIUS_KM = 25
+NEARBY_LIMIT = 6
+KM_PER_DEGREE = 111.195
+# Bucket size in degrees of latitude; one cell is wider than the search radius
+CELL = 0.25
+
+
+def haversine(lat1, lng1, lat2, lng2):
+    a = sin(radians(lat2 - lat1) / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(radians(lng2 - lng1) / 2) ** 2
+    return 2 * 6371 * asin(sqrt(a))
+
+
+def populate_nearby(apps, schema_editor):
+    """Compute the initial neighbour lists for existing places and hill stations."""
+    NearbyPlace = apps.get_model('explorer', 'NearbyPlace')
+    cells = {}
+    for kind, model in (('place', apps.get_model('explorer', 'Place')),
+                        ('hill_station', apps.get_model('explorer', 'HillStation'))):
+        coords = model.objects.filter(latitude__isnull=False, longitude__isnull=False)
+        for pk, lat, lng in coords.values_list('pk', 'latitude', 'longitude'):
+            cells.setdefault((floor(lat / CELL), floor(lng / CELL)), []).append((kind, pk, lat, lng))
+
+    # Only the surrounding cells can hold neighbours, so each point is compared with its area, not every row
+    rows = []
+    for (row, col), points in cells.items():
+        for kind, pk, lat, lng in points:
+            lng_reach = ceil(NEARBY_RADIUS_KM / (KM_PER_DEGREE * CELL * max(cos(radians(abs(lat) + CELL)), 0.01)))
+            hits = []
+            for d_row in (-1, 0, 1):
+                for d_col in range(-lng_reach, lng_reach + 1):
+                    for t_kind, t_pk, t_lat, t_lng in cells.get((row + d_row, col + d_col), ()):
+                        if (t_kind, t_pk) != (kind, pk):
+                            dist = haversine(lat, lng, t_lat, t_lng)
+                            if dist <= NEARBY_RADIUS_KM:
+                                hits.append((dist, t_kind, t_pk))
+            rows.extend(
+                NearbyPlace(source_type=kind, source_id=pk, target_type=t_kind, target_id=t_pk,
+                            distance_km=round(dist, 2), rank=rank)
+                for rank, (dist, t_kind, t_pk) in enumerate(sorted(hits)[:NEARBY_LIMIT], 1)
+            )
+    NearbyPlace.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('explorer', '0004_poi_rtree'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NearbyPlace',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_type', models.CharField(choices=[('place', 'Place'), ('hill_station', 'Hill Station')], max_length=20)),
+                ('source_id', models.PositiveBigIntegerField()),
+                ('target_type', models.CharField(choices=[('place', 'Place'), ('hill_station', 'Hill Station')], max_length=20)),
+                ('target_id', models.PositiveBigIntegerField()),
+                ('distance_km', models.FloatField()),
+                ('rank', models.PositiveSmallIntegerField()),
+            ],
+            options={
+                'ordering': ['source_type', 'source_id', 'rank'],
+                'indexes': [models.Index(fields=['source_type', 'source_id', 'rank'], name='explorer_nearby_source_idx'), models.Index(fields=['target_type', 'target_id'], name='explorer_nearby_target_idx')],
+            },
+        ),
+        migrations.RunPython(populate_nearby, migrations.RunPython.noop),
+    ]
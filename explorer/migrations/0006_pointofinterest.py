@@ -0,0 +1,98 @@
+# Generated by Django 6.0.2 on 2026-10-18 18:52
+
+from django.db import migrations, models
+
+
+INTEREST_CATEGORIES = {
+    'temples': 'HISTORICAL',
+    'adventure': 'ADVENTURE',
+    'hill_stations': 'HILL_STATION',
+    'food': 'CITY',
+    'shopping': 'CITY',
+    'beaches': 'BEACH',
+    'historical': 'HISTORICAL',
+    'nature': 'NATURE',
+}
+
+
+def file_url(field):
+    try:
+        return field.url if field else ''
+    except ValueError:
+        return ''
+
+
+def poi_values(kind, obj):
+    """The PointOfInterest columns for a source row, as explorer.poi computed them at this migration."""
+    if kind == 'place':
+        category, location, extra, thumbnail = obj.category, obj.location, '', file_url(obj.image)
+    elif kind == 'hill_station':
+        category, location, extra, thumbnail = 'HILL_STATION', f"{obj.city}, {obj.state}", obj.district, file_url(obj.image)
+    elif kind == 'destination':
+        category, location, extra, thumbnail = 'CITY', obj.location, '', file_url(obj.photo)
+    else:
+        category = INTEREST_CATEGORIES.get(obj.interest_category, 'OTHER')
+        location = obj.location
+        extra = obj.interest_category.replace('_', ' ')
+        thumbnail = file_url(obj.image) or obj.image_url or ''
+    return {
+        'name': obj.name,
+        'category': category,
+        'location': location,
+        'summary': (obj.description or '')[:300],
+        'latitude': getattr(obj, 'latitude', None),
+        'longitude': getattr(obj, 'longitude', None),
+        'thumbnail_url': thumbnail,
+        'search_text': ' '.join([obj.name, location, extra, category.replace('_', ' ')]).lower(),
+    }
+
+
+def populate_points_of_interest(apps, schema_editor):
+    PointOfInterest = apps.get_model('explorer', 'PointOfInterest')
+    sources = (
+        ('place', apps.get_model('explorer', 'Place').objects.all()),
+        ('hill_station', apps.get_model('explorer', 'HillStation').objects.all()),
+        ('destination', apps.get_model('destinations', 'Destination').objects.all()),
+        ('tourist_place', apps.get_model('itinerary', 'TouristPlace').objects.filter(is_active=True)),
+    )
+    PointOfInterest.objects.bulk_create([
+        PointOfInterest(kind=kind, source_id=obj.pk, **poi_values(kind, obj))
+        for kind, queryset in sources
+        for obj in queryset
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('explorer', '0005_nearbyplace'),
+        ('itinerary', '0003_tripbudget'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PointOfInterest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('place', 'Place'), ('hill_station', 'Hill Station'), ('destination', 'Destination'), ('tourist_place', 'Tourist Place')], max_length=20)),
+                ('source_id', models.PositiveBigIntegerField()),
+                ('name', models.CharField(max_length=200)),
+                ('category', models.CharField(choices=[('BEACH', 'Beach'), ('HILL_STATION', 'Hill Station'), ('HISTORICAL', 'Historical Place'), ('NATURE', 'Nature / Wildlife'), ('ADVENTURE', 'Adventure'), ('CITY', 'City / Urban'), ('OTHER', 'Other')], default='OTHER', max_length=20)),
+                ('location', models.CharField(blank=True, max_length=250)),
+                ('summary', models.CharField(blank=True, max_length=300)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('thumbnail_url', models.CharField(blank=True, max_length=500)),
+                ('search_text', models.TextField(blank=True, help_text='Lowercased name, location and category')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Point of Interest',
+                'verbose_name_plural': 'Points of Interest',
+                'ordering': ['kind', 'name'],
+                'indexes': [models.Index(fields=['category', 'kind'], name='explorer_poi_category_idx')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'source_id'), name='explorer_poi_unique_source')],
+            },
+        ),
+        migrations.RunPython(populate_points_of_interest, migrations.RunPython.noop),
+    ]
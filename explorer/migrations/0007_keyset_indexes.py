@@ -0,0 +1,25 @@
+# Generated by Django 6.0.2 on 2026-10-18 19:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('explorer', '0006_pointofinterest'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='hillstation',
+            index=models.Index(fields=['created_date', 'id'], name='explorer_hill_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='place',
+            index=models.Index(fields=['date_added', 'id'], name='explorer_place_added_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pointofinterest',
+            index=models.Index(fields=['kind', 'name', 'id'], name='explorer_poi_kind_name_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 6.0.2 on 2026-10-18 19:10
+
+from django.db import migrations
+
+
+KINDS = ('place', 'hill_station', 'destination')
+
+
+def create_fts(apps, schema_editor):
+    """Create and populate the FTS5 full-text mirror (SQLite only)."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        'CREATE VIRTUAL TABLE IF NOT EXISTS explorer_search_fts USING fts5('
+        "name, location, description, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    Place = apps.get_model('explorer', 'Place')
+    HillStation = apps.get_model('explorer', 'HillStation')
+    Destination = apps.get_model('destinations', 'Destination')
+    rows = []
+    for pk, name, location, description in Place.objects.values_list('pk', 'name', 'location', 'description'):
+        rows.append(('place', pk, name, location, description))
+    for pk, name, city, district, state, description in HillStation.objects.values_list(
+            'pk', 'name', 'city', 'district', 'state', 'description'):
+        location = ', '.join(part for part in (city, district, state) if part)
+        rows.append(('hill_station', pk, name, location, description))
+    for pk, name, location, description in Destination.objects.values_list('pk', 'name', 'location', 'description'):
+        rows.append(('destination', pk, name, location, description))
+    for kind, pk, name, location, description in rows:
+        schema_editor.execute(
+            'INSERT INTO explorer_search_fts (rowid, name, location, description) VALUES (%s, %s, %s, %s)',
+            [pk * len(KINDS) + KINDS.index(kind), name, location, description or ''],
+        )
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS explorer_search_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('explorer', '0007_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 6.0.2 on 2026-10-18 19:18
+
+import re
+
+from django.db import migrations, models
+
+
+def trigram_rows(kind, source_id, name, location):
+    """The SearchTrigram rows for one POI, as explorer.fuzzy computed them at this migration."""
+    terms = {}
+    for term in [name] + (location or '').split(','):
+        term = term.strip()
+        if term:
+            terms.setdefault(term.lower(), term)
+    for term in terms.values():
+        grams = set()
+        for word in re.sub(r'[^\w\s&]', ' ', term.lower()).split():
+            padded = f'  {word} '
+            grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+        for gram in grams:
+            yield {'trigram': gram, 'kind': kind, 'source_id': source_id, 'term': term[:200], 'size': len(grams)}
+
+
+def populate_trigrams(apps, schema_editor):
+    PointOfInterest = apps.get_model('explorer', 'PointOfInterest')
+    SearchTrigram = apps.get_model('explorer', 'SearchTrigram')
+    SearchTrigram.objects.bulk_create([
+        SearchTrigram(**row)
+        for kind, source_id, name, location in PointOfInterest.objects.values_list('kind', 'source_id', 'name', 'location')
+        for row in trigram_rows(kind, source_id, name, location)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('explorer', '0008_search_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigram', models.CharField(max_length=3)),
+                ('kind', models.CharField(choices=[('place', 'Place'), ('hill_station', 'Hill Station'), ('destination', 'Destination'), ('tourist_place', 'Tourist Place')], max_length=20)),
+                ('source_id', models.PositiveBigIntegerField()),
+                ('term', models.CharField(max_length=200)),
+                ('size', models.PositiveSmallIntegerField(help_text='Number of distinct trigrams in the term')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['trigram', 'kind'], name='explorer_trigram_idx'), models.Index(fields=['kind', 'source_id'], name='explorer_trigram_source_idx')],
+            },
+        ),
+        migrations.RunPython(populate_trigrams, migrations.RunPython.noop),
+    ]
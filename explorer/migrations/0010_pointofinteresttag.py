@@ -0,0 +1,92 @@
+# Generated by Django 6.0.2 on 2026-10-18 19:25
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+CATEGORY_TAGS = {
+    'BEACH': 'beach',
+    'HILL_STATION': 'hill_station',
+    'HISTORICAL': 'historical',
+    'NATURE': 'nature',
+    'ADVENTURE': 'adventure',
+    'CITY': 'city',
+}
+TAG_KEYWORDS = {
+    'temple': ('temple', 'temples', 'mandir', 'kovil', 'shrine', 'devasthanam'),
+    'church': ('church', 'cathedral', 'basilica'),
+    'mosque': ('mosque', 'masjid', 'dargah'),
+    'beach': ('beach', 'beaches', 'seashore'),
+    'fort': ('fort', 'forts', 'fortress', 'qila'),
+    'palace': ('palace', 'palaces', 'mahal'),
+    'waterfall': ('waterfall', 'waterfalls', 'falls'),
+    'lake': ('lake', 'lakes', 'backwater', 'backwaters'),
+    'museum': ('museum', 'museums', 'gallery'),
+    'wildlife': ('wildlife', 'sanctuary', 'national park', 'tiger reserve'),
+    'trek': ('trek', 'treks', 'trekking', 'hike', 'hiking'),
+    'viewpoint': ('viewpoint', 'view point', 'sunset point', 'peak'),
+}
+KEYWORD_PATTERNS = {
+    tag: re.compile(r'\b(?:' + '|'.join(re.escape(word) for word in words) + r')\b')
+    for tag, words in TAG_KEYWORDS.items()
+}
+
+
+def derive_tags(category, name, description):
+    """A POI's tags as explorer.tags derived them at this migration (0013 namespaces the category ones)."""
+    tags = {CATEGORY_TAGS[category]} if category in CATEGORY_TAGS else set()
+    text = f"{name} {description or ''}".lower()
+    tags.update(tag for tag, pattern in KEYWORD_PATTERNS.items() if pattern.search(text))
+    return sorted(tags)
+
+
+def populate_tags(apps, schema_editor):
+    PointOfInterest = apps.get_model('explorer', 'PointOfInterest')
+    PointOfInterestTag = apps.get_model('explorer', 'PointOfInterestTag')
+    points = {
+        (kind, source_id): (pk, category, name)
+        for pk, kind, source_id, category, name in PointOfInterest.objects.values_list(
+            'pk', 'kind', 'source_id', 'category', 'name',
+        )
+    }
+    sources = (
+        ('place', apps.get_model('explorer', 'Place').objects.all()),
+        ('hill_station', apps.get_model('explorer', 'HillStation').objects.all()),
+        ('destination', apps.get_model('destinations', 'Destination').objects.all()),
+        ('tourist_place', apps.get_model('itinerary', 'TouristPlace').objects.filter(is_active=True)),
+    )
+    tags = []
+    for kind, queryset in sources:
+        for source_id, description in queryset.values_list('pk', 'description'):
+            point = points.get((kind, source_id))
+            if point is None:
+                continue
+            pk, category, name = point
+            tags.extend(PointOfInterestTag(point_id=pk, tag=tag) for tag in derive_tags(category, name, description))
+    PointOfInterestTag.objects.bulk_create(tags, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('explorer', '0009_searchtrigram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PointOfInterestTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.CharField(max_length=30)),
+                ('point', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tags', to='explorer.pointofinterest')),
+            ],
+            options={
+                'ordering': ['tag'],
+                'indexes': [models.Index(fields=['tag', 'point'], name='explorer_poi_tag_idx')],
+                'constraints': [models.UniqueConstraint(fields=('point', 'tag'), name='explorer_poi_tag_unique')],
+            },
+        ),
+        migrations.RunPython(populate_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 6.0.2 on 2026-10-18 19:31
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+# facet name -> (source kind, model field), as in explorer.facets
+FACETS = {
+    'place_category': ('place', 'category'),
+    'hill_station_state': ('hill_station', 'state'),
+    'hill_station_city': ('hill_station', 'city'),
+}
+
+
+def populate_facets(apps, schema_editor):
+    FacetCount = apps.get_model('explorer', 'FacetCount')
+    models_by_kind = {
+        'place': apps.get_model('explorer', 'Place'),
+        'hill_station': apps.get_model('explorer', 'HillStation'),
+    }
+    rows = []
+    for facet, (kind, field) in FACETS.items():
+        grouped = models_by_kind[kind].objects.exclude(**{field: ''}).values(field).annotate(n=Count('pk')).order_by()
+        rows.extend(FacetCount(facet=facet, value=row[field], count=row['n']) for row in grouped)
+    FacetCount.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('explorer', '0010_pointofinteresttag'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(max_length=30)),
+                ('value', models.CharField(max_length=100)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['facet', 'value'],
+                'constraints': [models.UniqueConstraint(fields=('facet', 'value'), name='explorer_facet_unique_value')],
+            },
+        ),
+        migrations.RunPython(populate_facets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+import re
+
+from django.db import migrations
+
+
+CATEGORY_TAGS = {
+    'BEACH': 'category:beach',
+    'HILL_STATION': 'category:hill_station',
+    'HISTORICAL': 'category:historical',
+    'NATURE': 'category:nature',
+    'ADVENTURE': 'category:adventure',
+    'CITY': 'category:city',
+}
+# Bare category tags that no keyword produces; 'beach' is also a keyword tag
+CATEGORY_ONLY_TAGS = ['hill_station', 'historical', 'nature', 'adventure', 'city']
+BEACH_KEYWORDS = re.compile(r'\b(?:beach|beaches|seashore)\b')
+
+
+def namespace_category_tags(apps, schema_editor):
+    PointOfInterest = apps.get_model('explorer', 'PointOfInterest')
+    PointOfInterestTag = apps.get_model('explorer', 'PointOfInterestTag')
+    sources = {
+        'place': apps.get_model('explorer', 'Place'),
+        'hill_station': apps.get_model('explorer', 'HillStation'),
+        'destination': apps.get_model('destinations', 'Destination'),
+        'tourist_place': apps.get_model('itinerary', 'TouristPlace'),
+    }
+
+    PointOfInterestTag.objects.bulk_create([
+        PointOfInterestTag(point_id=pk, tag=CATEGORY_TAGS[category])
+        for pk, category in PointOfInterest.objects.filter(
+            category__in=CATEGORY_TAGS,
+        ).values_list('pk', 'category').iterator()
+    ], batch_size=1000, ignore_conflicts=True)
+    PointOfInterestTag.objects.filter(tag__in=CATEGORY_ONLY_TAGS).delete()
+
+    # A bare 'beach' on a BEACH point may only have come from its category
+    stale = []
+    beach_tags = PointOfInterestTag.objects.filter(tag='beach', point__category='BEACH')
+    for tag_pk, kind, source_id, name in beach_tags.values_list(
+        'pk', 'point__kind', 'point__source_id', 'point__name',
+    ).iterator():
+        description = sources[kind].objects.filter(pk=source_id).values_list('description', flat=True).first()
+        if not BEACH_KEYWORDS.search(f"{name} {description or ''}".lower()):
+            stale.append(tag_pk)
+    PointOfInterestTag.objects.filter(pk__in=stale).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('explorer', '0011_facetcount'),
+        ('destinations', '0002_destination_latitude_destination_longitude'),
+        ('itinerary', '0003_tripbudget'),
+    ]
+
+    operations = [
+        migrations.RunPython(namespace_category_tags, migrations.RunPython.noop),
+    ]
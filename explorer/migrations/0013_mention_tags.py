@@ -0,0 +1,49 @@
+# Generated by Django 6.0.2 on 2026-10-18 19:44
+
+import re
+
+from django.db import migrations
+
+
+TAG_KEYWORDS = {
+    'temple': ('temple', 'temples', 'mandir', 'kovil', 'shrine', 'devasthanam'),
+    'church': ('church', 'cathedral', 'basilica'),
+    'mosque': ('mosque', 'masjid', 'dargah'),
+    'beach': ('beach', 'beaches', 'seashore'),
+    'fort': ('fort', 'forts', 'fortress', 'qila'),
+    'palace': ('palace', 'palaces', 'mahal'),
+    'waterfall': ('waterfall', 'waterfalls', 'falls'),
+    'lake': ('lake', 'lakes', 'backwater', 'backwaters'),
+    'museum': ('museum', 'museums', 'gallery'),
+    'wildlife': ('wildlife', 'sanctuary', 'national park', 'tiger reserve'),
+    'trek': ('trek', 'treks', 'trekking', 'hike', 'hiking'),
+    'viewpoint': ('viewpoint', 'view point', 'sunset point', 'peak'),
+}
+KEYWORD_PATTERNS = {
+    tag: re.compile(r'\b(?:' + '|'.join(re.escape(word) for word in words) + r')\b')
+    for tag, words in TAG_KEYWORDS.items()
+}
+
+
+def split_mention_tags(apps, schema_editor):
+    """Keyword tags not backed by the POI's name only came from its description: move them to mentions:."""
+    PointOfInterestTag = apps.get_model('explorer', 'PointOfInterestTag')
+    mentions = {}
+    rows = PointOfInterestTag.objects.filter(tag__in=TAG_KEYWORDS).values_list('pk', 'tag', 'point__name')
+    for pk, tag, name in rows.iterator():
+        if not KEYWORD_PATTERNS[tag].search(name.lower()):
+            mentions.setdefault(tag, []).append(pk)
+    for tag, pks in mentions.items():
+        for start in range(0, len(pks), 500):
+            PointOfInterestTag.objects.filter(pk__in=pks[start:start + 500]).update(tag=f'mentions:{tag}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('explorer', '0012_category_tag_namespace'),
+    ]
+
+    operations = [
+        migrations.RunPython(split_mention_tags, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,16 @@
 from django.db import models
+from django.urls import reverse
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from destinations.models import Destination
+from itinerary.models import TouristPlace
+
+from . import autocomplete, clusters, facets, fuzzy, geocache
+from .fulltext import fulltext_available, index_document, remove_document
+from .nearby import forget, rebuild_source, refresh_neighbourhood
+from .poi import sync_poi, remove_poi
+from .spatial import after_index_commit, index_update, index_remove
 
 
 class Place(models.Model):
@@ -23,6 +35,9 @@ class Place(models.Model):
 
     class Meta:
         ordering = ['-date_added']
+        indexes = [
+            models.Index(fields=['date_added', 'id'], name='explorer_place_added_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.get_category_display()})"
@@ -46,6 +61,328 @@ class HillStation(models.Model):
         ordering = ['-created_date']
         verbose_name = "Hill Station"
         verbose_name_plural = "Hill Stations"
+        indexes = [
+            models.Index(fields=['created_date', 'id'], name='explorer_hill_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.city}, {self.state}"
+
+
+
+class NearbyPlace(models.Model):
+    """
+    Precomputed neighbour of a place or hill station, shown on detail pages.
+    Rows are rebuilt by the receivers below whenever a nearby source changes.
+    """
+    RESULT_TYPE_CHOICES = [
+        ('place', 'Place'),
+        ('hill_station', 'Hill Station'),
+    ]
+
+    source_type = models.CharField(max_length=20, choices=RESULT_TYPE_CHOICES)
+    source_id = models.PositiveBigIntegerField()
+    target_type = models.CharField(max_length=20, choices=RESULT_TYPE_CHOICES)
+    target_id = models.PositiveBigIntegerField()
+    distance_km = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ['source_type', 'source_id', 'rank']
+        indexes = [
+            models.Index(fields=['source_type', 'source_id', 'rank'], name='explorer_nearby_source_idx'),
+            models.Index(fields=['target_type', 'target_id'], name='explorer_nearby_target_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.source_type} {self.source_id} -> {self.target_type} {self.target_id} ({self.distance_km} km)"
+
+
+class PointOfInterest(models.Model):
+    """
+    Denormalised read model over every searchable tourist model.
+    One row per Place, HillStation, Destination and active TouristPlace,
+    maintained by the receivers below (see explorer.poi).
+    """
+    KIND_CHOICES = [
+        ('place', 'Place'),
+        ('hill_station', 'Hill Station'),
+        ('destination', 'Destination'),
+        ('tourist_place', 'Tourist Place'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    source_id = models.PositiveBigIntegerField()
+    name = models.CharField(max_length=200)
+    category = models.CharField(max_length=20, choices=Place.CATEGORY_CHOICES, default='OTHER')
+    location = models.CharField(max_length=250, blank=True)
+    summary = models.CharField(max_length=300, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    thumbnail_url = models.CharField(max_length=500, blank=True)
+    search_text = models.TextField(blank=True, help_text="Lowercased name, location and category")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['kind', 'name']
+        verbose_name = "Point of Interest"
+        verbose_name_plural = "Points of Interest"
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'source_id'], name='explorer_poi_unique_source'),
+        ]
+        indexes = [
+            models.Index(fields=['category', 'kind'], name='explorer_poi_category_idx'),
+            models.Index(fields=['kind', 'name', 'id'], name='explorer_poi_kind_name_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.get_kind_display()})"
+
+    @property
+    def result_type(self):
+        return self.kind
+
+    def get_absolute_url(self):
+        if self.kind == 'place':
+            return reverse('explorer-detail', args=[self.source_id])
+        if self.kind == 'hill_station':
+            return reverse('hill-station-detail', args=[self.source_id])
+        if self.kind == 'destination':
+            return reverse('destination-detail', args=[self.source_id])
+        return reverse('itinerary-create')
+
+
+class PointOfInterestTag(models.Model):
+    """A precomputed tag of a point of interest (see explorer.tags)."""
+    point = models.ForeignKey(PointOfInterest, on_delete=models.CASCADE, related_name='tags')
+    tag = models.CharField(max_length=30)
+
+    class Meta:
+        ordering = ['tag']
+        constraints = [
+            models.UniqueConstraint(fields=['point', 'tag'], name='explorer_poi_tag_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['tag', 'point'], name='explorer_poi_tag_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.point.name}: {self.tag}"
+
+
+class FacetCount(models.Model):
+    """
+    Number of rows with one value of a list-page filter, e.g. hill
+    stations per state. Adjusted incrementally (see explorer.facets).
+    """
+    facet = models.CharField(max_length=30)
+    value = models.CharField(max_length=100)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['facet', 'value']
+        constraints = [
+            models.UniqueConstraint(fields=['facet', 'value'], name='explorer_facet_unique_value'),
+        ]
+
+    def __str__(self):
+        return f"{self.facet}={self.value}: {self.count}"
+
+
+class SearchTrigram(models.Model):
+    """
+    One trigram of a searchable POI term (name, city, state or location
+    part), precomputed for typo-tolerant search (see explorer.fuzzy).
+    """
+    trigram = models.CharField(max_length=3)
+    kind = models.CharField(max_length=20, choices=PointOfInterest.KIND_CHOICES)
+    source_id = models.PositiveBigIntegerField()
+    term = models.CharField(max_length=200)
+    size = models.PositiveSmallIntegerField(help_text="Number of distinct trigrams in the term")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['trigram', 'kind'], name='explorer_trigram_idx'),
+            models.Index(fields=['kind', 'source_id'], name='explorer_trigram_source_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.trigram!r} in {self.term}"
+
+
+@receiver(post_save, sender=Place)
+def index_place(sender, instance, **kwargs):
+    index_update('place', instance.pk, instance.latitude, instance.longitude)
+
+
+@receiver(post_delete, sender=Place)
+def unindex_place(sender, instance, **kwargs):
+    index_remove('place', instance.pk)
+
+
+@receiver(post_save, sender=HillStation)
+def index_hill_station(sender, instance, **kwargs):
+    index_update('hill_station', instance.pk, instance.latitude, instance.longitude)
+
+
+@receiver(post_delete, sender=HillStation)
+def unindex_hill_station(sender, instance, **kwargs):
+    index_remove('hill_station', instance.pk)
+
+
+@receiver(post_save, sender=Destination)
+def index_destination(sender, instance, **kwargs):
+    index_update('destination', instance.pk, instance.latitude, instance.longitude)
+
+
+@receiver(post_delete, sender=Destination)
+def unindex_destination(sender, instance, **kwargs):
+    index_remove('destination', instance.pk)
+
+
+@receiver(pre_save, sender=Place)
+@receiver(pre_save, sender=HillStation)
+def remember_coordinates(sender, instance, **kwargs):
+    """Keep the stored coordinates so the old neighbourhood can be refreshed too."""
+    instance._previous_coordinates = None
+    if instance.pk:
+        instance._previous_coordinates = (
+            sender.objects.filter(pk=instance.pk).values_list('latitude', 'longitude').first()
+        )
+
+
+def _refresh_nearby(kind, instance):
+    pk, lat, lng = instance.pk, instance.latitude, instance.longitude
+    previous = getattr(instance, '_previous_coordinates', None)
+    if previous == (lat, lng):
+        # Neighbour lists only depend on coordinates; a name or text edit leaves them as they are
+        return
+    points = [(lat, lng)]
+    if previous:
+        points.append(previous)
+
+    def refresh():
+        rebuild_source(kind, pk, lat, lng)
+        refresh_neighbourhood(kind, pk, points)
+
+    after_index_commit(refresh)
+
+
+@receiver(post_save, sender=Place)
+def refresh_place_nearby(sender, instance, **kwargs):
+    _refresh_nearby('place', instance)
+
+
+@receiver(post_save, sender=HillStation)
+def refresh_hill_station_nearby(sender, instance, **kwargs):
+    _refresh_nearby('hill_station', instance)
+
+
+@receiver(post_delete, sender=Place)
+def forget_place_nearby(sender, instance, **kwargs):
+    forget('place', instance.pk)
+    pk, points = instance.pk, [(instance.latitude, instance.longitude)]
+    after_index_commit(lambda: refresh_neighbourhood('place', pk, points))
+
+
+@receiver(post_delete, sender=HillStation)
+def forget_hill_station_nearby(sender, instance, **kwargs):
+    forget('hill_station', instance.pk)
+    pk, points = instance.pk, [(instance.latitude, instance.longitude)]
+    after_index_commit(lambda: refresh_neighbourhood('hill_station', pk, points))
+
+
+POI_KINDS = {
+    Place: 'place',
+    HillStation: 'hill_station',
+    Destination: 'destination',
+    TouristPlace: 'tourist_place',
+}
+
+
+@receiver(post_save, sender=Place)
+@receiver(post_save, sender=HillStation)
+@receiver(post_save, sender=Destination)
+@receiver(post_save, sender=TouristPlace)
+def sync_point_of_interest(sender, instance, **kwargs):
+    sync_poi(POI_KINDS[sender], instance)
+
+
+@receiver(post_delete, sender=Place)
+@receiver(post_delete, sender=HillStation)
+@receiver(post_delete, sender=Destination)
+@receiver(post_delete, sender=TouristPlace)
+def remove_point_of_interest(sender, instance, **kwargs):
+    remove_poi(POI_KINDS[sender], instance.pk)
+
+
+@receiver(post_save, sender=Place)
+@receiver(post_save, sender=HillStation)
+@receiver(post_save, sender=Destination)
+def index_search_text(sender, instance, **kwargs):
+    if fulltext_available():
+        index_document(POI_KINDS[sender], instance)
+
+
+@receiver(post_delete, sender=Place)
+@receiver(post_delete, sender=HillStation)
+@receiver(post_delete, sender=Destination)
+def unindex_search_text(sender, instance, **kwargs):
+    if fulltext_available():
+        remove_document(POI_KINDS[sender], instance.pk)
+
+
+@receiver(pre_save, sender=Place)
+@receiver(pre_save, sender=HillStation)
+def remember_facet_values(sender, instance, **kwargs):
+    """Keep the stored filter values so an edit can move the counts."""
+    fields = facets.facet_fields(POI_KINDS[sender])
+    instance._previous_facets = {}
+    if instance.pk:
+        row = sender.objects.filter(pk=instance.pk).values(*fields.values()).first()
+        if row:
+            instance._previous_facets = {facet: row[field] for facet, field in fields.items()}
+
+
+@receiver(post_save, sender=Place)
+@receiver(post_save, sender=HillStation)
+def count_facets(sender, instance, **kwargs):
+    before = getattr(instance, '_previous_facets', {})
+    facets.record_change(before, facets.facet_values(POI_KINDS[sender], instance))
+
+
+@receiver(post_delete, sender=Place)
+@receiver(post_delete, sender=HillStation)
+def uncount_facets(sender, instance, **kwargs):
+    facets.record_change(facets.facet_values(POI_KINDS[sender], instance), {})
+
+
+@receiver(post_save, sender=PointOfInterest)
+def index_poi_trigrams(sender, instance, **kwargs):
+    fuzzy.index_poi(instance)
+
+
+@receiver(post_delete, sender=PointOfInterest)
+def unindex_poi_trigrams(sender, instance, **kwargs):
+    fuzzy.remove_poi(instance.kind, instance.source_id)
+
+
+@receiver(pre_save, sender=PointOfInterest)
+def remember_poi_coordinates(sender, instance, **kwargs):
+    """Keep the stored coordinates so cached searches around the old spot are dropped too."""
+    instance._previous_coordinates = None
+    if instance.pk:
+        instance._previous_coordinates = (
+            sender.objects.filter(pk=instance.pk).values_list('latitude', 'longitude').first()
+        )
+
+
+@receiver(post_save, sender=PointOfInterest)
+@receiver(post_delete, sender=PointOfInterest)
+def invalidate_poi_caches(sender, instance, **kwargs):
+    autocomplete.invalidate()
+    clusters.invalidate()
+    points = [(instance.latitude, instance.longitude)]
+    if getattr(instance, '_previous_coordinates', None):
+        points.append(instance._previous_coordinates)
+    geocache.invalidate_points(points)
@@ -0,0 +1,184 @@
+"""
+Nearby-places lookups for the explorer detail pages.
+
+Neighbour lists only change when a place or hill station is written, so
+they are materialised into NearbyPlace rows. After a write, only the
+sources within NEARBY_RADIUS_KM of the old or new coordinates are
+recomputed; detail pages read their list back with one indexed query.
+"""
+from math import cos, radians
+
+from .geo import KM_PER_DEGREE, bounding_box, haversine_matrix, np
+from .spatial import get_index
+
+
+NEARBY_RADIUS_KM = 25
+NEARBY_LIMIT = 6
+EXPLORER_KINDS = ('place', 'hill_station')
+MAX_BATCH_ORIGINS = 100
+# Merged search areas stay local: at most a few search diameters a side
+MAX_MERGED_SPAN_KM = 8 * NEARBY_RADIUS_KM
+# Largest origins x candidates distance matrix computed for one merged area
+MAX_MATRIX_CELLS = 200_000
+
+
+def nearby_hits(lat, lng, exclude=None, limit=NEARBY_LIMIT):
+    """Return the closest [(distance_km, kind, pk), ...] around a point."""
+    if lat is None or lng is None:
+        return []
+    # One extra so the excluded source itself never costs a slot
+    hits = get_index().nearest(lat, lng, limit + 1, max_radius_km=NEARBY_RADIUS_KM, kinds=EXPLORER_KINDS)
+    return [hit for hit in hits if (hit[1], hit[2]) != exclude][:limit]
+
+
+def box_span_km(box):
+    """The longer side of a (min_lat, max_lat, min_lng, max_lng) box, in km."""
+    min_lat, max_lat, min_lng, max_lng = box
+    return max(max_lat - min_lat, (max_lng - min_lng) * cos(radians((min_lat + max_lat) / 2))) * KM_PER_DEGREE
+
+
+def merge_boxes(boxes, max_span_km=MAX_MERGED_SPAN_KM):
+    """
+    Merge overlapping (min_lat, max_lat, min_lng, max_lng) boxes so shared
+    ground is fetched once. Returns [(box, [input positions]), ...].
+
+    Two boxes are only merged while the result stays within max_span_km a
+    side, so a chain of origins strung across the country is read as a
+    series of local areas rather than one box covering all of it.
+    """
+    merged = []
+    for position, box in sorted(enumerate(boxes), key=lambda item: item[1]):
+        members = [position]
+        while True:
+            for i, (other, other_members) in enumerate(merged):
+                if not (box[0] <= other[1] and other[0] <= box[1] and box[2] <= other[3] and other[2] <= box[3]):
+                    continue
+                union = (min(box[0], other[0]), max(box[1], other[1]), min(box[2], other[2]), max(box[3], other[3]))
+                if box_span_km(union) > max_span_km:
+                    continue
+                del merged[i]
+                box, members = union, other_members + members
+                break
+            else:
+                break
+        merged.append((box, members))
+    return merged
+
+
+def nearby_hits_many(origins, limit=NEARBY_LIMIT):
+    """
+    nearby_hits() for many origins at once. `origins` is a list of
+    (lat, lng, exclude) and the result a list of hit lists aligned with it.
+
+    The search areas of nearby origins are merged and each merged area is
+    read from the spatial index once; distances from its origins to its
+    candidates are then computed in a single haversine_matrix pass. An area
+    whose matrix would exceed MAX_MATRIX_CELLS (a dense city, say) falls
+    back to one nearby_hits() per origin instead.
+    """
+    located = [i for i, (lat, lng, _) in enumerate(origins) if lat is not None and lng is not None]
+    results = [[] for _ in origins]
+    if not located:
+        return results
+
+    index = get_index()
+    groups = merge_boxes([bounding_box(origins[i][0], origins[i][1], NEARBY_RADIUS_KM) for i in located])
+    for box, members in groups:
+        members = [located[m] for m in members]
+        entries = [entry for entry in index.in_box(*box) if entry[0] in EXPLORER_KINDS]
+        if not entries:
+            continue
+        if len(members) * len(entries) > MAX_MATRIX_CELLS:
+            for i in members:
+                results[i] = nearby_hits(*origins[i], limit=limit)
+            continue
+
+        keys = [(kind, pk) for kind, pk, _, _ in entries]
+        matrix = haversine_matrix(
+            [origins[i][0] for i in members], [origins[i][1] for i in members],
+            [lat for _, _, lat, _ in entries], [lng for _, _, _, lng in entries],
+        )
+        for i, row in zip(members, matrix):
+            if np is not None:
+                close = np.nonzero(row <= NEARBY_RADIUS_KM)[0].tolist()
+            else:
+                close = [j for j, dist in enumerate(row) if dist <= NEARBY_RADIUS_KM]
+            exclude = origins[i][2]
+            hits = sorted((float(row[j]), *keys[j]) for j in close if keys[j] != exclude)
+            results[i] = hits[:limit]
+    return results
+
+
+def origin_coordinates(keys):
+    """{(kind, pk): (lat, lng)} for places and hill stations, one query per kind."""
+    from .models import Place, HillStation
+
+    coordinates = {}
+    for kind, model in (('place', Place), ('hill_station', HillStation)):
+        pks = [pk for key_kind, pk in keys if key_kind == kind]
+        if pks:
+            for pk, lat, lng in model.objects.filter(pk__in=pks).values_list('pk', 'latitude', 'longitude'):
+                coordinates[(kind, pk)] = (lat, lng)
+    return coordinates
+
+
+def stored_hits(kind, pk):
+    """Read the materialised neighbours of one source as index-style hits."""
+    from .models import NearbyPlace
+
+    rows = NearbyPlace.objects.filter(source_type=kind, source_id=pk)
+    return [
+        (distance_km, target_type, target_id)
+        for distance_km, target_type, target_id in rows.values_list('distance_km', 'target_type', 'target_id')
+    ]
+
+
+def _coordinates(kind, pk):
+    from .models import Place, HillStation
+
+    model = Place if kind == 'place' else HillStation
+    return model.objects.filter(pk=pk).values_list('latitude', 'longitude').first()
+
+
+def rebuild_source(kind, pk, lat=None, lng=None):
+    """Recompute the stored neighbour list of a single place or hill station."""
+    from .models import NearbyPlace
+
+    if lat is None or lng is None:
+        lat, lng = _coordinates(kind, pk) or (None, None)
+    NearbyPlace.objects.filter(source_type=kind, source_id=pk).delete()
+    NearbyPlace.objects.bulk_create([
+        NearbyPlace(
+            source_type=kind, source_id=pk,
+            target_type=target_type, target_id=target_id,
+            distance_km=round(dist, 2), rank=rank,
+        )
+        for rank, (dist, target_type, target_id) in enumerate(nearby_hits(lat, lng, exclude=(kind, pk)), 1)
+    ])
+
+
+def refresh_neighbourhood(kind, pk, points):
+    """
+    Rebuild the lists affected by a write to (kind, pk).
+
+    `points` are the coordinates the row had before and after the write;
+    any source whose top-N could include the row lies within the nearby
+    radius of one of them.
+    """
+    affected = set()
+    for lat, lng in points:
+        if lat is None or lng is None:
+            continue
+        for _, hit_kind, hit_pk in get_index().within(lat, lng, NEARBY_RADIUS_KM, kinds=EXPLORER_KINDS):
+            affected.add((hit_kind, hit_pk))
+    affected.discard((kind, pk))
+    for source_kind, source_pk in affected:
+        rebuild_source(source_kind, source_pk)
+
+
+def forget(kind, pk):
+    """Drop every stored row that mentions a deleted place or hill station."""
+    from .models import NearbyPlace
+
+    NearbyPlace.objects.filter(source_type=kind, source_id=pk).delete()
+    NearbyPlace.objects.filter(target_type=kind, target_id=pk).delete()
@@ -0,0 +1,147 @@
+"""
+Keyset (cursor) pagination for the explorer listings.
+
+A page is addressed by the sort key of the last row already shown rather
+than by an offset, so every page costs the same: the database seeks past
+the cursor on the ordering index and reads one page. Cursors are opaque
+URL-safe strings. Querysets use their ordering columns (ending in the
+primary key); geo-ordered results use the index hit (distance_km, kind, id).
+"""
+import base64
+import json
+from bisect import bisect_right
+from datetime import date
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+PAGE_SIZE = 24
+
+
+def encode_cursor(values):
+    raw = json.dumps(
+        [value.isoformat() if isinstance(value, date) else value for value in values],
+        separators=(',', ':'),
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, length):
+    """Return the key values in a cursor, or None if it is missing or malformed."""
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != length:
+        return None
+    return values
+
+
+def keyset_filter(ordering, values):
+    """
+    The rows strictly after `values` in `ordering`, e.g. for
+    ('-date_added', '-id'): date_added < v0 OR (date_added = v0 AND id < v1).
+    """
+    condition = Q()
+    for i, field in enumerate(ordering):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        step = Q(**{f'{name}__{lookup}': values[i]})
+        for previous, value in zip(ordering[:i], values):
+            step &= Q(**{previous.lstrip('-'): value})
+        condition |= step
+    return condition
+
+
+def cursor_values(model, ordering, values):
+    """
+    The cursor values converted to the ordering fields' types, or None if
+    any of them does not convert (a tampered or stale cursor), in which
+    case the listing starts again from the first page.
+    """
+    if values is None:
+        return None
+    converted = []
+    for field, value in zip(ordering, values):
+        try:
+            value = model._meta.get_field(field.lstrip('-')).to_python(value)
+        except (ValidationError, ValueError, TypeError):
+            return None
+        if value is None:
+            return None
+        converted.append(value)
+    return converted
+
+
+def paginate_queryset(queryset, ordering, cursor=None, page_size=PAGE_SIZE):
+    """
+    Return (rows, next_cursor) for one page of `queryset` sorted by
+    `ordering`, which must end in a unique column. next_cursor is None on
+    the last page.
+    """
+    queryset = queryset.order_by(*ordering)
+    values = cursor_values(queryset.model, ordering, decode_cursor(cursor, len(ordering)))
+    if values is not None:
+        queryset = queryset.filter(keyset_filter(ordering, values))
+    rows = list(queryset[:page_size + 1])
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, encode_cursor(getattr(rows[-1], field.lstrip('-')) for field in ordering)
+
+
+def _hit_key(values):
+    if values is None:
+        return None
+    distance, kind, pk = values
+    if isinstance(distance, (int, float)) and isinstance(kind, str) and isinstance(pk, int):
+        return (distance, kind, pk)
+    return None
+
+
+def paginate_hits(hits, fetch, cursor=None, page_size=PAGE_SIZE):
+    """
+    Return (rows, next_cursor) for one page of sorted index hits
+    [(distance_km, kind, pk), ...]. `fetch` turns a slice of hits into
+    rows in hit order, each carrying its hit as `row.hit`; it may drop
+    hits (filtered out or deleted), so hits are fetched in page-sized
+    batches until the page is full.
+    """
+    key = _hit_key(decode_cursor(cursor, 3))
+    position = bisect_right(hits, key) if key is not None else 0
+    rows = []
+    while position < len(hits) and len(rows) <= page_size:
+        batch = hits[position:position + page_size + 1 - len(rows)]
+        position += len(batch)
+        rows.extend(fetch(batch))
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, encode_cursor(rows[-1].hit)
+
+
+def paginate_ranked(search, fetch, cursor=None, page_size=PAGE_SIZE):
+    """
+    Like paginate_hits, for hits ranked by the database: `search(after,
+    limit)` returns up to `limit` hits following the hit `after` (None
+    for the first page), so only the page shown and the batches `fetch`
+    drops are read. Batches double while `fetch` keeps dropping hits,
+    so a narrow filter costs a few queries rather than one per page.
+    """
+    after = _hit_key(decode_cursor(cursor, 3))
+    rows = []
+    batch_size = page_size + 1
+    while len(rows) <= page_size:
+        batch = search(after, batch_size)
+        rows.extend(fetch(batch))
+        if len(batch) < batch_size:
+            break
+        after = batch[-1]
+        batch_size *= 2
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, encode_cursor(rows[-1].hit)
@@ -0,0 +1,86 @@
+"""
+Projection of the tourist-facing models into the PointOfInterest read model.
+
+Place, HillStation, Destination and itinerary.TouristPlace each describe a
+point of interest with different field names. poi_values() maps any of
+them onto the flat PointOfInterest columns, and the receivers in
+explorer.models call sync_poi()/remove_poi() so the table stays current.
+Tags (see explorer.tags) are derived in the same write.
+"""
+from .tags import derive_tags, set_tags
+
+
+# Normalised explorer category for each itinerary interest
+INTEREST_CATEGORIES = {
+    'temples': 'HISTORICAL',
+    'adventure': 'ADVENTURE',
+    'hill_stations': 'HILL_STATION',
+    'food': 'CITY',
+    'shopping': 'CITY',
+    'beaches': 'BEACH',
+    'historical': 'HISTORICAL',
+    'nature': 'NATURE',
+}
+
+SUMMARY_LENGTH = 300
+
+
+def _file_url(field):
+    try:
+        return field.url if field else ''
+    except ValueError:
+        return ''
+
+
+def poi_values(kind, obj):
+    """Return the PointOfInterest column values for a source model instance."""
+    if kind == 'place':
+        category = obj.category
+        location = obj.location
+        extra = ''
+        thumbnail = _file_url(obj.image)
+    elif kind == 'hill_station':
+        category = 'HILL_STATION'
+        location = f"{obj.city}, {obj.state}"
+        extra = obj.district
+        thumbnail = _file_url(obj.image)
+    elif kind == 'destination':
+        category = 'CITY'
+        location = obj.location
+        extra = ''
+        thumbnail = _file_url(obj.photo)
+    elif kind == 'tourist_place':
+        category = INTEREST_CATEGORIES.get(obj.interest_category, 'OTHER')
+        location = obj.location
+        extra = obj.interest_category.replace('_', ' ')
+        thumbnail = _file_url(obj.image) or obj.image_url or ''
+    else:
+        raise ValueError(f"Unknown point of interest kind: {kind}")
+
+    return {
+        'name': obj.name,
+        'category': category,
+        'location': location,
+        'summary': (obj.description or '')[:SUMMARY_LENGTH],
+        'latitude': getattr(obj, 'latitude', None),
+        'longitude': getattr(obj, 'longitude', None),
+        'thumbnail_url': thumbnail,
+        'search_text': ' '.join([obj.name, location, extra, category.replace('_', ' ')]).lower(),
+    }
+
+
+def sync_poi(kind, obj):
+    from .models import PointOfInterest
+
+    if kind == 'tourist_place' and not obj.is_active:
+        remove_poi(kind, obj.pk)
+        return
+    values = poi_values(kind, obj)
+    poi, _ = PointOfInterest.objects.update_or_create(kind=kind, source_id=obj.pk, defaults=values)
+    set_tags(poi, derive_tags(values['category'], values['name'], obj.description))
+
+
+def remove_poi(kind, pk):
+    from .models import PointOfInterest
+
+    PointOfInterest.objects.filter(kind=kind, source_id=pk).delete()
@@ -0,0 +1,264 @@
+"""
+Columnar POI coordinate snapshot shared by every worker process.
+
+Coordinates of places, hill stations and destinations are written to one
+compact file: a header, a cell offset table, then the id, latitude,
+longitude, kind and category columns as packed arrays. Rows are sorted
+by CELL_DEGREES lat/lng cell over the extent of the data and the offset
+table gives where each cell's rows start, so a box lookup reads one
+contiguous run of rows per cell row it overlaps instead of every row.
+Workers memory-map the file read-only, so the operating system shares a
+single copy of the pages between them and a freshly started worker can
+answer lookups without loading anything from the database.
+
+Writes bump a version counter kept next to the snapshot. The next lookup
+in any worker sees the newer version, rebuilds the file if nobody has
+yet (written to a temporary file and renamed over the old one, so
+readers never see a partial file) and swaps its mapping. Because the
+bump waits for the commit, work that reads the index after a write (the
+nearby-list refresh) is deferred to the commit as well, see
+spatial.after_index_commit.
+"""
+import mmap
+import os
+from math import floor
+import struct
+import tempfile
+import threading
+from array import array
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+
+from .geo import np
+from .spatial import RTreeIndex, SpatialIndex
+
+
+MAGIC = b'POI2'
+# magic, row count, version, grid origin lat/lng, grid rows, grid columns
+HEADER = struct.Struct('<4sIQddII')
+# Cells a quarter degree (~28 km) across, about one nearby-list radius
+CELL_DEGREES = 0.25
+KINDS = RTreeIndex.KINDS
+CATEGORIES = ('BEACH', 'HILL_STATION', 'HISTORICAL', 'NATURE', 'ADVENTURE', 'CITY', 'OTHER')
+
+
+def snapshot_path():
+    return Path(settings.EXPLORER_SNAPSHOT_PATH)
+
+
+def version_path():
+    return snapshot_path().with_suffix('.version')
+
+
+def _replace_atomically(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + '.')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(data)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def read_version():
+    try:
+        return int(version_path().read_text())
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def bump_version():
+    _replace_atomically(version_path(), str(read_version() + 1).encode())
+
+
+def mark_stale():
+    """
+    Bump the version once the current transaction commits. A transaction
+    that writes many rows bumps it once, so the file is rebuilt once.
+    """
+    connection = transaction.get_connection()
+    scheduled = getattr(connection, 'explorer_snapshot_bump', None)
+    if scheduled is not None and not scheduled.ran and any(func is scheduled for _, func, _ in connection.run_on_commit):
+        return
+
+    def bump():
+        bump.ran = True
+        bump_version()
+
+    bump.ran = False
+    connection.explorer_snapshot_bump = bump
+    transaction.on_commit(bump)
+
+
+def _cell(value, origin, cells):
+    """The cell along one axis holding `value`, clamped to the grid."""
+    return min(max(floor((value - origin) / CELL_DEGREES), 0), cells - 1)
+
+
+def write_snapshot_file(path, rows, version):
+    """Write rows of (kind, pk, lat, lng, category) as a snapshot file."""
+    rows = list(rows)
+    if rows:
+        origin_lat = min(row[2] for row in rows)
+        origin_lng = min(row[3] for row in rows)
+        grid_rows = floor((max(row[2] for row in rows) - origin_lat) / CELL_DEGREES) + 1
+        grid_cols = floor((max(row[3] for row in rows) - origin_lng) / CELL_DEGREES) + 1
+    else:
+        origin_lat = origin_lng = 0.0
+        grid_rows = grid_cols = 0
+
+    def cell_of(row):
+        return _cell(row[2], origin_lat, grid_rows) * grid_cols + _cell(row[3], origin_lng, grid_cols)
+
+    rows.sort(key=cell_of)
+    # offsets[c] is the first row of cell c; offsets[-1] is the row count
+    offsets = array('I', [0] * (grid_rows * grid_cols + 1))
+    for row in rows:
+        offsets[cell_of(row) + 1] += 1
+    for i in range(1, len(offsets)):
+        offsets[i] += offsets[i - 1]
+
+    ids, lats, lngs = array('q'), array('d'), array('d')
+    kinds, categories = array('B'), array('B')
+    for kind, pk, lat, lng, category in rows:
+        ids.append(pk)
+        lats.append(lat)
+        lngs.append(lng)
+        kinds.append(KINDS.index(kind))
+        categories.append(CATEGORIES.index(category) if category in CATEGORIES else CATEGORIES.index('OTHER'))
+    # Pad the offset table so the 8-byte columns after it stay aligned
+    padding = b'\0' * (-len(offsets) * offsets.itemsize % 8)
+    data = b''.join([
+        HEADER.pack(MAGIC, len(ids), version, origin_lat, origin_lng, grid_rows, grid_cols),
+        offsets.tobytes(), padding,
+        ids.tobytes(), lats.tobytes(), lngs.tobytes(), kinds.tobytes(), categories.tobytes(),
+    ])
+    _replace_atomically(Path(path), data)
+
+
+def collect_rows():
+    from destinations.models import Destination
+    from .models import Place, HillStation
+
+    located = {'latitude__isnull': False, 'longitude__isnull': False}
+    for pk, lat, lng, category in Place.objects.filter(**located).values_list('pk', 'latitude', 'longitude', 'category'):
+        yield 'place', pk, lat, lng, category
+    for pk, lat, lng in HillStation.objects.filter(**located).values_list('pk', 'latitude', 'longitude'):
+        yield 'hill_station', pk, lat, lng, 'HILL_STATION'
+    for pk, lat, lng in Destination.objects.filter(**located).values_list('pk', 'latitude', 'longitude'):
+        yield 'destination', pk, lat, lng, 'CITY'
+
+
+def build_snapshot(version):
+    write_snapshot_file(snapshot_path(), collect_rows(), version)
+
+
+class Snapshot:
+    """A read-only memory map of one snapshot file, exposed as typed columns."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as fh:
+            self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, self.version, self.origin_lat, self.origin_lng, self.grid_rows, self.grid_cols = (
+            HEADER.unpack_from(self._map)
+        )
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a POI snapshot")
+        view = memoryview(self._map)
+        cells = self.grid_rows * self.grid_cols + 1
+        self.offsets = view[HEADER.size:HEADER.size + cells * 4].cast('I')
+        offset = HEADER.size + cells * 4 + (-cells * 4 % 8)
+        columns = []
+        for code, width in (('q', 8), ('d', 8), ('d', 8), ('B', 1), ('B', 1)):
+            columns.append(view[offset:offset + count * width].cast(code))
+            offset += count * width
+        self.ids, self.lats, self.lngs, self.kinds, self.categories = columns
+
+    def __len__(self):
+        return len(self.ids)
+
+    def row_ranges(self, min_lat, max_lat, min_lng, max_lng):
+        """
+        The (start, end) row runs covering the cells the box overlaps: the
+        cells of one grid row are adjacent in the file, so each grid row
+        the box crosses is a single run.
+        """
+        if not len(self) or max_lat < self.origin_lat or max_lng < self.origin_lng:
+            return []
+        first_row, last_row = (_cell(lat, self.origin_lat, self.grid_rows) for lat in (min_lat, max_lat))
+        first_col, last_col = (_cell(lng, self.origin_lng, self.grid_cols) for lng in (min_lng, max_lng))
+        return [
+            (self.offsets[row * self.grid_cols + first_col], self.offsets[row * self.grid_cols + last_col + 1])
+            for row in range(first_row, last_row + 1)
+        ]
+
+    def in_box(self, min_lat, max_lat, min_lng, max_lng):
+        rows = []
+        for start, end in self.row_ranges(min_lat, max_lat, min_lng, max_lng):
+            if np is not None:
+                # Zero-copy views over the mapped pages of this run
+                lats = np.frombuffer(self.lats[start:end], dtype=np.float64)
+                lngs = np.frombuffer(self.lngs[start:end], dtype=np.float64)
+                mask = (lats >= min_lat) & (lats <= max_lat) & (lngs >= min_lng) & (lngs <= max_lng)
+                rows.extend((np.nonzero(mask)[0] + start).tolist())
+            else:
+                rows.extend(
+                    i for i in range(start, end)
+                    if min_lat <= self.lats[i] <= max_lat and min_lng <= self.lngs[i] <= max_lng
+                )
+        return [(KINDS[self.kinds[i]], self.ids[i], self.lats[i], self.lngs[i]) for i in rows]
+
+
+_current = None
+_lock = threading.Lock()
+
+
+def get_snapshot():
+    """
+    Return the mapped snapshot, remapping (and rebuilding the file if no
+    other worker has) when the version counter has moved past it.
+    """
+    global _current
+    wanted = read_version()
+    current = _current
+    if current is not None and current.version >= wanted:
+        return current
+    with _lock:
+        current = _current
+        if current is not None and current.version >= wanted:
+            return current
+        try:
+            current = Snapshot(snapshot_path())
+        except (FileNotFoundError, ValueError, struct.error):
+            current = None
+        if current is None or current.version < wanted:
+            build_snapshot(wanted)
+            current = Snapshot(snapshot_path())
+        # Readers holding the old mapping keep it alive until they finish
+        _current = current
+    return current
+
+
+def reset_snapshot():
+    global _current
+    with _lock:
+        _current = None
+
+
+class SnapshotIndex(SpatialIndex):
+    """Spatial backend that reads the shared snapshot instead of a per-process structure."""
+
+    def add(self, kind, pk, lat, lng):
+        mark_stale()
+
+    def remove(self, kind, pk):
+        mark_stale()
+
+    def in_box(self, min_lat, max_lat, min_lng, max_lng):
+        return get_snapshot().in_box(min_lat, max_lat, min_lng, max_lng)
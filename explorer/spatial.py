@@ -0,0 +1,357 @@
+"""
+Spatial indexes over explorer points of interest.
+
+Interchangeable backends answer "what is near this point":
+
+* RTreeIndex reads the SQLite R*Tree table `explorer_poi_rtree` created by
+  migration 0004, so lookups are index-backed inside the database.
+* GridIndex buckets coordinates into fixed-size lat/lng cells held in
+  process memory, for databases without the R*Tree module. The writing
+  process updates its grid in place; other processes rebuild theirs once
+  the shared 'grid' version counter moves (see explorer.versions).
+* SnapshotIndex (explorer.snapshot) reads the cells of a memory-mapped
+  columnar file shared by every worker process.
+
+settings.EXPLORER_SPATIAL_INDEX picks the backend ('rtree', 'grid' or
+'snapshot'). All are kept up to date by the post_save/post_delete
+receivers in explorer.models.
+"""
+import heapq
+import threading
+from math import cos, floor, radians
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from . import versions
+from .geo import KM_PER_DEGREE, CoordinateArray, bounding_box
+from .tags import tag_in_use, tagged_among
+
+
+class SpatialIndex:
+    """
+    Base class for the spatial backends.
+
+    Entries are keyed by (kind, pk), where `kind` is the result type used
+    across the explorer templates ('place', 'hill_station', 'destination').
+    Subclasses implement add(), remove() and in_box(); radius queries are
+    built on top of candidates(), which narrows in_box() to a tag.
+    """
+
+    def add(self, kind, pk, lat, lng):
+        raise NotImplementedError
+
+    def remove(self, kind, pk):
+        raise NotImplementedError
+
+    def in_box(self, min_lat, max_lat, min_lng, max_lng):
+        """Yield candidate (kind, pk, lat, lng) entries overlapping a box."""
+        raise NotImplementedError
+
+    def candidates(self, min_lat, max_lat, min_lng, max_lng, tag=None):
+        """
+        in_box(), optionally restricted to entries carrying `tag` (see
+        explorer.tags). Only the entries inside the box are checked.
+        """
+        entries = self.in_box(min_lat, max_lat, min_lng, max_lng)
+        if tag is None or not entries:
+            return entries
+        tagged = tagged_among(tag, [(kind, pk) for kind, pk, _, _ in entries])
+        return [entry for entry in entries if entry[:2] in tagged]
+
+    def within(self, lat, lng, radius_km, kinds=None, tag=None):
+        """
+        Return [(distance_km, kind, pk), ...] inside the radius, nearest
+        first. `tag` optionally restricts the result to entries carrying
+        it before any distance is computed.
+        """
+        candidates = CoordinateArray()
+        for kind, pk, p_lat, p_lng in self.candidates(*bounding_box(lat, lng, radius_km), tag=tag):
+            if not kinds or kind in kinds:
+                candidates.append((kind, pk), p_lat, p_lng)
+        return [(dist, kind, pk) for dist, (kind, pk) in candidates.within(lat, lng, radius_km)]
+
+    def nearest(self, lat, lng, k, max_radius_km=None, kinds=None, tag=None):
+        """
+        Return the k closest [(distance_km, kind, pk), ...], nearest first,
+        optionally capped at max_radius_km. The search radius starts small
+        and doubles until k entries are found, so dense areas stay cheap.
+        """
+        if tag is not None and not tag_in_use(tag):
+            return []
+        radius = START_RADIUS_KM
+        while True:
+            if max_radius_km is not None:
+                radius = min(radius, max_radius_km)
+            hits = self.within(lat, lng, radius, kinds, tag)
+            # Everything outside the radius is further away than every hit
+            if len(hits) >= k or radius == max_radius_km or radius >= MAX_RADIUS_KM:
+                return hits[:k]
+            radius *= 2
+
+
+START_RADIUS_KM = 5
+MAX_RADIUS_KM = 20000
+
+
+class GridIndex(SpatialIndex):
+    """In-memory grid of lat/lng cells mapping to the entries inside them."""
+
+    def __init__(self, cell_size=0.25):
+        self.cell_size = cell_size
+        self._cells = {}
+        self._points = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._points)
+
+    def _cell(self, lat, lng):
+        return (floor(lat / self.cell_size), floor(lng / self.cell_size))
+
+    def add(self, kind, pk, lat, lng):
+        """Insert or move an entry. Entries without coordinates are dropped."""
+        key = (kind, pk)
+        with self._lock:
+            self.remove(kind, pk)
+            if lat is None or lng is None:
+                return
+            self._points[key] = (lat, lng)
+            self._cells.setdefault(self._cell(lat, lng), {})[key] = (lat, lng)
+
+    def remove(self, kind, pk):
+        key = (kind, pk)
+        with self._lock:
+            point = self._points.pop(key, None)
+            if point is None:
+                return
+            cell = self._cell(*point)
+            bucket = self._cells.get(cell)
+            if bucket is not None:
+                bucket.pop(key, None)
+                if not bucket:
+                    del self._cells[cell]
+
+    def in_box(self, min_lat, max_lat, min_lng, max_lng):
+        min_row, min_col = self._cell(min_lat, min_lng)
+        max_row, max_col = self._cell(max_lat, max_lng)
+        with self._lock:
+            entries = []
+            for row in range(min_row, max_row + 1):
+                for col in range(min_col, max_col + 1):
+                    bucket = self._cells.get((row, col))
+                    if bucket:
+                        entries.extend(
+                            (kind, pk, lat, lng) for (kind, pk), (lat, lng) in bucket.items()
+                        )
+        return entries
+
+    def nearest(self, lat, lng, k, max_radius_km=None, kinds=None, tag=None):
+        """
+        Ring-by-ring k-nearest search over grid cells with a bounded heap.
+        Stops once the k-th best distance is closer than any unvisited ring.
+        Tagged searches use the doubling radius search instead, so tags
+        are looked up once per radius rather than once per ring.
+        """
+        if tag is not None:
+            return super().nearest(lat, lng, k, max_radius_km, kinds, tag)
+        with self._lock:
+            if not self._cells:
+                return []
+            rows = [row for row, _ in self._cells]
+            cols = [col for _, col in self._cells]
+            center_row, center_col = self._cell(lat, lng)
+            last_ring = max(
+                abs(center_row - min(rows)), abs(center_row - max(rows)),
+                abs(center_col - min(cols)), abs(center_col - max(cols)),
+            )
+            heap = []  # max-heap of the best k as (-distance, kind, pk)
+            for ring in range(last_ring + 1):
+                candidates = CoordinateArray()
+                for row in range(center_row - ring, center_row + ring + 1):
+                    step = 1 if abs(row - center_row) == ring else 2 * ring
+                    for col in range(center_col - ring, center_col + ring + 1, step):
+                        for (kind, pk), (p_lat, p_lng) in self._cells.get((row, col), {}).items():
+                            if not kinds or kind in kinds:
+                                candidates.append((kind, pk), p_lat, p_lng)
+                for dist, (kind, pk) in zip(candidates.distances_from(lat, lng), candidates.keys):
+                    dist = float(dist)
+                    if max_radius_km is not None and dist > max_radius_km:
+                        continue
+                    if len(heap) < k:
+                        heapq.heappush(heap, (-dist, kind, pk))
+                    elif dist < -heap[0][0]:
+                        heapq.heapreplace(heap, (-dist, kind, pk))
+                # Anything in a later ring is at least `ring` cell widths away
+                widest = min(abs(lat) + (ring + 1) * self.cell_size, 89.9)
+                reach_km = ring * self.cell_size * KM_PER_DEGREE * cos(radians(widest))
+                if len(heap) == k and -heap[0][0] <= reach_km:
+                    break
+                if max_radius_km is not None and reach_km > max_radius_km:
+                    break
+        return sorted((-neg_dist, kind, pk) for neg_dist, kind, pk in heap)
+
+
+class RTreeIndex(SpatialIndex):
+    """
+    SQLite R*Tree mirror of POI coordinates.
+
+    Each point is stored as a zero-area box. The R*Tree rowid packs the
+    kind and primary key together (see rtree_id) so rows can be replaced
+    and decoded without an auxiliary lookup. R*Tree stores 32-bit floats,
+    so coordinates read back are accurate to roughly a metre.
+    """
+
+    table = 'explorer_poi_rtree'
+    KINDS = ('place', 'hill_station', 'destination')
+
+    def __len__(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {self.table}')
+            return cursor.fetchone()[0]
+
+    @classmethod
+    def rtree_id(cls, kind, pk):
+        return pk * len(cls.KINDS) + cls.KINDS.index(kind)
+
+    @classmethod
+    def decode_id(cls, rtree_id):
+        pk, code = divmod(rtree_id, len(cls.KINDS))
+        return cls.KINDS[code], pk
+
+    def add(self, kind, pk, lat, lng):
+        if lat is None or lng is None:
+            self.remove(kind, pk)
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT OR REPLACE INTO {self.table} (id, min_lat, max_lat, min_lng, max_lng) '
+                'VALUES (%s, %s, %s, %s, %s)',
+                [self.rtree_id(kind, pk), lat, lat, lng, lng],
+            )
+
+    def remove(self, kind, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE id = %s', [self.rtree_id(kind, pk)])
+
+    def in_box(self, min_lat, max_lat, min_lng, max_lng):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT id, min_lat, min_lng FROM {self.table} '
+                'WHERE max_lat >= %s AND min_lat <= %s AND max_lng >= %s AND min_lng <= %s',
+                [min_lat, max_lat, min_lng, max_lng],
+            )
+            rows = cursor.fetchall()
+        return [(*self.decode_id(rtree_id), lat, lng) for rtree_id, lat, lng in rows]
+
+    def candidates(self, min_lat, max_lat, min_lng, max_lng, tag=None):
+        """Tagged lookups join the tag table in the same query as the R*Tree probe."""
+        if tag is None:
+            return self.in_box(min_lat, max_lat, min_lng, max_lng)
+        from .models import PointOfInterest, PointOfInterestTag
+
+        kind_case = ' '.join(f"WHEN {code} THEN '{kind}'" for code, kind in enumerate(self.KINDS))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT r.id, r.min_lat, r.min_lng FROM {self.table} r '
+                f'JOIN {PointOfInterest._meta.db_table} p '
+                f'ON p.kind = CASE r.id %% {len(self.KINDS)} {kind_case} END '
+                f'AND p.source_id = r.id / {len(self.KINDS)} '
+                f'JOIN {PointOfInterestTag._meta.db_table} t ON t.point_id = p.id AND t.tag = %s '
+                'WHERE r.max_lat >= %s AND r.min_lat <= %s AND r.max_lng >= %s AND r.min_lng <= %s',
+                [tag, min_lat, max_lat, min_lng, max_lng],
+            )
+            rows = cursor.fetchall()
+        return [(*self.decode_id(rtree_id), lat, lng) for rtree_id, lat, lng in rows]
+
+
+def rtree_available():
+    return connection.vendor == 'sqlite'
+
+
+# (GridIndex, versions.stamp) for the grid this process built
+_grid = None
+_grid_lock = threading.Lock()
+
+
+def build_grid():
+    """Build a fresh GridIndex from every POI model with coordinates."""
+    from destinations.models import Destination
+    from .models import Place, HillStation
+
+    index = GridIndex()
+    for kind, model in (('place', Place), ('hill_station', HillStation), ('destination', Destination)):
+        coords = model.objects.filter(latitude__isnull=False, longitude__isnull=False)
+        for pk, lat, lng in coords.values_list('pk', 'latitude', 'longitude'):
+            index.add(kind, pk, lat, lng)
+    return index
+
+
+def get_index():
+    """Return the configured spatial backend, building the grid on first use."""
+    global _grid
+    backend = getattr(settings, 'EXPLORER_SPATIAL_INDEX', 'rtree')
+    if backend == 'rtree' and rtree_available():
+        return RTreeIndex()
+    if backend == 'snapshot':
+        from .snapshot import SnapshotIndex
+        return SnapshotIndex()
+    entry = _grid
+    if entry is None or not versions.is_fresh('grid', entry[1]):
+        with _grid_lock:
+            entry = _grid
+            if entry is None or not versions.is_fresh('grid', entry[1]):
+                built = versions.stamp('grid')
+                entry = _grid = (build_grid(), built)
+    return entry[0]
+
+
+def _grid_changed():
+    """Tell other processes their grid is stale once the write commits."""
+    if _grid is not None or getattr(settings, 'EXPLORER_SPATIAL_INDEX', 'rtree') == 'grid':
+        versions.bump('grid')
+
+
+def index_update(kind, pk, lat, lng):
+    """Apply a single row change to every live backend."""
+    if rtree_available():
+        RTreeIndex().add(kind, pk, lat, lng)
+    entry = _grid
+    if entry is not None:
+        entry[0].add(kind, pk, lat, lng)
+    _grid_changed()
+    if getattr(settings, 'EXPLORER_SPATIAL_INDEX', 'rtree') == 'snapshot':
+        from .snapshot import mark_stale
+        mark_stale()
+
+
+def after_index_commit(fn):
+    """
+    Run `fn` once the index reflects the current writes: straight away for
+    the R*Tree and grid, which are updated in place, but after the commit
+    for the snapshot, whose version bump waits for it (and runs first,
+    being scheduled first).
+    """
+    if getattr(settings, 'EXPLORER_SPATIAL_INDEX', 'rtree') == 'snapshot':
+        transaction.on_commit(fn)
+    else:
+        fn()
+
+
+def index_remove(kind, pk):
+    if rtree_available():
+        RTreeIndex().remove(kind, pk)
+    entry = _grid
+    if entry is not None:
+        entry[0].remove(kind, pk)
+    _grid_changed()
+    if getattr(settings, 'EXPLORER_SPATIAL_INDEX', 'rtree') == 'snapshot':
+        from .snapshot import mark_stale
+        mark_stale()
+
+
+def reset_index():
+    """Drop the in-memory grid; the next lookup rebuilds it."""
+    global _grid
+    with _grid_lock:
+        _grid = None
@@ -0,0 +1,100 @@
+"""
+Precomputed tags for points of interest.
+
+Every PointOfInterest gets a small set of tags (temple, beach, fort,
+waterfall, ...) derived when its source row is written: one from its
+category, plus any whose keywords appear in its name. Keywords found only
+in the description are kept as `mentions:` tags and category tags live
+under `category:`, so place-type filters, which only query bare and
+category tags, skip a hill station whose description mentions its
+temples or a market next to a beach. Tags are
+stored in the indexed PointOfInterestTag table, so a place-type filter
+is an index lookup that can run before any distance is computed.
+"""
+import re
+
+
+CATEGORY_TAGS = {
+    'BEACH': 'category:beach',
+    'HILL_STATION': 'category:hill_station',
+    'HISTORICAL': 'category:historical',
+    'NATURE': 'category:nature',
+    'ADVENTURE': 'category:adventure',
+    'CITY': 'category:city',
+}
+
+TAG_KEYWORDS = {
+    'temple': ('temple', 'temples', 'mandir', 'kovil', 'shrine', 'devasthanam'),
+    'church': ('church', 'cathedral', 'basilica'),
+    'mosque': ('mosque', 'masjid', 'dargah'),
+    'beach': ('beach', 'beaches', 'seashore'),
+    'fort': ('fort', 'forts', 'fortress', 'qila'),
+    'palace': ('palace', 'palaces', 'mahal'),
+    'waterfall': ('waterfall', 'waterfalls', 'falls'),
+    'lake': ('lake', 'lakes', 'backwater', 'backwaters'),
+    'museum': ('museum', 'museums', 'gallery'),
+    'wildlife': ('wildlife', 'sanctuary', 'national park', 'tiger reserve'),
+    'trek': ('trek', 'treks', 'trekking', 'hike', 'hiking'),
+    'viewpoint': ('viewpoint', 'view point', 'sunset point', 'peak'),
+}
+
+# GeoLocationSearchForm place types that filter by tag; the rest (hotels,
+# hospitals, ...) are not covered by the local catalogue and match everything
+PLACE_TYPE_TAGS = {'TEMPLE': 'temple', **CATEGORY_TAGS}
+
+_KEYWORD_PATTERNS = {
+    tag: re.compile(r'\b(?:' + '|'.join(re.escape(word) for word in words) + r')\b')
+    for tag, words in TAG_KEYWORDS.items()
+}
+
+
+MENTION_PREFIX = 'mentions:'
+
+
+def derive_tags(category, name, description=''):
+    """The sorted tag set for a POI's category, name and description."""
+    tags = set()
+    if category in CATEGORY_TAGS:
+        tags.add(CATEGORY_TAGS[category])
+    name, description = name.lower(), (description or '').lower()
+    for tag, pattern in _KEYWORD_PATTERNS.items():
+        if pattern.search(name):
+            tags.add(tag)
+        elif pattern.search(description):
+            tags.add(MENTION_PREFIX + tag)
+    return sorted(tags)
+
+
+def set_tags(poi, tags):
+    """Replace a PointOfInterest's stored tags, touching only the ones that changed."""
+    from .models import PointOfInterestTag
+
+    current = set(poi.tags.values_list('tag', flat=True))
+    wanted = set(tags)
+    if current - wanted:
+        poi.tags.filter(tag__in=current - wanted).delete()
+    PointOfInterestTag.objects.bulk_create([
+        PointOfInterestTag(point=poi, tag=tag) for tag in sorted(wanted - current)
+    ])
+
+
+def tagged_among(tag, keys, batch_size=500):
+    """The (kind, source_id) pairs of `keys` carrying `tag`, looked up a batch of candidates at a time."""
+    from .models import PointOfInterest
+
+    by_kind = {}
+    for kind, pk in keys:
+        by_kind.setdefault(kind, []).append(pk)
+    tagged = set()
+    for kind, pks in by_kind.items():
+        for start in range(0, len(pks), batch_size):
+            tagged.update(PointOfInterest.objects.filter(
+                kind=kind, source_id__in=pks[start:start + batch_size], tags__tag=tag,
+            ).values_list('kind', 'source_id'))
+    return tagged
+
+
+def tag_in_use(tag):
+    from .models import PointOfInterestTag
+
+    return PointOfInterestTag.objects.filter(tag=tag).exists()
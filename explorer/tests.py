@@ -1,3 +1,915 @@
-from django.test import TestCase
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import autocomplete, clusters, corridor, facets, fulltext, fuzzy, geocache, snapshot, versions
+from .models import Place, HillStation, NearbyPlace, PointOfInterest
+from .geo import CoordinateArray, bounding_box, haversine
+from .nearby import MAX_MERGED_SPAN_KM, box_span_km, merge_boxes, nearby_hits_many
+from .spatial import GridIndex, get_index, reset_index
+from tourist_project.services.geocoder import GeocoderService
+from tourist_project.services.places_service import PlacesService
+from .pagination import encode_cursor, paginate_queryset, paginate_ranked
+from .views import PLACE_ORDERING, get_nearby_places, get_nearby_places_many, nearest_points, ranked_places
+
+
+def make_place(name, lat, lng, **kwargs):
+    fields = {'description': '', 'location': 'India', 'image': 'explorer/test.jpg', **kwargs}
+    return Place.objects.create(name=name, latitude=lat, longitude=lng, **fields)
+
+
+def make_hill_station(name, lat, lng, **kwargs):
+    fields = {
+        'city': name, 'district': name, 'state': 'Kerala', 'description': '', 'best_time_to_visit': 'Any',
+        'temperature_range': '10-20', 'image': 'explorer/hill_stations/test.jpg', **kwargs
+    }
+    return HillStation.objects.create(name=name, latitude=lat, longitude=lng, **fields)
+
+
+class NearbyPlacesMixin:
+    """get_nearby_places should only pull rows near the origin out of the database, whatever the backend."""
+
+    def setUp(self):
+        # Munnar and two neighbours inside 25 km
+        self.origin = make_place('Munnar', 10.0889, 77.0595)
+        make_place('Mattupetty Dam', 10.1063, 77.1235)
+        make_hill_station('Devikulam', 10.0626, 77.1036)
+        # Far away rows that the bounding box must keep out of the result set
+        for i in range(10):
+            make_place(f'Far place {i}', 28.0 + i * 0.1, 77.0)
+            make_hill_station(f'Far hill {i}', 31.0 + i * 0.1, 77.0)
+
+    def test_rows_fetched_limited_to_neighbourhood(self):
+        with mock.patch.object(Place, 'from_db', side_effect=Place.from_db) as places, \
+                mock.patch.object(HillStation, 'from_db', side_effect=HillStation.from_db) as hills:
+            get_nearby_places(10.0889, 77.0595)
+
+        self.assertEqual(places.call_count + hills.call_count, 3)
+
+    def test_card_rows_leave_description_unloaded(self):
+        nearby = get_nearby_places(10.0889, 77.0595, exclude_pk=self.origin.pk, exclude_type='place')
+        for row in nearby:
+            self.assertIn('description', row.get_deferred_fields())
+            self.assertNotIn('name', row.get_deferred_fields())
+
+
+class RTreeNearbyPlacesTests(NearbyPlacesMixin, TestCase):
+    """Candidates come from the SQLite R*Tree."""
+
+    def test_candidates_come_from_rtree(self):
+        with CaptureQueriesContext(connection) as ctx:
+            nearby = get_nearby_places(10.0889, 77.0595, exclude_pk=self.origin.pk, exclude_type='place')
+
+        # R*Tree probes at growing radii, then one primary-key fetch per model
+        sql = [q['sql'] for q in ctx.captured_queries]
+        rtree_probes = [q for q in sql if 'explorer_poi_rtree' in q]
+        self.assertLessEqual(len(rtree_probes), 4)
+        self.assertEqual(len(sql) - len(rtree_probes), 2)
+        self.assertEqual([p.name for p in nearby], ['Devikulam', 'Mattupetty Dam'])
+
+
+@override_settings(EXPLORER_SPATIAL_INDEX='grid')
+class GridNearbyPlacesTests(NearbyPlacesMixin, TestCase):
+    """The in-process grid backend must give the same answers as the R*Tree."""
+
+    def setUp(self):
+        reset_index()
+        self.addCleanup(reset_index)
+        super().setUp()
+
+    def test_candidates_come_from_grid(self):
+        get_index()
+        with self.assertNumQueries(2):
+            nearby = get_nearby_places(10.0889, 77.0595, exclude_pk=self.origin.pk, exclude_type='place')
+        self.assertEqual([p.name for p in nearby], ['Devikulam', 'Mattupetty Dam'])
+
+
+class BatchNearbyTests(TestCase):
+    """Neighbour lists for many origins share one index sweep and one fetch per model."""
+
+    def setUp(self):
+        self.munnar = make_place('Munnar', 10.0889, 77.0595)
+        self.dam = make_place('Mattupetty Dam', 10.1063, 77.1235)
+        self.devikulam = make_hill_station('Devikulam', 10.0626, 77.1036)
+        self.ooty = make_hill_station('Ooty', 11.4102, 76.6950)
+        make_place('Botanical Garden', 11.4183, 76.7112)
+
+    def test_matches_single_origin_lookups(self):
+        origins = [
+            (10.0889, 77.0595, ('place', self.munnar.pk)),
+            (10.0626, 77.1036, ('hill_station', self.devikulam.pk)),
+            (11.4102, 76.6950, None),
+            (None, None, None),
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            batch = get_nearby_places_many(origins)
+        # Munnar and Devikulam overlap into one probe, Ooty is a second; then one in_bulk per model
+        self.assertEqual(len(ctx.captured_queries), 4)
+
+        for (lat, lng, exclude), nearby in zip(origins, batch):
+            single = get_nearby_places(lat, lng, exclude_type=exclude and exclude[0], exclude_pk=exclude and exclude[1])
+            self.assertEqual(
+                [(p.result_type, p.pk, p.distance_km) for p in nearby],
+                [(p.result_type, p.pk, p.distance_km) for p in single],
+            )
+        self.assertEqual(batch[3], [])
+
+    def test_merged_areas_stay_local(self):
+        # Overlapping origins every 20 km from Kanyakumari to Kashmir would chain into one country-wide box
+        boxes = [bounding_box(8.0 + 0.18 * i, 77.0, 25) for i in range(130)]
+        groups = merge_boxes(boxes)
+        self.assertGreater(len(groups), 1)
+        self.assertTrue(all(box_span_km(box) <= MAX_MERGED_SPAN_KM for box, _ in groups))
+        self.assertEqual(sorted(m for _, members in groups for m in members), list(range(130)))
+
+    def test_oversized_matrix_falls_back_to_single_lookups(self):
+        origins = [(10.0889, 77.0595, ('place', self.munnar.pk)), (10.0626, 77.1036, None)]
+        rounded = lambda hit_lists: [[(round(d, 6), kind, pk) for d, kind, pk in hits] for hits in hit_lists]
+        expected = rounded(nearby_hits_many(origins))
+        with mock.patch('explorer.nearby.MAX_MATRIX_CELLS', 1), \
+                mock.patch('explorer.nearby.haversine_matrix') as matrix:
+            self.assertEqual(rounded(nearby_hits_many(origins)), expected)
+        matrix.assert_not_called()
+
+    def test_api(self):
+        origins = f'place:{self.munnar.pk};11.41,76.70;hill_station:9999'
+        data = self.client.get(reverse('api-nearby-batch'), {'origins': origins}).json()['results']
+        self.assertEqual([row['origin'] for row in data], [f'place:{self.munnar.pk}', '11.41,76.70', 'hill_station:9999'])
+        self.assertEqual([p['name'] for p in data[0]['nearby']], ['Devikulam', 'Mattupetty Dam'])
+        self.assertEqual([p['name'] for p in data[1]['nearby']], ['Ooty', 'Botanical Garden'])
+        self.assertIsNone(data[2]['latitude'])
+        self.assertEqual(data[2]['nearby'], [])
+
+        for bad in ('', 'temple:3', '10.1', 'place:x', 'nan,nan', 'inf,0', '95,77', '10,-181', '10,77,1'):
+            self.assertEqual(self.client.get(reverse('api-nearby-batch'), {'origins': bad}).status_code, 400)
+
+
+class GridIndexTests(TestCase):
+    """The grid backend only scans the cells a query overlaps and follows writes incrementally."""
+
+    def test_radius_query_matches_full_scan(self):
+        index = GridIndex()
+        points = [(i, 9.5 + (i % 40) * 0.037, 76.5 + (i // 40) * 0.041) for i in range(400)]
+        for pk, lat, lng in points:
+            index.add('place', pk, lat, lng)
+        for radius in (1, 10, 40):
+            with self.subTest(radius=radius):
+                hits = index.within(10.0, 77.0, radius)
+                expected = sorted(
+                    pk for pk, lat, lng in points if haversine(77.0, 10.0, lng, lat) <= radius
+                )
+                self.assertEqual(sorted(pk for _, _, pk in hits), expected)
+                self.assertEqual(hits, sorted(hits))
+
+    def test_query_touches_only_overlapping_cells(self):
+        index = GridIndex(cell_size=0.25)
+        index.add('place', 1, 10.01, 77.01)
+        index.add('place', 2, 28.61, 77.21)
+        self.assertEqual([(kind, pk) for kind, pk, _, _ in index.in_box(*bounding_box(10.0, 77.0, 5))], [('place', 1)])
+        index.add('place', 1, 28.62, 77.22)
+        index.remove('place', 2)
+        self.assertEqual(index.within(10.0, 77.0, 5), [])
+        self.assertEqual([pk for _, _, pk in index.within(28.6, 77.2, 5)], [1])
+
+    @override_settings(EXPLORER_SPATIAL_INDEX='grid')
+    def test_search_follows_writes(self):
+        reset_index()
+        self.addCleanup(reset_index)
+        geocache.clear()
+        munnar = make_place('Munnar', 10.0889, 77.0595)
+        get_index()
+        devikulam = make_hill_station('Devikulam', 10.0626, 77.1036)
+
+        def search():
+            geocache.clear()
+            response = self.client.get(reverse('geolocation-search'), {
+                'latitude': 10.0890, 'longitude': 77.0600, 'search_radius': 10,
+            })
+            return [p.name for p in response.context['places']]
+
+        self.assertEqual(search(), ['Munnar', 'Devikulam'])
+        munnar.latitude, munnar.longitude = 28.6139, 77.2090
+        munnar.save()
+        self.assertEqual(search(), ['Devikulam'])
+        devikulam.delete()
+        # Nothing left in range, so the search falls back to the closest row, now in Delhi
+        self.assertEqual(search(), ['Munnar'])
+
+    @override_settings(EXPLORER_SPATIAL_INDEX='grid')
+    def test_other_workers_rebuild_after_a_commit(self):
+        reset_index()
+        self.addCleanup(reset_index)
+        munnar = make_place('Munnar', 10.0889, 77.0595)
+        self.assertEqual([pk for _, _, pk in get_index().within(10.0889, 77.0595, 5)], [munnar.pk])
+        # A move in another worker skips this process's receivers and only moves the shared counter
+        Place.objects.filter(pk=munnar.pk).update(latitude=28.6139, longitude=77.2090)
+        self.assertEqual(len(get_index().within(10.0889, 77.0595, 5)), 1)
+        versions.bump_now('grid')
+        self.assertEqual(get_index().within(10.0889, 77.0595, 5), [])
+
+
+class NearbyPlaceTableTests(TestCase):
+    """Neighbour lists are materialised on write and read back on detail pages."""
+
+    def setUp(self):
+        self.munnar = make_place('Munnar', 10.0889, 77.0595)
+        self.dam = make_place('Mattupetty Dam', 10.1063, 77.1235)
+        self.devikulam = make_hill_station('Devikulam', 10.0626, 77.1036)
+
+    def neighbours(self, kind, obj):
+        return list(
+            NearbyPlace.objects.filter(source_type=kind, source_id=obj.pk).values_list('target_id', flat=True)
+        )
+
+    def test_rows_built_on_create(self):
+        self.assertEqual(self.neighbours('place', self.munnar), [self.devikulam.pk, self.dam.pk])
+        self.assertEqual(self.neighbours('hill_station', self.devikulam), [self.dam.pk, self.munnar.pk])
+
+    def test_moving_a_place_updates_old_and_new_neighbourhoods(self):
+        self.dam.latitude, self.dam.longitude = 28.6139, 77.2090
+        self.dam.save()
+
+        self.assertEqual(self.neighbours('place', self.munnar), [self.devikulam.pk])
+        self.assertEqual(self.neighbours('place', self.dam), [])
+
+    def test_edit_without_moving_keeps_rows(self):
+        self.dam.description = 'Dam and boating lake.'
+        with CaptureQueriesContext(connection) as ctx:
+            self.dam.save()
+
+        self.assertFalse(any('explorer_nearbyplace' in q['sql'] for q in ctx.captured_queries))
+        self.assertEqual(self.neighbours('place', self.munnar), [self.devikulam.pk, self.dam.pk])
+
+    def test_delete_removes_rows(self):
+        self.devikulam.delete()
+
+        self.assertEqual(self.neighbours('place', self.munnar), [self.dam.pk])
+        self.assertFalse(NearbyPlace.objects.filter(target_type='hill_station').exists())
+
+    def test_detail_page_reads_materialised_rows(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('explorer-detail', args=[self.munnar.pk]))
+
+        self.assertEqual([p.name for p in response.context['nearby_places']], ['Devikulam', 'Mattupetty Dam'])
+        self.assertFalse(any('explorer_poi_rtree' in q['sql'] for q in ctx.captured_queries))
+
+
+class PointOfInterestTests(TestCase):
+    """The unified POI table mirrors every source model and backs geo search."""
+
+    def setUp(self):
+        geocache.clear()
+        self.munnar = make_place('Munnar Tea Gardens', 10.0889, 77.0595, category='NATURE')
+        self.devikulam = make_hill_station('Devikulam', 10.0626, 77.1036)
+        self.temple = make_place('Attukal Temple', 8.4682, 76.9549, category='OTHER')
+
+    def test_rows_follow_source_writes(self):
+        self.assertEqual(PointOfInterest.objects.count(), 3)
+        poi = PointOfInterest.objects.get(kind='hill_station', source_id=self.devikulam.pk)
+        self.assertEqual(poi.category, 'HILL_STATION')
+        self.assertEqual(poi.location, 'Devikulam, Kerala')
+
+        self.munnar.name = 'Munnar'
+        self.munnar.save()
+        self.assertTrue(PointOfInterest.objects.filter(kind='place', name='Munnar').exists())
+
+        self.devikulam.delete()
+        self.assertFalse(PointOfInterest.objects.filter(kind='hill_station').exists())
+
+    def test_radius_search_is_one_poi_query(self):
+        url = reverse('geolocation-search')
+        params = {'latitude': 10.0889, 'longitude': 77.0595, 'search_radius': 25}
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params)
+
+        poi_queries = [q for q in ctx.captured_queries if 'explorer_pointofinterest' in q['sql']]
+        self.assertEqual(len(poi_queries), 1)
+        self.assertEqual([p.name for p in response.context['places']], ['Munnar Tea Gardens', 'Devikulam'])
+
+    def test_temple_filter_and_text_search(self):
+        response = self.client.get(reverse('geolocation-search'), {
+            'location_name': 'kerala', 'search_radius': 50,
+        })
+        self.assertEqual([p.name for p in response.context['places']], ['Devikulam'])
+
+        response = self.client.get(reverse('geolocation-search'), {
+            'place_type': 'TEMPLE', 'search_radius': 50, 'location_name': '',
+        })
+        self.assertEqual([p.name for p in response.context['places']], ['Attukal Temple'])
+
+
+class GazetteerGeocodingTests(TestCase):
+    """Typed location names resolve through the gazetteer, typos included."""
+
+    def setUp(self):
+        geocache.clear()
+        make_place('Munnar Tea Gardens', 10.0889, 77.0595, category='NATURE')
+
+    def test_misspelt_city_resolves_to_coordinates(self):
+        response = self.client.get(reverse('geolocation-search'), {'location_name': 'munar', 'search_radius': 5})
+
+        self.assertEqual(response.context['search_lat'], 10.0889)
+        self.assertEqual([p.name for p in response.context['places']], ['Munnar Tea Gardens'])
+
+    def test_alias_resolves_to_canonical_entry(self):
+        self.assertEqual(GeocoderService.lookup('Bangalore')['name'], 'Bengaluru')
+        self.assertEqual(GeocoderService.geocode('darjelling'), (27.041, 88.2663))
+
+    def test_short_text_stays_a_text_search(self):
+        make_place('Sunset Point', 11.41, 76.69)
+        self.assertIsNone(GeocoderService.lookup('sun'))
+        self.assertIsNone(GeocoderService.lookup('ram'))
+        self.assertEqual(GeocoderService.lookup('rameshw')['name'], 'Rameshwaram')
+        response = self.client.get(reverse('geolocation-search'), {'location_name': 'sun', 'search_radius': 50})
+        self.assertIsNone(response.context['search_lat'])
+        self.assertEqual([p.name for p in response.context['places']], ['Sunset Point'])
+
+    def test_compact_state_searched_by_radius(self):
+        self.assertEqual(GeocoderService.geocode('goa', kinds=('city', 'district', 'landmark')), (15.2993, 74.124))
+        self.assertIsNone(GeocoderService.geocode('kerala', kinds=('city', 'district', 'landmark')))
+
+
+class AutocompleteTests(TestCase):
+    """Suggestions come from the in-memory trie without touching the database."""
+
+    def setUp(self):
+        autocomplete.invalidate()
+        make_hill_station('Devikulam', 10.0626, 77.1036)
+
+    def test_prefix_suggestions_ranked_and_cached(self):
+        autocomplete.get_trie()
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('api-autocomplete'), {'q': 'dev'})
+
+        labels = [item['label'] for item in response.json()['results']]
+        self.assertIn('Devikulam', labels)
+        self.assertIn('max-age=300', response['Cache-Control'])
+
+    def test_aliases_and_poi_writes(self):
+        labels = [item['label'] for item in autocomplete.suggest('banga')]
+        self.assertEqual(labels, ['Bengaluru'])
+
+        make_place('Bangaram Island', 10.0, 72.0)
+        labels = [item['label'] for item in autocomplete.suggest('banga')]
+        self.assertEqual(sorted(labels), ['Bangaram Island', 'Bengaluru'])
+
+    def test_other_workers_rebuild_after_a_commit(self):
+        self.assertIn('Devikulam', [item['label'] for item in autocomplete.suggest('devi')])
+        # A rename in another worker skips this process's receivers and only moves the shared counter
+        PointOfInterest.objects.filter(name='Devikulam').update(name='Zyxa Viewpoint')
+        self.assertEqual(autocomplete.suggest('zyxa'), [])
+        versions.bump_now('autocomplete')
+        self.assertEqual([item['label'] for item in autocomplete.suggest('zyxa')], ['Zyxa Viewpoint'])
+
+    def test_limit_clamped(self):
+        url = reverse('api-autocomplete')
+        for limit, expected in (('-5', 1), ('0', 1), ('1000', autocomplete.TOP_K)):
+            with self.subTest(limit=limit), mock.patch('explorer.views.autocomplete.suggest', return_value=[]) as suggest:
+                self.assertEqual(self.client.get(url, {'q': 'dev', 'limit': limit}).status_code, 200)
+                suggest.assert_called_once_with('dev', expected)
+
+
+class NearestSearchTests(TestCase):
+    """Empty radius searches grow outwards instead of returning nothing."""
+
+    def setUp(self):
+        geocache.clear()
+        make_place('Munnar', 10.0889, 77.0595)
+        make_hill_station('Ooty', 11.4102, 76.6950)
+        make_place('Marina Beach', 13.0499, 80.2824, category='BEACH')
+
+    def test_empty_radius_falls_back_to_nearest(self):
+        response = self.client.get(reverse('geolocation-search'), {
+            'latitude': 10.5, 'longitude': 76.5, 'search_radius': 1,
+        })
+
+        self.assertTrue(response.context['radius_expanded'])
+        self.assertEqual([p.name for p in response.context['places']], ['Munnar', 'Ooty', 'Marina Beach'])
+
+    def test_fallback_respects_place_type(self):
+        response = self.client.get(reverse('geolocation-search'), {
+            'latitude': 10.5, 'longitude': 76.5, 'search_radius': 1, 'place_type': 'BEACH',
+        })
+        self.assertEqual([p.name for p in response.context['places']], ['Marina Beach'])
+
+    def test_only_final_rows_hydrated(self):
+        # One beach close by, the rest behind a ring of inland places: the search has to widen twice
+        make_place('Cherai Beach', 10.51, 76.51, category='BEACH')
+        for i in range(20):
+            make_place(f'Inland hill {i}', 10.52 + i * 0.005, 76.52)
+        points = PointOfInterest.objects.filter(category='BEACH')
+        with mock.patch.object(PointOfInterest, 'from_db', side_effect=PointOfInterest.from_db) as built:
+            results = nearest_points(10.5, 76.5, points, count=2)
+        self.assertEqual([p.name for p in results], ['Cherai Beach', 'Marina Beach'])
+        self.assertEqual(built.call_count, 2)
+
+    def test_grid_and_rtree_agree(self):
+        rtree_hits = get_index().nearest(10.5, 76.5, 2)
+        with override_settings(EXPLORER_SPATIAL_INDEX='grid'):
+            reset_index()
+            grid_hits = get_index().nearest(10.5, 76.5, 2)
+            reset_index()
+        self.assertEqual([hit[1:] for hit in rtree_hits], [hit[1:] for hit in grid_hits])
+
+
+class MapClusterTests(TestCase):
+    """The cluster endpoint aggregates POIs per zoom-level grid cell."""
+
+    def setUp(self):
+        clusters.invalidate()
+        make_place('Munnar', 10.0889, 77.0595)
+        make_place('Mattupetty Dam', 10.1063, 77.1235)
+        make_hill_station('Ooty', 11.4102, 76.6950)
+
+    def fetch(self, bbox, zoom):
+        return self.client.get(reverse('api-map-clusters'), {'bbox': bbox, 'zoom': zoom}).json()
+
+    def test_low_zoom_merges_neighbours(self):
+        data = self.fetch('68,6,98,36', 5)
+        counts = sorted(c['count'] for c in data['clusters'])
+        self.assertEqual(sum(counts), 3)
+        self.assertLess(len(counts), 3)
+
+    def test_high_zoom_and_viewport_filter(self):
+        data = self.fetch('76.9,9.9,77.3,10.3', 12)
+        self.assertEqual(sorted(c['representatives'][0]['name'] for c in data['clusters']), ['Mattupetty Dam', 'Munnar'])
+
+    def test_cached_grid_invalidated_on_write(self):
+        self.fetch('68,6,98,36', 5)
+        with self.assertNumQueries(0):
+            self.fetch('68,6,98,36', 5)
+        make_place('Marina Beach', 13.0499, 80.2824)
+        self.assertEqual(sum(c['count'] for c in self.fetch('68,6,98,36', 5)['clusters']), 4)
+
+    def test_bad_bbox(self):
+        for bbox in ('nope', '-inf,6,98,36', 'nan,6,98,36', '68,6,98,inf', '68,-95,98,36', '-200,6,98,36'):
+            with self.subTest(bbox=bbox):
+                response = self.client.get(reverse('api-map-clusters'), {'bbox': bbox, 'zoom': 5})
+                self.assertEqual(response.status_code, 400)
+
+    def test_other_workers_rebuild_after_a_commit(self):
+        self.fetch('68,6,98,36', 5)
+        # A write in another worker skips this process's receivers and only moves the shared counter
+        PointOfInterest.objects.filter(name='Ooty').update(latitude=None, longitude=None)
+        self.assertEqual(sum(c['count'] for c in self.fetch('68,6,98,36', 5)['clusters']), 3)
+        versions.bump_now('clusters')
+        self.assertEqual(sum(c['count'] for c in self.fetch('68,6,98,36', 5)['clusters']), 2)
+
+    def test_zoom_clamped_in_response(self):
+        self.assertEqual(self.fetch('76.9,9.9,77.3,10.3', 99)['zoom'], clusters.MAX_ZOOM)
+        self.assertEqual(self.fetch('68,6,98,36', -3)['zoom'], 0)
+
+
+class KeysetPaginationTests(TestCase):
+    """Listings and the search API page by cursor instead of rendering everything."""
+
+    def setUp(self):
+        geocache.clear()
+        for i in range(5):
+            make_place(f'Kochi spot {i}', 9.93 + i * 0.01, 76.26)
+
+    def walk(self, params):
+        names, cursor = [], None
+        while True:
+            query = dict(params, limit=2, **({'cursor': cursor} if cursor else {}))
+            data = self.client.get(reverse('api-geo-search'), query).json()
+            self.assertLessEqual(len(data['results']), 2)
+            names.extend(row['name'] for row in data['results'])
+            cursor = data['next_cursor']
+            if cursor is None:
+                return names
+
+    def test_geo_pages_follow_distance(self):
+        names = self.walk({'latitude': 9.93, 'longitude': 76.26, 'search_radius': 50})
+        self.assertEqual(names, [f'Kochi spot {i}' for i in range(5)])
+
+    def test_show_all_pages_cover_everything_once(self):
+        names = self.walk({'search_radius': 50})
+        self.assertEqual(sorted(names), [f'Kochi spot {i}' for i in range(5)])
+
+    def test_queryset_pages_are_disjoint(self):
+        first, cursor = paginate_queryset(Place.objects.all(), PLACE_ORDERING, page_size=3)
+        second, last = paginate_queryset(Place.objects.all(), PLACE_ORDERING, cursor, page_size=3)
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 2)
+        self.assertIsNone(last)
+        self.assertEqual({p.pk for p in first} & {p.pk for p in second}, set())
+
+    def test_bad_cursor_starts_from_the_top(self):
+        response = self.client.get(reverse('explorer-list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(len(response.context['places']), 5)
+
+    def test_cursor_with_wrong_types_starts_from_the_top(self):
+        for values in (['x', 'y'], ['2020-01-01', 'y'], [None, 1], [{}, []]):
+            with self.subTest(values=values):
+                response = self.client.get(reverse('explorer-list'), {'cursor': encode_cursor(values)})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.context['places']), 5)
+
+
+class FullTextSearchTests(TestCase):
+    """explorer_list search is served from the FTS5 index, ranked by bm25."""
+
+    def setUp(self):
+        self.fort = make_place('Bekal Fort', 12.39, 75.03, category='HISTORICAL',
+                               description='A seaside fort with <b>views</b> of the beach.')
+        self.beach = make_place('Kappad Beach', 11.38, 75.71, category='BEACH',
+                                description='Quiet beach near an old fort where Vasco da Gama landed.')
+        make_place('Munnar', 10.0889, 77.0595, description='Tea gardens.')
+
+    def search(self, **params):
+        with mock.patch('explorer.views.GeminiService.find_global_places', return_value=[]):
+            return self.client.get(reverse('explorer-list'), params).context['places']
+
+    def test_name_matches_rank_first(self):
+        self.assertEqual([p.name for p in self.search(q='fort')], ['Bekal Fort', 'Kappad Beach'])
+        self.assertEqual([p.name for p in self.search(q='beach')], ['Kappad Beach', 'Bekal Fort'])
+
+    def test_prefix_category_and_index_sync(self):
+        self.assertEqual([p.name for p in self.search(q='fo', category='BEACH')], ['Kappad Beach'])
+        self.fort.delete()
+        self.assertEqual([p.name for p in self.search(q='bekal')], [])
+        make_hill_station('Ponmudi', 8.76, 77.11, description='Misty fort hill')
+        self.assertEqual([p.name for p in self.search(q='ponmudi')], [])
+
+    def test_snippet_is_highlighted_and_escaped(self):
+        snippet = self.search(q='views')[0].snippet
+        self.assertIn('<mark>views</mark>', snippet)
+        self.assertIn('&lt;b&gt;', snippet)
+
+    def test_ranked_pages_are_read_in_sql(self):
+        for i in range(7):
+            make_place(f'Fort {i}', 12.0 + i * 0.01, 75.0, category='HISTORICAL' if i % 3 else 'BEACH',
+                       description='Old walls.')
+        hits = fulltext.search('fort', kinds=('place',))
+        self.assertEqual(fulltext.search('fort', kinds=('place',), limit=3), hits[:3])
+        self.assertEqual(fulltext.search('fort', kinds=('place',), after=hits[3], limit=3), hits[4:7])
+
+        names, cursor = [], None
+        while True:
+            places, cursor = paginate_ranked(
+                lambda after, limit: fulltext.search('fort', kinds=('place',), after=after, limit=limit),
+                lambda batch: ranked_places(batch, Place.objects.filter(category='BEACH'), 'fort'),
+                cursor, page_size=2,
+            )
+            names.extend(p.name for p in places)
+            if cursor is None:
+                break
+        self.assertEqual(sorted(names), ['Fort 0', 'Fort 3', 'Fort 6', 'Kappad Beach'])
+
+
+class FuzzySearchTests(TestCase):
+    """Misspelt searches fall back to stored trigram matches."""
+
+    def setUp(self):
+        make_place('Munnar Tea Museum', 10.0889, 77.0595, location='Munnar, Kerala')
+        self.hill = make_hill_station('Ponmudi Hills', 8.7597, 77.1167, city='Ponmudi')
+
+    def test_explorer_list_suggests_correction(self):
+        with mock.patch('explorer.views.GeminiService.find_global_places', return_value=[]):
+            response = self.client.get(reverse('explorer-list'), {'q': 'munar'})
+        self.assertEqual([p.name for p in response.context['places']], ['Munnar Tea Museum'])
+        self.assertEqual(response.context['did_you_mean'], 'Munnar')
+
+    def test_geo_search_text_fallback(self):
+        data = self.client.get(reverse('api-geo-search'), {'location_name': 'ponmudy', 'search_radius': 50}).json()
+        self.assertEqual([row['name'] for row in data['results']], ['Ponmudi Hills'])
+        self.assertEqual(data['did_you_mean'], 'Ponmudi')
+
+    def test_single_probe_and_write_sync(self):
+        with self.assertNumQueries(1):
+            matches = fuzzy.fuzzy_matches('ponmudi hils')
+        self.assertEqual(matches[0][1:3], ('hill_station', self.hill.pk))
+        self.hill.city = 'Braemore'
+        self.hill.name = 'Braemore'
+        self.hill.save()
+        self.assertEqual(fuzzy.fuzzy_matches('ponmudy'), [])
+
+
+class TagTests(TestCase):
+    """Place-type filters are precomputed tags applied before distance maths."""
+
+    def setUp(self):
+        geocache.clear()
+        self.temple = make_place('Padmanabhaswamy Temple', 8.4828, 76.9436, category='HISTORICAL',
+                                 description='Vishnu temple in Thiruvananthapuram.')
+        make_place('Napier Museum', 8.5089, 76.9553, category='HISTORICAL', description='Art museum.')
+        make_place('Kovalam', 8.3988, 76.9782, category='BEACH', description='Lighthouse beach.')
+
+    def tags_of(self, obj, kind='place'):
+        return list(PointOfInterest.objects.get(kind=kind, source_id=obj.pk).tags.values_list('tag', flat=True))
+
+    def test_tags_derived_on_write(self):
+        self.assertEqual(self.tags_of(self.temple), ['category:historical', 'temple'])
+        self.temple.name = 'Padmanabhaswamy'
+        self.temple.description = 'A fort by the sea.'
+        self.temple.save()
+        self.assertEqual(self.tags_of(self.temple), ['category:historical', 'mentions:fort'])
+
+    def test_temple_filter_restricts_index_candidates(self):
+        with mock.patch('explorer.spatial.CoordinateArray.append', autospec=True,
+                        side_effect=CoordinateArray.append) as appended:
+            response = self.client.get(reverse('geolocation-search'), {
+                'latitude': 8.5, 'longitude': 76.95, 'search_radius': 25, 'place_type': 'TEMPLE',
+            })
+        self.assertEqual([p.name for p in response.context['places']], ['Padmanabhaswamy Temple'])
+        self.assertEqual(appended.call_count, 1)
+
+    def test_temple_filter_ignores_description_mentions(self):
+        ponmudi = make_hill_station('Ponmudi', 8.7598, 77.1166,
+                                    description='Misty hills with temples and tea estates on the way up.')
+        self.assertEqual(self.tags_of(ponmudi, 'hill_station'), ['category:hill_station', 'mentions:temple'])
+        response = self.client.get(reverse('geolocation-search'), {
+            'latitude': 8.5, 'longitude': 76.95, 'search_radius': 50, 'place_type': 'TEMPLE',
+        })
+        self.assertEqual([p.name for p in response.context['places']], ['Padmanabhaswamy Temple'])
+
+    def test_category_filter_ignores_keyword_mentions(self):
+        make_place('Shanghumugham Fish Market', 8.4789, 76.9104, category='CITY',
+                   description='Fresh catch sold next to the beach.')
+        response = self.client.get(reverse('geolocation-search'), {
+            'latitude': 8.5, 'longitude': 76.95, 'search_radius': 25, 'place_type': 'BEACH',
+        })
+        self.assertEqual([p.name for p in response.context['places']], ['Kovalam'])
+
+    def test_tag_filter_joins_in_the_index_query(self):
+        for backend in ('rtree', 'grid'):
+            with self.subTest(backend=backend), override_settings(EXPLORER_SPATIAL_INDEX=backend):
+                reset_index()
+                index = get_index()
+                with CaptureQueriesContext(connection) as ctx:
+                    hits = index.within(8.5, 76.95, 25, tag='temple')
+                self.assertEqual([hit[1:] for hit in hits], [('place', self.temple.pk)])
+                self.assertEqual(len(ctx.captured_queries), 1)
+        reset_index()
+
+
+class FacetCountTests(TestCase):
+    """Filter counts are kept up to date on write and read without GROUP BY."""
+
+    def setUp(self):
+        self.ooty = make_hill_station('Ooty', 11.4102, 76.6950, city='Ooty', state='Tamil Nadu')
+        make_hill_station('Kodaikanal', 10.2381, 77.4892, city='Kodaikanal', state='Tamil Nadu')
+        make_hill_station('Munnar', 10.0889, 77.0595, city='Munnar')
+        make_place('Marina Beach', 13.0499, 80.2824, category='BEACH')
+
+    def test_counts_follow_create_edit_delete(self):
+        self.assertEqual(facets.counts('hill_station_state')['hill_station_state'], [('Kerala', 1), ('Tamil Nadu', 2)])
+        self.ooty.state = 'Kerala'
+        self.ooty.save()
+        self.assertEqual(facets.counts('hill_station_state')['hill_station_state'], [('Kerala', 2), ('Tamil Nadu', 1)])
+        self.ooty.delete()
+        self.assertEqual(facets.counts('hill_station_city')['hill_station_city'], [('Kodaikanal', 1), ('Munnar', 1)])
+
+    def test_list_pages_read_counts_without_grouping(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('hill-stations-list'))
+        self.assertIn(('Tamil Nadu', 2), response.context['states'])
+        self.assertFalse([q for q in ctx.captured_queries if 'DISTINCT' in q['sql'] or 'GROUP BY' in q['sql']])
+
+        response = self.client.get(reverse('explorer-list'))
+        self.assertIn(('BEACH', 'Beach', 1), response.context['categories'])
+        self.assertEqual(response.context['total_count'], 1)
+
+
+class GeoResultCacheTests(TestCase):
+    """Repeat searches from the same neighbourhood are answered from memory."""
+
+    def setUp(self):
+        geocache.clear()
+        make_place('Munnar', 10.0889, 77.0595)
+        make_place('Mattupetty Dam', 10.1063, 77.1235)
+
+    def search(self, lat, lng):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('geolocation-search'), {
+                'latitude': lat, 'longitude': lng, 'search_radius': 10,
+            })
+        probes = [q for q in ctx.captured_queries if 'explorer_poi_rtree' in q['sql']]
+        return [(p.name, p.distance_km) for p in response.context['places']], len(probes)
+
+    def test_nearby_origin_served_from_cache(self):
+        first, probes = self.search(10.0890, 77.0600)
+        self.assertEqual(probes, 1)
+        second, probes = self.search(10.0893, 77.0610)
+        self.assertEqual(probes, 0)
+        self.assertEqual([name for name, _ in second], ['Munnar', 'Mattupetty Dam'])
+        self.assertNotEqual(first, second)
+
+    def test_write_inside_cell_invalidates(self):
+        self.search(10.0890, 77.0600)
+        make_place('Anayirangal Dam', 10.0100, 77.0700)
+        results, probes = self.search(10.0890, 77.0600)
+        self.assertEqual(probes, 1)
+        self.assertIn('Anayirangal Dam', [name for name, _ in results])
+
+    def test_lru_eviction_and_precision(self):
+        cache = geocache.GeoResultCache(max_entries=2)
+        for key in ('a', 'b'):
+            cache.put(key, (0, 1, 0, 1), CoordinateArray())
+        cache.get('a')
+        cache.put('c', (0, 1, 0, 1), CoordinateArray())
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertEqual([geocache.precision_for(r) for r in (1, 5, 25, 50)], [6, 5, 4, 4])
+
+    def test_entries_expire(self):
+        now = [0.0]
+        cache = geocache.GeoResultCache(max_age=60, clock=lambda: now[0])
+        cache.put('a', (0, 1, 0, 1), CoordinateArray())
+        now[0] = 59
+        self.assertIsNotNone(cache.get('a'))
+        now[0] = 61
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+    def test_commit_in_another_worker_invalidates(self):
+        first, _ = self.search(10.0890, 77.0600)
+        # Another worker's commit leaves this process's LRU alone and only bumps the shared counter
+        versions.bump_now('geocache')
+        results, probes = self.search(10.0890, 77.0600)
+        self.assertEqual(probes, 1)
+        self.assertEqual(results, first)
+
+
+class SnapshotIndexTests(TestCase):
+    """The mmap snapshot backend answers lookups and follows writes via its version counter."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.settings_override = override_settings(
+            EXPLORER_SPATIAL_INDEX='snapshot', EXPLORER_SNAPSHOT_PATH=f'{self.tmp.name}/poi.bin',
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        snapshot.reset_snapshot()
+        self.addCleanup(snapshot.reset_snapshot)
+        # Version bumps wait for the commit, which TestCase never reaches on its own
+        with self.captureOnCommitCallbacks(execute=True):
+            self.munnar = make_place('Munnar', 10.0889, 77.0595, category='NATURE')
+            make_hill_station('Devikulam', 10.0626, 77.1036)
+
+    def test_lookups_match_rtree(self):
+        snapshot_hits = get_index().within(10.0889, 77.0595, 25)
+        with override_settings(EXPLORER_SPATIAL_INDEX='rtree'):
+            rtree_hits = get_index().within(10.0889, 77.0595, 25)
+        self.assertEqual([hit[1:] for hit in snapshot_hits], [hit[1:] for hit in rtree_hits])
+        snap = snapshot.get_snapshot()
+        self.assertEqual(snapshot.CATEGORIES[snap.categories[list(snap.ids).index(self.munnar.pk)]], 'NATURE')
+
+    def test_writes_bump_version_and_swap_mapping(self):
+        first = snapshot.get_snapshot()
+        with self.captureOnCommitCallbacks(execute=True):
+            make_place('Mattupetty Dam', 10.1063, 77.1235)
+        second = snapshot.get_snapshot()
+        self.assertGreater(second.version, first.version)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 3)
+        with self.assertNumQueries(0):
+            self.assertIs(snapshot.get_snapshot(), second)
+
+    def test_box_lookup_reads_only_nearby_cells(self):
+        path = f'{self.tmp.name}/grid.bin'
+        rows = [('place', i * 40 + j, 8.0 + i * 0.5, 68.0 + j * 0.5, 'OTHER') for i in range(40) for j in range(40)]
+        snapshot.write_snapshot_file(path, reversed(rows), 1)
+        snap = snapshot.Snapshot(path)
+        box = bounding_box(17.0, 80.0, 60)
+        expected = sorted(pk for _, pk, lat, lng, _ in rows if box[0] <= lat <= box[1] and box[2] <= lng <= box[3])
+        self.assertEqual(sorted(pk for _, pk, _, _ in snap.in_box(*box)), expected)
+        self.assertLess(sum(end - start for start, end in snap.row_ranges(*box)), 4 * len(expected))
+        self.assertEqual(snap.in_box(0.0, 1.0, 60.0, 61.0), [])
+
+    def test_neighbours_refreshed_after_atomic_save(self):
+        version = snapshot.read_version()
+        # The admin saves inside a transaction; neighbour lists must see the new rows
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                dam = make_place('Mattupetty Dam', 10.1063, 77.1235)
+                lake = make_place('Kundala Lake', 10.1379, 77.1802)
+        self.assertEqual(snapshot.read_version(), version + 1)
+        neighbours = NearbyPlace.objects.filter(source_type='place', source_id=self.munnar.pk)
+        self.assertIn(dam.pk, neighbours.values_list('target_id', flat=True))
+        self.assertIn(lake.pk, NearbyPlace.objects.filter(
+            source_type='place', source_id=dam.pk).values_list('target_id', flat=True))
+
+
+class CorridorSearchTests(TestCase):
+    """POIs along a drive come back in route order from a few index probes."""
+
+    def setUp(self):
+        make_place('Bhongir Fort', 17.5103, 78.8889, category='HISTORICAL', description='Fort on a monolith.')
+        make_place('Yadagirigutta Temple', 17.5872, 78.9456, category='HISTORICAL', description='Hill temple.')
+        make_place('Thousand Pillar Temple', 17.9947, 79.5743, category='HISTORICAL', description='Kakatiya temple.')
+        make_place('Nizamabad Fort', 18.6725, 78.0941, category='HISTORICAL', description='Fort.')
+
+    def fetch(self, **params):
+        return self.client.get(reverse('api-corridor-search'), params)
+
+    def test_results_ordered_along_route(self):
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.fetch(origin='Hyderabad', destination='Warangal', width=15).json()
+        names = [row['name'] for row in data['results']]
+        self.assertEqual(names, ['Bhongir Fort', 'Yadagirigutta Temple', 'Thousand Pillar Temple'])
+        along = [row['along_km'] for row in data['results']]
+        self.assertEqual(along, sorted(along))
+        self.assertTrue(all(row['offset_km'] <= 15 for row in data['results']))
+        probes = [q for q in ctx.captured_queries if 'explorer_poi_rtree' in q['sql']]
+        self.assertLessEqual(len(probes), 4)
+
+    def test_coordinates_place_type_and_errors(self):
+        data = self.fetch(origin_lat=17.385, origin_lng=78.4867, destination='Warangal',
+                          width=15, place_type='TEMPLE').json()
+        self.assertEqual([row['name'] for row in data['results']], ['Yadagirigutta Temple', 'Thousand Pillar Temple'])
+        self.assertEqual(self.fetch(origin='Nowhere at all', destination='Warangal').status_code, 400)
+        self.assertEqual(self.fetch(origin='Hyderabad', destination='Warangal', width='wide').status_code, 400)
+
+    def test_width_and_route_bounded(self):
+        for width in ('nan', 'inf', '-1', '0'):
+            self.assertEqual(self.fetch(origin='Hyderabad', destination='Warangal', width=width).status_code, 400)
+        self.assertEqual(self.fetch(origin_lat='nan', origin_lng=78.4, destination='Warangal').status_code, 400)
+        via = ';'.join(['17.6,79.0'] * (corridor.MAX_VIA_POINTS + 1))
+        self.assertEqual(self.fetch(origin='Hyderabad', destination='Warangal', via=via).status_code, 400)
+
+        # A hair-thin corridor over a long drive is clamped and probed a bounded number of times
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.fetch(origin='Hyderabad', destination='Chennai', width='0.001').json()
+        self.assertEqual(data['width_km'], corridor.MIN_WIDTH_KM)
+        probes = [q for q in ctx.captured_queries if 'explorer_poi_rtree' in q['sql']]
+        self.assertLessEqual(len(probes), corridor.MAX_PROBES + 1)
+
+
+class MultiCategoryNearbyTests(TestCase):
+    """Several real-time categories are answered by one Overpass union query."""
+
+    ELEMENTS = [
+        {'type': 'node', 'lat': 17.3616, 'lon': 78.4747, 'tags': {'name': 'Charminar', 'tourism': 'attraction'}},
+        {'type': 'node', 'lat': 17.3620, 'lon': 78.4740, 'tags': {'name': 'Hotel Shadab', 'amenity': 'restaurant'}},
+        {'type': 'way', 'center': {'lat': 17.3610, 'lon': 78.4750},
+         'tags': {'name': 'Taj Residency', 'tourism': 'hotel'}},
+        {'type': 'node', 'lat': 17.3604, 'lon': 78.4736, 'tags': {'name': 'Mecca Masjid', 'amenity': 'place_of_worship'}},
+    ]
+
+    def setUp(self):
+        PlacesService.tile_cache.clear()
+        for provider_breaker in PlacesService.breakers.values():
+            provider_breaker.reset()
+
+    def overpass(self, elements):
+        response = mock.Mock()
+        response.json.return_value = {'elements': elements}
+        return mock.patch('tourist_project.services.places_service.client.post', return_value=response)
+
+    def fetch(self, category):
+        return self.client.get(reverse('api-nearby-places'), {
+            'lat': '17.3616', 'lng': '78.4747', 'radius': 2, 'category': category,
+        }).json()
+
+    def test_one_union_query_split_by_category(self):
+        with self.overpass(self.ELEMENTS) as post:
+            data = self.fetch('HOTEL,RESTAURANT,ATTRACTION')
+            # Served from the tiles cached per category
+            again = self.fetch('RESTAURANT,HOTEL')
+        self.assertEqual(post.call_count, 1)
+        query = post.call_args.kwargs['data']['data']
+        for category in ('HOTEL', 'RESTAURANT', 'ATTRACTION'):
+            self.assertIn(PlacesService.OSM_MAPPING[category], query)
+        self.assertNotIn(PlacesService.OSM_MAPPING['TEMPLE'], query)
+
+        self.assertEqual([(p['name'], p['category']) for p in data['results']], [
+            ('Taj Residency', 'HOTEL'), ('Hotel Shadab', 'RESTAURANT'), ('Charminar', 'ATTRACTION'),
+        ])
+        self.assertEqual(data['counts'], {'HOTEL': 1, 'RESTAURANT': 1, 'ATTRACTION': 1})
+        self.assertEqual([p['name'] for p in again['results']], ['Hotel Shadab', 'Taj Residency'])
+
+    def test_only_missing_categories_fetched(self):
+        with self.overpass(self.ELEMENTS) as post:
+            self.fetch('HOTEL')
+            data = self.fetch('HOTEL,TEMPLE')
+        self.assertEqual(post.call_count, 2)
+        second_query = post.call_args.kwargs['data']['data']
+        self.assertIn(PlacesService.OSM_MAPPING['TEMPLE'], second_query)
+        self.assertNotIn(PlacesService.OSM_MAPPING['HOTEL'], second_query)
+        self.assertEqual([p['name'] for p in data['results']], ['Taj Residency', 'Mecca Masjid'])
+
+    def test_google_fans_out_per_category(self):
+        calls = []
+
+        def fake_google(lat, lng, radius, category, key):
+            calls.append(category)
+            return [{'name': f'{category} spot', 'lat': 17.3616, 'lng': 78.4747, 'category': category}]
+
+        with override_settings(GOOGLE_PLACES_API_KEY='key'), \
+                mock.patch.object(PlacesService, '_fetch_from_google', side_effect=fake_google):
+            data = self.fetch('HOSPITAL,TRANSPORT')
+        self.assertEqual(sorted(calls), ['HOSPITAL', 'TRANSPORT'])
+        self.assertEqual([p['name'] for p in data['results']], ['HOSPITAL spot', 'TRANSPORT spot'])
+
+    def test_too_many_categories_rejected(self):
+        categories = ','.join(list(PlacesService.OSM_MAPPING) + ['ZOO'])
+        response = self.client.get(reverse('api-nearby-places'), {'lat': '17.36', 'lng': '78.47', 'category': categories})
+        self.assertEqual(response.status_code, 400)
@@ -4,6 +4,11 @@ from . import views
 urlpatterns = [
     path('', views.explorer_list, name='explorer-list'),
     path('search/geolocation/', views.geolocation_search, name='geolocation-search'),
+    path('api/autocomplete/', views.api_autocomplete, name='api-autocomplete'),
+    path('api/search/', views.api_geo_search, name='api-geo-search'),
+    path('api/nearby/batch/', views.api_nearby_batch, name='api-nearby-batch'),
+    path('api/corridor/', views.api_corridor_search, name='api-corridor-search'),
+    path('api/clusters/', views.api_map_clusters, name='api-map-clusters'),
     path('<int:pk>/', views.explorer_detail, name='explorer-detail'),
     path('add/', views.place_add, name='explorer-add'),
     path('<int:pk>/edit/', views.place_edit, name='explorer-edit'),
@@ -19,4 +24,5 @@ urlpatterns = [
     # Real-time GPS Search
     path('real-time/', views.real_time_explorer, name='real-time-explorer'),
     path('api/nearby-places/', views.api_nearby_places, name='api-nearby-places'),
+    path('status/', views.service_status, name='service-status'),
 ]
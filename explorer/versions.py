@@ -0,0 +1,48 @@
+"""
+Shared version counters for the explorer's per-process caches.
+
+The autocomplete trie, map cluster grids, geo search results and the
+in-memory grid index are built inside each worker. A write bumps the
+cache's counter in the Django cache once its transaction commits, and
+every worker compares the counter with the one its copy was built
+under, rebuilding when it has moved. Counters only span workers when a
+shared cache backend is configured, so copies are also rebuilt once
+they are older than MAX_AGE_SECONDS.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+MAX_AGE_SECONDS = 300
+
+
+def version_key(name):
+    return f'explorer:{name}:version'
+
+
+def current(name):
+    return cache.get(version_key(name), 0)
+
+
+def bump_now(name):
+    try:
+        cache.incr(version_key(name))
+    except ValueError:
+        cache.add(version_key(name), 1, timeout=None)
+
+
+def bump(name):
+    """Bump a counter once the current transaction commits (straight away outside one)."""
+    transaction.on_commit(lambda: bump_now(name))
+
+
+def stamp(name):
+    """The (version, built_at) to keep alongside a copy built now."""
+    return current(name), time.monotonic()
+
+
+def is_fresh(name, built, max_age=MAX_AGE_SECONDS):
+    version, built_at = built
+    return version == current(name) and time.monotonic() - built_at <= max_age
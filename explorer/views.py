@@ -1,234 +1,331 @@
+from copy import copy
+from math import isfinite
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
 from django.db.models import Q
-from math import radians, cos, sin, asin, sqrt
-from .models import Place, HillStation
+from .models import Place, HillStation, PointOfInterest
 from .forms import PlaceForm, HillStationForm, GeoLocationSearchForm
+from . import autocomplete, clusters, corridor, facets, fulltext, fuzzy, geocache
+from .nearby import MAX_BATCH_ORIGINS, nearby_hits, nearby_hits_many, origin_coordinates, stored_hits
+from .pagination import PAGE_SIZE, paginate_hits, paginate_queryset, paginate_ranked
+from .spatial import get_index
+from .tags import PLACE_TYPE_TAGS
 from tourist_project.services.gemini_service import GeminiService
+from tourist_project.services.geocoder import GeocoderService
+from tourist_project.services.circuit_breaker import all_breakers
+from tourist_project.services.http_client import client as http_client
 from tourist_project.services.places_service import PlacesService
+from tourist_project.services.singleflight import flight
 from django.http import JsonResponse
+from django.views.decorators.cache import cache_control
+
+
+NEAREST_RESULTS = 12
+
+# Keyset orderings; each ends in the primary key so the cursor is unique
+PLACE_ORDERING = ('-date_added', '-id')
+HILL_STATION_ORDERING = ('-created_date', '-id')
+POI_ORDERING = ('kind', 'name', 'id')
 
 
-def haversine(lon1, lat1, lon2, lat2):
+# Columns the nearby cards render; descriptions and images stay in the database
+NEARBY_CARD_FIELDS = {
+    'place': ('name', 'location', 'category', 'latitude', 'longitude'),
+    'hill_station': ('name', 'city', 'latitude', 'longitude'),
+}
+
+
+def hydrate_hit_lists(hit_lists):
     """
-    Calculate the great circle distance between two points 
-    on the earth (specified in decimal degrees)
-    Returns distance in kilometers
+    Turn lists of [(distance_km, kind, pk), ...] index hits into model
+    instances annotated the way the explorer templates expect, preserving
+    hit order. Distances come from the index, so only these final rows are
+    loaded, with one in_bulk per model shared by every list.
+    """
+    ids = {'place': set(), 'hill_station': set()}
+    for hits in hit_lists:
+        for _, kind, pk in hits:
+            ids[kind].add(pk)
+    rows = {
+        kind: model.objects.only(*NEARBY_CARD_FIELDS[kind]).in_bulk(ids[kind]) if ids[kind] else {}
+        for kind, model in (('place', Place), ('hill_station', HillStation))
+    }
+    results = []
+    for hits in hit_lists:
+        annotated = []
+        for dist, kind, pk in hits:
+            obj = rows[kind].get(pk)
+            if obj is None:
+                continue
+            # A row can be near several origins, each at its own distance
+            obj = copy(obj)
+            obj.distance_km = round(dist, 2)
+            obj.result_type = kind
+            if kind == 'hill_station':
+                obj.category = 'HILL_STATION'
+            annotated.append(obj)
+        results.append(annotated)
+    return results
+
+
+def hydrate_hits(hits):
+    return hydrate_hit_lists([hits])[0]
+
+
+def hits_filter(hits):
+    """Q matching the PointOfInterest rows of index hits."""
+    ids = {}
+    for _, kind, pk in hits:
+        ids.setdefault(kind, []).append(pk)
+    match = Q()
+    for kind, pks in ids.items():
+        match |= Q(kind=kind, source_id__in=pks)
+    return match
+
+
+def surviving_hits(hits, points):
     """
-    # convert decimal degrees to radians 
-    lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
-    # haversine formula 
-    dlon = lon2 - lon1 
-    dlat = lat2 - lat1 
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * asin(sqrt(a)) 
-    r = 6371 # Radius of earth in kilometers
-    return c * r
+    The hits whose rows pass the filters of a PointOfInterest queryset,
+    checked over a (kind, source_id) projection without building models.
+    """
+    if not hits:
+        return []
+    keys = set(points.filter(hits_filter(hits)).values_list('kind', 'source_id'))
+    return [hit for hit in hits if hit[1:] in keys]
+
+
+def points_for_hits(hits, points=None):
+    """
+    Fetch the PointOfInterest rows for index hits in a single query,
+    annotated with distance_km (and the raw hit) and kept in hit order.
+    """
+    if points is None:
+        points = PointOfInterest.objects.all()
+    if not hits:
+        return []
+    rows = {(poi.kind, poi.source_id): poi for poi in points.filter(hits_filter(hits))}
+    results = []
+    for dist, kind, pk in hits:
+        poi = rows.get((kind, pk))
+        if poi is not None:
+            poi.distance_km = round(dist, 2)
+            poi.hit = (dist, kind, pk)
+            results.append(poi)
+    return results
+
+
+def nearest_points(lat, lng, points, count=NEAREST_RESULTS, tag=None):
+    """
+    The `count` closest rows of a PointOfInterest queryset, whatever their
+    distance. The index is asked for progressively more neighbours until
+    enough of them survive the queryset's filters; `tag` restricts the
+    index itself (see SpatialIndex.candidates). Only the final `count`
+    rows are fetched as model instances.
+    """
+    k = count
+    while True:
+        hits = get_index().nearest(lat, lng, k, tag=tag)
+        survivors = surviving_hits(hits, points)
+        if len(survivors) >= count or len(hits) < k:
+            return points_for_hits(survivors[:count], points)
+        k *= 4
+
+
+def page_query(request, cursor=None):
+    """Querystring for the page after `cursor` (or the first page), keeping the current filters."""
+    params = request.GET.copy()
+    params.pop('cursor', None)
+    if cursor is not None:
+        params['cursor'] = cursor
+    return params.urlencode()
+
+
+def pager_context(request, next_cursor):
+    return {
+        'is_paged': bool(request.GET.get('cursor')),
+        'first_page_query': page_query(request),
+        'next_page_query': page_query(request, next_cursor) if next_cursor else '',
+    }
+
+
+def search_points(cleaned_data, cursor=None, page_size=PAGE_SIZE):
+    """
+    Run a GeoLocationSearchForm search and return one page of
+    PointOfInterest rows with the context the map needs. Radius searches
+    are ordered by distance, everything else by kind and name.
+    """
+    latitude = cleaned_data.get('latitude')
+    longitude = cleaned_data.get('longitude')
+    location_name = (cleaned_data.get('location_name', '') or '').strip()
+    place_type = cleaned_data.get('place_type')
+    search_radius = int(cleaned_data.get('search_radius', 50))
+    result = {
+        'places': [],
+        'next_cursor': None,
+        'search_lat': None,
+        'search_lng': None,
+        'radius_expanded': False,
+        'cluster_map': False,
+        'did_you_mean': None,
+    }
+
+    # Geocode: if no GPS coords but location name typed, look up the gazetteer.
+    # States are too large for a radius search and fall through to text search.
+    if (latitude is None or longitude is None) and location_name:
+        coords = GeocoderService.geocode(location_name, kinds=('city', 'district', 'landmark'))
+        if coords:
+            latitude, longitude = coords
+
+    # Place types are precomputed tags: one indexed lookup, done before any distance maths
+    points = PointOfInterest.objects.all()
+    tag = PLACE_TYPE_TAGS.get(place_type)
+    if tag:
+        points = points.filter(tags__tag=tag)
+
+    if latitude is not None and longitude is not None:
+        result['search_lat'] = latitude
+        result['search_lng'] = longitude
+
+        # Candidates come from the spatial index (cached per geohash cell),
+        # not a table scan; only the page being shown is fetched from the database
+        hits = geocache.within(latitude, longitude, search_radius, tag)
+        result['places'], result['next_cursor'] = paginate_hits(
+            hits, lambda batch: points_for_hits(batch, points), cursor, page_size,
+        )
+        if not hits and not cursor:
+            # Nothing inside the chosen radius: show the closest matches instead
+            result['places'] = nearest_points(latitude, longitude, points, tag=tag)
+            result['radius_expanded'] = bool(result['places'])
+
+    elif location_name:
+        # Fall back to text search over the unified POI table
+        result['places'], result['next_cursor'] = paginate_queryset(
+            points.filter(search_text__contains=location_name.lower()), POI_ORDERING, cursor, page_size,
+        )
+        if not result['places'] and not cursor:
+            # Probably a typo: rank names and locations by trigram similarity
+            result['places'] = fuzzy.matched_points(fuzzy.fuzzy_matches(location_name), points)
+            if result['places']:
+                result['did_you_mean'] = result['places'][0].matched_term
+    else:
+        # Show all places if empty search; the map loads clusters instead of markers
+        result['places'], result['next_cursor'] = paginate_queryset(points, POI_ORDERING, cursor, page_size)
+        result['cluster_map'] = True
+
+    return result
 
 
 def geolocation_search(request):
     """Search for places using geolocation and filters, with map display."""
     form = GeoLocationSearchForm(request.GET or None)
-    places = []
-    total_places = 0
-    search_performed = False
-    search_lat = None
-    search_lng = None
-    
-    # Indian city coordinates for geocoding typed location names
-    CITY_GPS = {
-        'warangal': (17.9784, 79.5941), 'hyderabad': (17.3850, 78.4867),
-        'bangalore': (12.9716, 77.5946), 'bengaluru': (12.9716, 77.5946),
-        'chennai': (13.0827, 80.2707), 'mumbai': (19.0760, 72.8777),
-        'delhi': (28.6139, 77.2090), 'new delhi': (28.6139, 77.2090),
-        'kolkata': (22.5726, 88.3639), 'pune': (18.5204, 73.8567),
-        'jaipur': (26.9124, 75.7873), 'goa': (15.2993, 74.1240),
-        'kochi': (9.9312, 76.2673), 'cochin': (9.9312, 76.2673),
-        'thiruvananthapuram': (8.5241, 76.9366), 'trivandrum': (8.5241, 76.9366),
-        'mysore': (12.3051, 76.6551), 'mysuru': (12.3051, 76.6551),
-        'vizag': (17.6868, 83.2185), 'visakhapatnam': (17.6868, 83.2185),
-        'vijayawada': (16.5062, 80.6480), 'tirupati': (13.6288, 79.4192),
-        'madurai': (9.9252, 78.1198), 'coimbatore': (11.0168, 76.9558),
-        'trichy': (10.7905, 78.7047), 'thanjavur': (10.7870, 79.1378),
-        'pondicherry': (11.9416, 79.8083), 'puducherry': (11.9416, 79.8083),
-        'shimla': (31.1048, 77.1734), 'manali': (32.2396, 77.1887),
-        'ooty': (11.4102, 76.6950), 'munnar': (10.0889, 77.0595),
-        'darjeeling': (27.0410, 88.2663), 'gangtok': (27.3389, 88.6065),
-        'udaipur': (24.5854, 73.7125), 'jodhpur': (26.2389, 73.0243),
-        'varanasi': (25.3176, 83.0036), 'agra': (27.1767, 78.0081),
-        'amritsar': (31.6200, 74.8765), 'rishikesh': (30.0869, 78.2676),
-        'dehradun': (30.3165, 78.0322), 'mussoorie': (30.4598, 78.0644),
-        'nainital': (29.3919, 79.4542), 'kodaikanal': (10.2381, 77.4892),
-        'leh': (34.1526, 77.5771), 'srinagar': (34.0837, 74.7973),
-        'chandigarh': (30.7333, 76.7794), 'lucknow': (26.8467, 80.9462),
-        'ahmedabad': (23.0225, 72.5714), 'bhopal': (23.2599, 77.4126),
-        'indore': (22.7196, 75.8577), 'nagpur': (21.1458, 79.0882),
-        'patna': (25.6093, 85.1376), 'bhubaneswar': (20.2961, 85.8245),
-        'guwahati': (26.1445, 91.7362), 'coorg': (12.3375, 75.8069),
-        'hampi': (15.3350, 76.4600), 'puri': (19.8135, 85.8312),
-        'mahabalipuram': (12.6172, 80.1927), 'rameshwaram': (9.2876, 79.3129),
-        'alleppey': (9.4981, 76.3388), 'kovalam': (8.3988, 76.9780),
-        'varkala': (8.7379, 76.7163), 'lonavala': (18.7546, 73.4062),
-        'mount abu': (24.5926, 72.7156), 'wayanad': (11.6854, 76.1320),
-        'araku': (18.3273, 82.8759), 'srisailam': (15.8512, 78.8680),
-        'guntur': (16.3067, 80.4365), 'nellore': (14.4426, 79.9865),
-        'khammam': (17.2473, 80.1514), 'nizamabad': (18.6725, 78.0940),
-        'karimnagar': (18.4386, 79.1288), 'salem': (11.6643, 78.1460),
+    context = {
+        'form': form,
+        'places': [],
+        'total_places': 0,
+        'search_performed': False,
+        'search_lat': None,
+        'search_lng': None,
+        'radius_expanded': False,
+        'cluster_map': False,
+        'did_you_mean': None,
+        'next_cursor': None,
     }
-    
+
     if request.GET and form.is_valid():
-        search_performed = True
-        latitude = form.cleaned_data.get('latitude')
-        longitude = form.cleaned_data.get('longitude')
-        location_name = form.cleaned_data.get('location_name', '') or ''
-        location_name = location_name.strip()
-        place_type = form.cleaned_data.get('place_type')
-        search_radius = int(form.cleaned_data.get('search_radius', 50))
-        
-        # Geocode: if no GPS coords but location name typed, look up the city
-        if (latitude is None or longitude is None) and location_name:
-            city_key = location_name.lower().strip()
-            if city_key in CITY_GPS:
-                latitude, longitude = CITY_GPS[city_key]
-        
-        if latitude is not None and longitude is not None:
-            search_lat = latitude
-            search_lng = longitude
-            
-            # Search Places by distance
-            all_places = Place.objects.filter(latitude__isnull=False, longitude__isnull=False)
-            for place in all_places:
-                dist = haversine(longitude, latitude, place.longitude, place.latitude)
-                if dist <= search_radius:
-                    place.distance_km = round(dist, 2)
-                    place.result_type = 'place'
-                    places.append(place)
-            
-            # Also search HillStations by distance
-            all_hills = HillStation.objects.filter(latitude__isnull=False, longitude__isnull=False)
-            for hs in all_hills:
-                dist = haversine(longitude, latitude, hs.longitude, hs.latitude)
-                if dist <= search_radius:
-                    hs.distance_km = round(dist, 2)
-                    hs.result_type = 'hill_station'
-                    hs.category = 'HILL_STATION'
-                    places.append(hs)
-        
-        elif location_name:
-            # Fall back to text search across both models
-            text_places = list(Place.objects.filter(
-                Q(location__icontains=location_name) | Q(name__icontains=location_name)
-            ))
-            for p in text_places:
-                p.result_type = 'place'
-            places.extend(text_places)
-            
-            text_hills = list(HillStation.objects.filter(
-                Q(city__icontains=location_name) | Q(name__icontains=location_name) |
-                Q(state__icontains=location_name)
-            ))
-            for hs in text_hills:
-                hs.result_type = 'hill_station'
-                hs.category = 'HILL_STATION'
-            places.extend(text_hills)
-        else:
-            # Show all places if empty search
-            for p in Place.objects.all():
-                p.result_type = 'place'
-                places.append(p)
-            for hs in HillStation.objects.all():
-                hs.result_type = 'hill_station'
-                hs.category = 'HILL_STATION'
-                places.append(hs)
-        
-        # Filter by place type
-        if place_type:
-            if place_type == 'HILL_STATION':
-                places = [p for p in places if getattr(p, 'category', '') == 'HILL_STATION']
-            elif place_type == 'TEMPLE':
-                places = [p for p in places if 
-                    'historical' in getattr(p, 'category', '').lower() or 
-                    'temple' in getattr(p, 'name', '').lower() or
-                    'temple' in getattr(p, 'location', getattr(p, 'city', '')).lower()]
-            elif place_type in ['BEACH', 'HISTORICAL', 'NATURE', 'ADVENTURE', 'CITY']:
-                places = [p for p in places if getattr(p, 'category', '') == place_type]
-        
-        total_places = len(places)
-        places = sorted(places, key=lambda x: getattr(x, 'distance_km', float('inf')))
-    
-    return render(request, 'explorer/geolocation_search.html', {
-        'form': form,
-        'places': places,
-        'total_places': total_places,
-        'search_performed': search_performed,
-        'search_lat': search_lat,
-        'search_lng': search_lng,
-    })
+        context.update(search_points(form.cleaned_data, request.GET.get('cursor')))
+        context['search_performed'] = True
+        context['total_places'] = len(context['places'])
+
+    context.update(pager_context(request, context['next_cursor']))
+    return render(request, 'explorer/geolocation_search.html', context)
 
 
 def get_nearby_places(lat, lon, exclude_pk=None, exclude_type=None):
     """Helper to find nearby records from both models."""
-    nearby = []
-    if lat is None or lon is None:
-        return []
-        
-    # Check Places
-    all_p = Place.objects.filter(latitude__isnull=False, longitude__isnull=False)
-    for p in all_p:
-        if exclude_type == 'place' and p.pk == exclude_pk:
-            continue
-        dist = haversine(lon, lat, p.longitude, p.latitude)
-        if dist <= 25:
-            p.distance_km = round(dist, 2)
-            p.result_type = 'place'
-            nearby.append(p)
-            
-    # Check HillStations
-    all_h = HillStation.objects.filter(latitude__isnull=False, longitude__isnull=False)
-    for h in all_h:
-        if exclude_type == 'hill_station' and h.pk == exclude_pk:
+    return hydrate_hits(nearby_hits(lat, lon, exclude=(exclude_type, exclude_pk)))
+
+
+def get_nearby_places_many(origins):
+    """
+    get_nearby_places() for a list of (lat, lng, exclude) origins, where
+    exclude is a (kind, pk) to leave out or None. Returns one neighbour
+    list per origin from a single index sweep and one fetch per model.
+    """
+    return hydrate_hit_lists(nearby_hits_many(origins))
+
+
+def ranked_places(hits, places, query):
+    """
+    Fetch the Place rows for full-text hits in rank order, each annotated
+    with its hit and a highlighted description snippet.
+    """
+    rows = places.in_bulk([pk for _, _, pk in hits])
+    highlights = fulltext.snippets(query, hits)
+    results = []
+    for hit in hits:
+        place = rows.get(hit[2])
+        if place is None:
             continue
-        dist = haversine(lon, lat, h.longitude, h.latitude)
-        if dist <= 25:
-            h.distance_km = round(dist, 2)
-            h.result_type = 'hill_station'
-            h.category = 'HILL_STATION'
-            nearby.append(h)
-            
-    nearby.sort(key=lambda x: x.distance_km)
-    return nearby[:6]
+        place.hit = hit
+        place.snippet = highlights.get(hit[1:], '')
+        results.append(place)
+    return results
 
 
 def explorer_list(request):
     """Public: view all tourist places with optional search and category filter."""
     category = request.GET.get('category', '')
     query = request.GET.get('q', '')
+    cursor = request.GET.get('cursor')
     
-    places = Place.objects.all()
+    queryset = Place.objects.all()
     ai_suggestions = []
-
-    if query:
-        # Search local database
-        places = places.filter(
-            Q(name__icontains=query) | 
-            Q(location__icontains=query) | 
-            Q(description__icontains=query)
-        )
-        
-        # Call Gemini for global suggestions if query is more than just a short string
-        if len(query) > 2:
-            ai_suggestions = GeminiService.find_global_places(query)
+    did_you_mean = None
 
     if category:
-        places = places.filter(category=category)
-
-    categories = Place.CATEGORY_CHOICES
+        queryset = queryset.filter(category=category)
+
+    if query and fulltext.fulltext_available():
+        # Ranked and paged by bm25 in the FTS5 index; only the page shown is fetched
+        places, next_cursor = paginate_ranked(
+            lambda after, limit: fulltext.search(query, kinds=('place',), after=after, limit=limit),
+            lambda batch: ranked_places(batch, queryset, query),
+            cursor,
+        )
+    else:
+        matching = queryset
+        if query:
+            # Search local database
+            matching = queryset.filter(
+                Q(name__icontains=query) | 
+                Q(location__icontains=query) | 
+                Q(description__icontains=query)
+            )
+        places, next_cursor = paginate_queryset(matching, PLACE_ORDERING, cursor)
+
+    if query and not places and not cursor:
+        # Nothing matched as typed: fall back to trigram similarity on names and locations
+        places = fuzzy.matched_rows(fuzzy.fuzzy_matches(query, kinds=('place',)), queryset, 'place')
+        if places:
+            did_you_mean = places[0].matched_term
+
+    # Call Gemini for global suggestions if query is more than just a short string
+    if len(query) > 2:
+        ai_suggestions = GeminiService.find_global_places(query)
+
+    # Counts are maintained incrementally in the facet table
+    category_counts = dict(facets.counts('place_category')['place_category'])
+    categories = [(code, label, category_counts.get(code, 0)) for code, label in Place.CATEGORY_CHOICES]
     return render(request, 'explorer/list.html', {
         'places': places,
+        **pager_context(request, next_cursor),
         'categories': categories,
+        'total_count': sum(category_counts.values()),
         'selected_category': category,
         'search_query': query,
+        'did_you_mean': did_you_mean,
         'ai_suggestions': ai_suggestions,
     })
 
@@ -236,7 +333,7 @@ def explorer_list(request):
 def explorer_detail(request, pk):
     """Public: detailed view of a single place with map and nearby places."""
     place = get_object_or_404(Place, pk=pk)
-    nearby_places = get_nearby_places(place.latitude, place.longitude, exclude_pk=place.pk, exclude_type='place')
+    nearby_places = hydrate_hits(stored_hits('place', place.pk))
     
     return render(request, 'explorer/detail.html', {
         'place': place,
@@ -298,13 +395,17 @@ def hill_stations_list(request):
     
     if city:
         hill_stations = hill_stations.filter(city__icontains=city)
+
+    hill_stations, next_cursor = paginate_queryset(hill_stations, HILL_STATION_ORDERING, request.GET.get('cursor'))
     
-    # Get unique states and cities for filter dropdowns
-    states = HillStation.objects.values_list('state', flat=True).distinct().order_by('state')
-    cities = HillStation.objects.values_list('city', flat=True).distinct().order_by('city')
+    # States and cities with their counts for the filter dropdowns, from the facet table
+    counts = facets.counts('hill_station_state', 'hill_station_city')
+    states = counts['hill_station_state']
+    cities = counts['hill_station_city']
     
     return render(request, 'explorer/hill_stations_list.html', {
         'hill_stations': hill_stations,
+        **pager_context(request, next_cursor),
         'states': states,
         'cities': cities,
         'selected_state': state,
@@ -315,7 +416,7 @@ def hill_stations_list(request):
 def hill_station_detail(request, pk):
     """Public: detailed view of a single hill station with map and nearby places."""
     hill_station = get_object_or_404(HillStation, pk=pk)
-    nearby_places = get_nearby_places(hill_station.latitude, hill_station.longitude, exclude_pk=hill_station.pk, exclude_type='hill_station')
+    nearby_places = hydrate_hits(stored_hits('hill_station', hill_station.pk))
     
     return render(request, 'explorer/hill_station_detail.html', {
         'hill_station': hill_station,
@@ -367,32 +468,289 @@ def hill_station_delete(request, pk):
 def api_nearby_places(request):
     """
     AJAX endpoint to receive GPS coordinates and return nearby places from external APIs.
+    Several categories can be asked for at once, as category=HOTEL,RESTAURANT
+    or repeated category parameters; results come back as one list.
     """
     lat = request.GET.get('lat')
     lng = request.GET.get('lng')
     radius = request.GET.get('radius', 2)
-    category = request.GET.get('category', 'ATTRACTION')
+    categories = list(dict.fromkeys(
+        category.strip().upper()
+        for value in request.GET.getlist('category') for category in value.split(',') if category.strip()
+    )) or ['ATTRACTION']
 
     if not lat or not lng:
         return JsonResponse({"error": "Latitude and Longitude are required"}, status=400)
+    if len(categories) > len(PlacesService.OSM_MAPPING):
+        return JsonResponse({"error": f"At most {len(PlacesService.OSM_MAPPING)} categories per request"}, status=400)
 
     try:
         radius_float = float(radius)
         print(f"--- GPS Search Debug ---")
-        print(f"Lat: {lat}, Lng: {lng}, Radius: {radius_float}km, Category: {category}")
+        print(f"Lat: {lat}, Lng: {lng}, Radius: {radius_float}km, Categories: {', '.join(categories)}")
         
-        data = PlacesService.get_nearby_places(lat, lng, radius_float, category)
-        print(f"Results Count: {len(data) if isinstance(data, list) else 'Error'}")
+        if len(categories) == 1:
+            data = {categories[0]: PlacesService.get_nearby_places(lat, lng, radius_float, categories[0])}
+        else:
+            data = PlacesService.get_nearby_places_many(lat, lng, radius_float, categories)
+
+        results, warnings = [], []
+        for category, found in data.items():
+            if isinstance(found, dict) and "error" in found:
+                # Provider down or its breaker open: answer from our own places instead of a 500
+                found = local_nearby_places(float(lat), float(lng), radius_float, category)
+                warnings.append(data[category]["error"])
+            results.extend(found)
+        print(f"Results Count: {len(results)}{' (local fallback)' if warnings else ''}")
         print(f"-------------------------")
-        
-        if isinstance(data, dict) and "error" in data:
-            return JsonResponse(data, status=500)
-            
-        return JsonResponse({"results": data})
+
+        response = {"results": results}
+        if len(categories) > 1:
+            response["counts"] = {
+                category: sum(1 for place in results if place['category'] == category) for category in categories
+            }
+        if warnings:
+            response["fallback"] = "local"
+            response["warning"] = '; '.join(dict.fromkeys(warnings))
+        return JsonResponse(response)
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
 
 
+# Real-time categories our own places can stand in for, with the tag to filter on
+LOCAL_FALLBACK_TAGS = {'ATTRACTION': None, 'TEMPLE': 'temple'}
+LOCAL_FALLBACK_LIMIT = 50
+
+
+def local_nearby_places(lat, lng, radius_km, category):
+    """Places and hill stations near a point, shaped like PlacesService results."""
+    if category not in LOCAL_FALLBACK_TAGS:
+        return []
+    tag = LOCAL_FALLBACK_TAGS[category]
+    hits = get_index().within(lat, lng, min(radius_km, 50), kinds=('place', 'hill_station'), tag=tag)
+    return [
+        {
+            'name': poi.name,
+            'lat': poi.latitude,
+            'lng': poi.longitude,
+            'category': category,
+            'address': poi.location,
+            'rating': None,
+            'source': 'Local',
+        }
+        for poi in points_for_hits(hits[:LOCAL_FALLBACK_LIMIT])
+    ]
+
+
+@staff_member_required
+def service_status(request):
+    """Admin only: upstream circuit breakers, outbound HTTP metrics, the places tile cache and request coalescing."""
+    metrics = http_client.metrics()
+    return render(request, 'explorer/service_status.html', {
+        'breakers': [b.status() for b in all_breakers()],
+        'http_metrics': sorted(metrics.items()),
+        'tile_cache_entries': len(PlacesService.tile_cache),
+        'singleflight': flight.stats(),
+    })
+
+
+@cache_control(public=True, max_age=300)
+def api_autocomplete(request):
+    """
+    Type-ahead suggestions for the location box, served from the in-memory trie.
+    """
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 8)), autocomplete.TOP_K))
+    except ValueError:
+        limit = 8
+    if not query:
+        return JsonResponse({"results": []})
+    return JsonResponse({"results": autocomplete.suggest(query, limit)})
+
+
+def poi_json(poi):
+    return {
+        "id": poi.pk,
+        "kind": poi.kind,
+        "name": poi.name,
+        "category": poi.category,
+        "location": poi.location,
+        "latitude": poi.latitude,
+        "longitude": poi.longitude,
+        "thumbnail_url": poi.thumbnail_url,
+        "url": poi.get_absolute_url(),
+        "distance_km": getattr(poi, 'distance_km', None),
+    }
+
+
+def api_geo_search(request):
+    """
+    JSON version of the geolocation search, one keyset page at a time.
+    Takes the search form's parameters plus an optional cursor; pass the
+    returned next_cursor back to fetch the following page.
+    """
+    form = GeoLocationSearchForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({"error": form.errors}, status=400)
+
+    try:
+        page_size = max(1, min(int(request.GET.get('limit', PAGE_SIZE)), 100))
+    except ValueError:
+        page_size = PAGE_SIZE
+    result = search_points(form.cleaned_data, request.GET.get('cursor'), page_size)
+    return JsonResponse({
+        "results": [poi_json(poi) for poi in result['places']],
+        "next_cursor": result['next_cursor'],
+        "radius_expanded": result['radius_expanded'],
+        "did_you_mean": result['did_you_mean'],
+    })
+
+
+def route_point(request, name):
+    """
+    Resolve a route end from `<name>_lat`/`<name>_lng` or a gazetteer name
+    in `<name>`. Returns (lat, lng) or None.
+    """
+    lat, lng = request.GET.get(f'{name}_lat'), request.GET.get(f'{name}_lng')
+    if lat and lng:
+        return float(lat), float(lng)
+    if request.GET.get(name):
+        return GeocoderService.geocode(request.GET[name])
+    return None
+
+
+def valid_point(lat, lng):
+    """Whether lat, lng are finite and inside the valid latitude and longitude ranges."""
+    return isfinite(lat) and isfinite(lng) and -90 <= lat <= 90 and -180 <= lng <= 180
+
+
+def api_corridor_search(request):
+    """
+    Points of interest along a route, ordered by position along it.
+    The route is origin -> destination (coordinates via origin_lat/origin_lng,
+    or gazetteer names via origin=Hyderabad), optionally through
+    via=lat,lng;lat,lng waypoints. width is the corridor half-width in km.
+    """
+    try:
+        origin = route_point(request, 'origin')
+        destination = route_point(request, 'destination')
+        via = [
+            tuple(float(v) for v in point.split(','))
+            for point in request.GET.get('via', '').split(';') if point.strip()
+        ]
+        width = float(request.GET.get('width', 10))
+    except ValueError:
+        return JsonResponse({"error": "Coordinates and width must be numbers"}, status=400)
+    if origin is None or destination is None:
+        return JsonResponse({"error": "Could not resolve the origin and destination"}, status=400)
+    if len(via) > corridor.MAX_VIA_POINTS:
+        return JsonResponse({"error": f"At most {corridor.MAX_VIA_POINTS} via points are allowed"}, status=400)
+    if not isfinite(width) or width <= 0 or any(len(point) != 2 for point in via):
+        return JsonResponse({"error": "width must be a positive number and via points lat,lng pairs"}, status=400)
+    if not all(valid_point(lat, lng) for lat, lng in [origin, *via, destination]):
+        return JsonResponse({"error": "Coordinates must be valid latitudes and longitudes"}, status=400)
+    width = max(corridor.MIN_WIDTH_KM, min(width, corridor.MAX_WIDTH_KM))
+
+    tag = PLACE_TYPE_TAGS.get(request.GET.get('place_type'))
+    path = [origin, *via, destination]
+    matches = corridor.along_route(path, width, tag=tag)
+    along = {(kind, pk): along_km for along_km, _, kind, pk in matches}
+    places = points_for_hits([(offset, kind, pk) for _, offset, kind, pk in matches])
+    results = []
+    for poi in places:
+        row = poi_json(poi)
+        row["along_km"] = along[(poi.kind, poi.source_id)]
+        row["offset_km"] = row.pop("distance_km")
+        results.append(row)
+    return JsonResponse({
+        "route": {"path": path, "length_km": round(corridor.route_length(path), 2)},
+        "width_km": width,
+        "results": results,
+    })
+
+
+def parse_origins(spec):
+    """
+    Parse origins=place:12;hill_station:3;10.08,77.06 into a list of
+    (label, kind, pk) for stored places or (label, lat, lng) for coordinates.
+    Raises ValueError on anything else.
+    """
+    origins = []
+    for label in (part.strip() for part in spec.split(';')):
+        if not label:
+            continue
+        if ':' in label:
+            kind, pk = label.split(':', 1)
+            if kind not in ('place', 'hill_station'):
+                raise ValueError(label)
+            origins.append((label, kind, int(pk)))
+        else:
+            lat, lng = (float(value) for value in label.split(','))
+            if not valid_point(lat, lng):
+                raise ValueError(label)
+            origins.append((label, lat, lng))
+    return origins
+
+
+def api_nearby_batch(request):
+    """
+    Neighbour lists for many origins in one request, for the mobile client
+    and itinerary pages. origins is a ;-separated list of place:<id>,
+    hill_station:<id> or lat,lng entries (up to MAX_BATCH_ORIGINS); stored
+    places are left out of their own list.
+    """
+    try:
+        origins = parse_origins(request.GET.get('origins', ''))
+    except ValueError:
+        return JsonResponse({"error": "origins must be place:<id>, hill_station:<id> or lat,lng entries"}, status=400)
+    if not origins or len(origins) > MAX_BATCH_ORIGINS:
+        return JsonResponse({"error": f"Between 1 and {MAX_BATCH_ORIGINS} origins are required"}, status=400)
+
+    stored = origin_coordinates([(first, second) for _, first, second in origins if isinstance(first, str)])
+    located = []
+    for label, first, second in origins:
+        if isinstance(first, str):
+            lat, lng = stored.get((first, second), (None, None))
+            located.append((lat, lng, (first, second)))
+        else:
+            located.append((first, second, None))
+
+    hit_lists = nearby_hits_many(located)
+    points = {(poi.kind, poi.source_id): poi for poi in points_for_hits([hit for hits in hit_lists for hit in hits])}
+    results = []
+    for (label, _, _), (lat, lng, _), hits in zip(origins, located, hit_lists):
+        results.append({
+            "origin": label,
+            "latitude": lat,
+            "longitude": lng,
+            "nearby": [
+                {**poi_json(points[(kind, pk)]), "distance_km": round(dist, 2)}
+                for dist, kind, pk in hits if (kind, pk) in points
+            ],
+        })
+    return JsonResponse({"results": results})
+
+
+def api_map_clusters(request):
+    """
+    Pre-aggregated map clusters for a viewport.
+    Expects bbox=west,south,east,north (Leaflet's toBBoxString) and zoom.
+    """
+    try:
+        west, south, east, north = (float(v) for v in request.GET.get('bbox', '').split(','))
+        zoom = clusters.clamp_zoom(request.GET.get('zoom', 5))
+    except ValueError:
+        return JsonResponse({"error": "bbox=west,south,east,north and an integer zoom are required"}, status=400)
+    if not (valid_point(south, west) and valid_point(north, east)):
+        return JsonResponse({"error": "bbox must hold valid longitudes and latitudes"}, status=400)
+
+    return JsonResponse({
+        "zoom": zoom,
+        "clusters": clusters.clusters_in_bbox(south, west, north, east, zoom),
+    })
+
+
 def real_time_explorer(request):
     """
     Render the real-time GPS explorer page.
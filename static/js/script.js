@@ -114,7 +114,9 @@ function updateResults() {
 
 async function fetchNearbyPlaces(lat, lng) {
     const radius = document.getElementById('radius-input').value || 2;
-    const category = document.getElementById('category-select').value || 'ATTRACTION';
+    // Every selected category comes back from a single request
+    const selected = Array.from(document.getElementById('category-select').selectedOptions, option => option.value);
+    const category = selected.length ? selected.join(',') : 'ATTRACTION';
     const resultsContainer = document.getElementById('results-list');
 
     resultsContainer.innerHTML = '<div class="loader">Loading nearby places...</div>';
@@ -135,7 +137,9 @@ async function fetchNearbyPlaces(lat, lng) {
         // Scroll to results
         resultsContainer.scrollIntoView({ behavior: 'smooth', block: 'start' });
 
-        document.getElementById('status-text').textContent = `✅ Found ${data.results.length} results!`;
+        document.getElementById('status-text').textContent = data.fallback
+            ? `⚠️ Live data unavailable, showing ${data.results.length} saved places`
+            : `✅ Found ${data.results.length} results!`;
     } catch (error) {
         showError("Failed to fetch data from server.");
         resultsContainer.innerHTML = '';
@@ -163,6 +167,7 @@ function renderResults(results) {
         item.innerHTML = `
             <h3>${place.name}</h3>
             <p>📍 ${place.address}</p>
+            <p class="category-tag">${place.category}</p>
             ${place.rating ? `<p class="rating">⭐ ${place.rating}</p>` : ''}
             <div class="card-footer">
                 <span class="source-badge">${place.source}</span>
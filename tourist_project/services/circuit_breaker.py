@@ -0,0 +1,112 @@
+import threading
+import time
+from collections import deque
+
+
+class CircuitBreaker:
+    """
+    Failure-rate circuit breaker for one upstream provider.
+
+    The outcomes of the last WINDOW calls are kept. Once at least
+    MIN_CALLS have been seen and FAILURE_RATE of them failed, the breaker
+    opens and callers are refused straight away instead of waiting out the
+    provider's timeout. After OPEN_SECONDS it turns half-open and lets a
+    single probe call through: success closes it with a clean window,
+    failure opens it again for another OPEN_SECONDS.
+    """
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    WINDOW = 20
+    MIN_CALLS = 5
+    FAILURE_RATE = 0.5
+    OPEN_SECONDS = 30
+
+    def __init__(self, name, window=WINDOW, min_calls=MIN_CALLS, failure_rate=FAILURE_RATE,
+                 open_seconds=OPEN_SECONDS, clock=time.monotonic):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self.clock = clock
+        self.state = self.CLOSED
+        self.opened_at = None
+        self.last_failure = None
+        self._outcomes = deque(maxlen=window)
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may go out now; in half-open state only one probe at a time may."""
+        with self._lock:
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.open_seconds:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record(self, ok, error=None):
+        with self._lock:
+            if not ok:
+                self.last_failure = error
+            if self.state == self.HALF_OPEN:
+                self._probing = False
+                if ok:
+                    self.state = self.CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._open()
+                return
+            self._outcomes.append(ok)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate:
+                self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = self.clock()
+
+    def reset(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.opened_at = None
+            self.last_failure = None
+            self._outcomes.clear()
+            self._probing = False
+
+    def status(self):
+        with self._lock:
+            calls = len(self._outcomes)
+            failures = self._outcomes.count(False)
+            retry_in = None
+            if self.state == self.OPEN:
+                retry_in = max(0, round(self.opened_at + self.open_seconds - self.clock()))
+            return {
+                'name': self.name,
+                'state': self.state,
+                'window_calls': calls,
+                'window_failures': failures,
+                'failure_rate': round(failures / calls, 2) if calls else 0,
+                'retry_in_seconds': retry_in,
+                'last_failure': self.last_failure,
+            }
+
+
+_breakers = {}
+_registry_lock = threading.Lock()
+
+
+def breaker(name):
+    """The process-wide breaker for a provider, created on first use."""
+    with _registry_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def all_breakers():
+    with _registry_lock:
+        return [_breakers[name] for name in sorted(_breakers)]
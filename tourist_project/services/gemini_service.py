@@ -2,6 +2,9 @@ import os
 import google.generativeai as genai
 from django.conf import settings
 
+from tourist_project.services.http_client import client
+from tourist_project.services.singleflight import flight, request_key
+
 class GeminiService:
     """
     Service helper for AI Travel Planning using Google Gemini.
@@ -12,11 +15,19 @@ class GeminiService:
         if not api_key:
             return "AI Planner is currently in mock mode. (API Key missing)"
 
+        return flight.do(
+            request_key('gemini-itinerary', destination, days, interests),
+            lambda: GeminiService._generate_itinerary(destination, days, interests, api_key),
+        )
+
+    @staticmethod
+    def _generate_itinerary(destination, days, interests, api_key):
         try:
             genai.configure(api_key=api_key)
             model = genai.GenerativeModel('gemini-pro')
             prompt = f"Create a detailed {days}-day travel itinerary for {destination} focusing on {interests}. Format as a structured list."
-            response = model.generate_content(prompt)
+            with client.track('gemini'):
+                response = model.generate_content(prompt, request_options={'timeout': client.timeout('gemini')[1]})
             return response.text
         except Exception as e:
             return f"Error generating itinerary: {str(e)}"
@@ -27,6 +38,11 @@ class GeminiService:
         if not api_key:
             return []
 
+        # Everyone typing the same search at once shares one model call
+        return flight.do(request_key('gemini-places', query), lambda: GeminiService._find_global_places(query, api_key))
+
+    @staticmethod
+    def _find_global_places(query, api_key):
         try:
             genai.configure(api_key=api_key)
             model = genai.GenerativeModel('gemini-pro')
@@ -37,7 +53,8 @@ class GeminiService:
                 "Output ONLY the raw data in a simple format that can be easily parsed (Pipe separated: Name|Location|Description|Category). "
                 "Ensure each place is on a new line."
             )
-            response = model.generate_content(prompt)
+            with client.track('gemini'):
+                response = model.generate_content(prompt, request_options={'timeout': client.timeout('gemini')[1]})
             lines = response.text.strip().split('\n')
             places = []
             for line in lines:
@@ -0,0 +1,127 @@
+import json
+import re
+from bisect import bisect_left
+from difflib import get_close_matches
+from functools import lru_cache
+from pathlib import Path
+
+
+class GeocoderService:
+    """
+    Service helper to turn typed Indian place names into coordinates.
+
+    Entries come from a gazetteer data file (cities, districts, states and
+    landmarks, each with aliases such as "bangalore" for "Bengaluru"). The
+    file is loaded once per process and indexed by normalised name for
+    exact, prefix and fuzzy lookups; resolved queries are memoised.
+    """
+    DATA_FILE = Path(__file__).resolve().parent / 'data' / 'gazetteer.json'
+    FUZZY_CUTOFF = 0.8
+    # A unique prefix only resolves once it is this long and covers this much of the name
+    MIN_PREFIX_LENGTH = 4
+    MIN_PREFIX_SHARE = 0.5
+
+    _entries = None
+    _by_name = None
+    _sorted_names = None
+
+    @staticmethod
+    def normalise(name):
+        return ' '.join(re.sub(r'[^\w\s&]', ' ', (name or '').lower()).split())
+
+    @classmethod
+    def _load(cls):
+        if cls._entries is not None:
+            return
+        with open(cls.DATA_FILE, encoding='utf-8') as fh:
+            entries = json.load(fh)
+        by_name = {}
+        for entry in entries:
+            for name in [entry['name']] + entry.get('aliases', []):
+                by_name.setdefault(cls.normalise(name), entry)
+        cls._by_name = by_name
+        cls._sorted_names = sorted(by_name)
+        cls._entries = entries
+
+    @classmethod
+    def entries(cls):
+        cls._load()
+        return cls._entries
+
+    @classmethod
+    def names(cls):
+        """Every normalised name and alias, sorted."""
+        cls._load()
+        return cls._sorted_names
+
+    @classmethod
+    def prefix_matches(cls, prefix, limit=10):
+        """Entries with a name or alias starting with `prefix`, without duplicates."""
+        cls._load()
+        prefix = cls.normalise(prefix)
+        if not prefix:
+            return []
+        names = cls._sorted_names
+        matches = []
+        for i in range(bisect_left(names, prefix), len(names)):
+            if not names[i].startswith(prefix):
+                break
+            entry = cls._by_name[names[i]]
+            if entry not in matches:
+                matches.append(entry)
+                if len(matches) >= limit:
+                    break
+        return matches
+
+    @classmethod
+    @lru_cache(maxsize=1024)
+    def lookup(cls, query):
+        """
+        Resolve a typed name to a gazetteer entry: exact name or alias first,
+        then an unambiguous prefix that is nearly the whole name (so "sun"
+        stays a text search instead of becoming Sundarbans), then the
+        closest fuzzy match.
+        """
+        cls._load()
+        key = cls.normalise(query)
+        if not key:
+            return None
+        if key in cls._by_name:
+            return cls._by_name[key]
+        if len(key) >= cls.MIN_PREFIX_LENGTH:
+            prefixed = cls.prefix_matches(key, limit=2)
+            if len(prefixed) == 1 and any(
+                name.startswith(key) and len(key) >= cls.MIN_PREFIX_SHARE * len(name)
+                for name in map(cls.normalise, [prefixed[0]['name']] + prefixed[0].get('aliases', []))
+            ):
+                return prefixed[0]
+        close = get_close_matches(key, cls._sorted_names, n=1, cutoff=cls.FUZZY_CUTOFF)
+        if close:
+            return cls._by_name[close[0]]
+        return None
+
+    @classmethod
+    def geocode(cls, query, kinds=None):
+        """
+        Return (latitude, longitude) for a typed name, or None. `kinds`
+        restricts which entry kinds ('city', 'district', 'state',
+        'landmark') count as a match; states small enough to search around
+        their centre (radius_search in the data, e.g. Goa) always count.
+        """
+        entry = cls.lookup(query)
+        if entry is None or (kinds and entry['kind'] not in kinds and not entry.get('radius_search')):
+            return None
+        return entry['latitude'], entry['longitude']
+
+    @classmethod
+    def find_in_text(cls, text):
+        """
+        Return the entry whose name or alias appears as whole words in free
+        text (e.g. "Agonda Beach, Goa"), preferring the longest name.
+        """
+        cls._load()
+        text = f" {cls.normalise(text)} "
+        for name in sorted(cls._sorted_names, key=len, reverse=True):
+            if f" {name} " in text:
+                return cls._by_name[name]
+        return None
@@ -0,0 +1,148 @@
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+
+class HttpClient:
+    """
+    Shared outbound HTTP client for the service helpers.
+
+    One requests.Session with pooled keep-alive connections per host is
+    reused for every upstream call, so repeated calls skip the TCP and TLS
+    handshakes. Each call names its service, which picks its (connect, read)
+    timeouts and retry budget. Connection failures and 429/5xx answers are
+    retried with full-jitter exponential backoff; read timeouts are not,
+    since a slow upstream would only be waited out again. Latency, failure
+    and retry counts are kept per service for metrics().
+    """
+    # service -> connect/read timeouts in seconds and retries after the first attempt
+    POLICIES = {
+        'overpass': {'timeout': (5, 65), 'retries': 1},
+        'google_places': {'timeout': (3, 10), 'retries': 2},
+        'openweather': {'timeout': (3, 5), 'retries': 2},
+        'gemini': {'timeout': (5, 30), 'retries': 0},
+        'stripe': {'timeout': (5, 30), 'retries': 0},
+    }
+    DEFAULT_POLICY = {'timeout': (5, 15), 'retries': 1}
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+    BACKOFF_BASE = 0.25
+    BACKOFF_CAP = 4.0
+    LATENCY_WINDOW = 500
+
+    def __init__(self, pool_connections=10, pool_maxsize=20, sleep=time.sleep):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.sleep = sleep
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def policy(self, service):
+        """The service's policy, with any overrides from settings.OUTBOUND_HTTP_POLICIES."""
+        policy = dict(self.POLICIES.get(service, self.DEFAULT_POLICY))
+        policy.update(getattr(settings, 'OUTBOUND_HTTP_POLICIES', {}).get(service, {}))
+        return policy
+
+    def timeout(self, service):
+        return self.policy(service)['timeout']
+
+    def backoff(self, attempt, response=None):
+        """Seconds to wait before retry number `attempt` (0-based), honouring Retry-After."""
+        delay = random.uniform(0, min(self.BACKOFF_CAP, self.BACKOFF_BASE * 2 ** attempt))
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(float(retry_after), self.BACKOFF_CAP))
+        return delay
+
+    def record(self, service, elapsed, ok, retried=False):
+        with self._lock:
+            stats = self._stats.setdefault(service, {
+                'calls': 0, 'failures': 0, 'retries': 0, 'latencies': deque(maxlen=self.LATENCY_WINDOW),
+            })
+            stats['calls'] += 1
+            stats['failures'] += 0 if ok else 1
+            stats['retries'] += 1 if retried else 0
+            stats['latencies'].append(elapsed * 1000)
+
+    def request(self, service, method, url, retry=None, **kwargs):
+        """
+        Send one request for `service`. GETs are retried; pass retry=True
+        for other calls that are safe to repeat (e.g. Overpass queries).
+        """
+        policy = self.policy(service)
+        kwargs.setdefault('timeout', policy['timeout'])
+        retries = policy['retries'] if (method.upper() in ('GET', 'HEAD') if retry is None else retry) else 0
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.ConnectionError:
+                self.record(service, time.perf_counter() - start, ok=False, retried=attempt < retries)
+                if attempt >= retries:
+                    raise
+                self.sleep(self.backoff(attempt))
+                attempt += 1
+                continue
+            except requests.RequestException:
+                self.record(service, time.perf_counter() - start, ok=False)
+                raise
+
+            elapsed = time.perf_counter() - start
+            if response.status_code in self.RETRY_STATUSES and attempt < retries:
+                self.record(service, elapsed, ok=False, retried=True)
+                response.close()
+                self.sleep(self.backoff(attempt, response))
+                attempt += 1
+                continue
+            # A rate-limited answer is a failure too, even though it is a 4xx
+            self.record(service, elapsed, ok=response.status_code < 500 and response.status_code != 429)
+            return response
+
+    def get(self, service, url, **kwargs):
+        return self.request(service, 'GET', url, **kwargs)
+
+    def post(self, service, url, **kwargs):
+        return self.request(service, 'POST', url, **kwargs)
+
+    @contextmanager
+    def track(self, service):
+        """Record latency and failures for a call made through a vendor SDK."""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.record(service, time.perf_counter() - start, ok=False)
+            raise
+        self.record(service, time.perf_counter() - start, ok=True)
+
+    def metrics(self):
+        """{service: {calls, failures, retries, p50_ms, p95_ms, max_ms}} over recent calls."""
+        with self._lock:
+            snapshot = {}
+            for service, stats in self._stats.items():
+                latencies = sorted(stats['latencies'])
+                pick = lambda q: round(latencies[min(len(latencies) - 1, int(q * len(latencies)))], 1)
+                snapshot[service] = {
+                    'calls': stats['calls'],
+                    'failures': stats['failures'],
+                    'retries': stats['retries'],
+                    'p50_ms': pick(0.5) if latencies else None,
+                    'p95_ms': pick(0.95) if latencies else None,
+                    'max_ms': round(latencies[-1], 1) if latencies else None,
+                }
+            return snapshot
+
+    def reset_metrics(self):
+        with self._lock:
+            self._stats.clear()
+
+
+client = HttpClient()
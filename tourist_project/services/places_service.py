@@ -1,7 +1,197 @@
-import requests
 import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from math import asin, cos, floor, radians, sin, sqrt
 from django.conf import settings
 
+from tourist_project.services.circuit_breaker import breaker
+from tourist_project.services.http_client import client
+from tourist_project.services.singleflight import flight, request_key
+
+
+# ["key"~"regex"] tag filters of PlacesService.OSM_MAPPING
+OSM_FILTER = re.compile(r'\["([^"]+)"~"([^"]+)"\]')
+
+
+def distance_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance in kilometres."""
+    lat1, lng1, lat2, lng2 = map(radians, (lat1, lng1, lat2, lng2))
+    a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lng2 - lng1) / 2) ** 2
+    return 2 * 6371 * asin(sqrt(a))
+
+
+class PlacesTileCache:
+    """
+    Provider results cached per (provider, category, tile, radius bucket).
+
+    The radius is rounded up to a bucket and the map is cut into square
+    tiles a fraction of the bucket wide. The first request from a tile
+    fetches everything within the bucket radius of any point in the tile
+    (the bucket plus half the tile's diagonal, around its centre); every
+    later request from the same tile is answered from that data, filtered
+    to its own origin and exact radius.
+
+    Entries are fresh for TTL seconds, then served stale for up to
+    STALE_TTL more while one background refresh runs, and evicted least
+    recently used beyond MAX_ENTRIES. Provider errors are never cached;
+    when a fetch fails, an expired tile still in the cache is served
+    rather than the error.
+    """
+    RADIUS_BUCKETS_KM = (1, 2, 5, 10, 25, 50)
+    # Tile width as a fraction of the radius bucket
+    TILE_FRACTION = 0.25
+    KM_PER_DEGREE = 111.32
+    TTL = 15 * 60
+    STALE_TTL = 60 * 60
+    MAX_ENTRIES = 256
+
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL, stale_ttl=STALE_TTL, clock=time.monotonic, spawn=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.clock = clock
+        self.spawn = spawn or (lambda fn: threading.Thread(target=fn, daemon=True).start())
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @classmethod
+    def radius_bucket(cls, radius_km):
+        for bucket in cls.RADIUS_BUCKETS_KM:
+            if radius_km <= bucket:
+                return bucket
+        return cls.RADIUS_BUCKETS_KM[-1]
+
+    @classmethod
+    def tile_for(cls, lat, lng, radius_km):
+        """Return (tile key, tile centre, radius to fetch around the centre)."""
+        bucket = cls.radius_bucket(radius_km)
+        size = bucket * cls.TILE_FRACTION / cls.KM_PER_DEGREE
+        row, col = floor(lat / size), floor(lng / size)
+        centre = ((row + 0.5) * size, (col + 0.5) * size)
+        # Tiles are square in degrees, so a degree of latitude bounds the half-diagonal
+        reach = bucket + size * cls.KM_PER_DEGREE * sqrt(2) / 2
+        return (row, col, bucket), centre, reach
+
+    def get(self, key):
+        """Return (results, state) with state 'fresh', 'stale' or 'expired', or None if missing."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            fetched_at, results = entry
+            age = self.clock() - fetched_at
+            self._entries.move_to_end(key)
+            if age <= self.ttl:
+                return results, 'fresh'
+            return results, 'stale' if age <= self.ttl + self.stale_ttl else 'expired'
+
+    def put(self, key, results):
+        with self._lock:
+            self._entries[key] = (self.clock(), results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._refreshing.clear()
+
+    def _refresh(self, keys, fetch, result_cap=None):
+        try:
+            fetched = fetch()
+            if not (isinstance(fetched, dict) and "error" in fetched):
+                for category, key in keys.items():
+                    if result_cap is not None and len(fetched[category]) >= result_cap:
+                        # No longer complete for the tile: drop it so requests query exactly
+                        with self._lock:
+                            self._entries.pop(key, None)
+                    else:
+                        self.put(key, fetched[category])
+        finally:
+            with self._lock:
+                self._refreshing.difference_update(keys.values())
+
+    def nearby(self, provider, category, lat, lng, radius_km, fetch, result_cap=None):
+        """
+        Results within radius_km of (lat, lng). `fetch(centre_lat,
+        centre_lng, reach_km)` calls the provider for a whole tile.
+        """
+        def fetch_one(centre_lat, centre_lng, reach, categories):
+            results = fetch(centre_lat, centre_lng, reach)
+            return {category: results} if isinstance(results, list) else results
+
+        return self.nearby_many(provider, [category], lat, lng, radius_km, fetch_one, result_cap)[category]
+
+    def nearby_many(self, provider, categories, lat, lng, radius_km, fetch_many, result_cap=None):
+        """
+        {category: results or error} for several categories of one tile.
+        `fetch_many(centre_lat, centre_lng, reach_km, categories)` returns
+        {category: results} for just the categories not already cached (or
+        an error dict), so one provider call covers every miss.
+
+        `result_cap` is the most results the provider returns per call. A
+        tile answer that hits it may have been filled from outside this
+        request's radius, so it is neither cached nor served: those
+        categories are queried again with the exact origin and radius.
+        """
+        tile, (centre_lat, centre_lng), reach = self.tile_for(lat, lng, radius_km)
+        keys = {category: (provider, category) + tile for category in categories}
+        found, missing, expired, stale = {}, [], {}, {}
+        for category, key in keys.items():
+            entry = self.get(key)
+            if entry is None or entry[1] == 'expired':
+                missing.append(category)
+                if entry is not None:
+                    expired[category] = entry[0]
+            else:
+                found[category] = entry[0]
+                if entry[1] == 'stale':
+                    stale[category] = key
+
+        truncated = []
+        if missing:
+            fetched = fetch_many(centre_lat, centre_lng, reach, missing)
+            for category in missing:
+                if isinstance(fetched, dict) and "error" in fetched:
+                    # The provider is failing: old data beats no data
+                    found[category] = expired.get(category, fetched)
+                elif result_cap is not None and len(fetched[category]) >= result_cap:
+                    truncated.append(category)
+                else:
+                    self.put(keys[category], fetched[category])
+                    found[category] = fetched[category]
+
+        if truncated:
+            exact = fetch_many(lat, lng, radius_km, truncated)
+            for category in truncated:
+                found[category] = exact if isinstance(exact, dict) and "error" in exact else exact[category]
+
+        if stale:
+            with self._lock:
+                stale = {category: key for category, key in stale.items() if key not in self._refreshing}
+                self._refreshing.update(stale.values())
+            if stale:
+                self.spawn(lambda: self._refresh(
+                    stale, lambda: fetch_many(centre_lat, centre_lng, reach, list(stale)), result_cap,
+                ))
+
+        return {
+            category: found[category] if not isinstance(found[category], list) else [
+                place for place in found[category]
+                if distance_km(lat, lng, float(place['lat']), float(place['lng'])) <= radius_km
+            ]
+            for category in categories
+        }
+
+
 class PlacesService:
     """
     Service helper to fetch real-time places data using external APIs.
@@ -9,6 +199,11 @@ class PlacesService:
     """
     
     OVERPASS_URL = "https://overpass-api.de/api/interpreter"
+    MAX_OSM_RADIUS_KM = 60
+    # Google rejects larger radii, so the 50 km bucket is approximate at its rim
+    MAX_GOOGLE_RADIUS_KM = 50
+    # Nearby Search returns at most one page of 20 results per call
+    GOOGLE_RESULT_CAP = 20
     GOOGLE_PLACES_URL = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
 
     # Mapping of our categories to OSM tags
@@ -31,43 +226,131 @@ class PlacesService:
         'TEMPLE': 'place_of_worship'
     }
 
+    tile_cache = PlacesTileCache()
+    breakers = {'osm': breaker('osm'), 'google': breaker('google')}
+
     @staticmethod
     def get_nearby_places(lat, lng, radius_km=2, category='ATTRACTION'):
         """
         Main method to fetch nearby places.
         Tries Google Places if API key is present, otherwise falls back to OSM.
+        Answers come from the tile cache when the area was fetched recently.
         """
         google_api_key = getattr(settings, "GOOGLE_PLACES_API_KEY", None)
-        
+        lat, lng, radius_km = float(lat), float(lng), min(float(radius_km), 50)
+
         # Fallback to general settings or placeholder if not specifically set
         if not google_api_key or google_api_key == 'your-google-api-key-here':
-            return PlacesService._fetch_from_osm(lat, lng, radius_km, category)
-        
-        return PlacesService._fetch_from_google(lat, lng, radius_km, category, google_api_key)
+            return PlacesService.tile_cache.nearby(
+                'osm', category, lat, lng, radius_km,
+                lambda c_lat, c_lng, reach: PlacesService._guarded(
+                    'osm', (category, c_lat, c_lng, reach),
+                    lambda: PlacesService._fetch_from_osm(c_lat, c_lng, reach, category)),
+            )
+
+        return PlacesService.tile_cache.nearby(
+            'google', category, lat, lng, radius_km,
+            lambda c_lat, c_lng, reach: PlacesService._guarded(
+                'google', (category, c_lat, c_lng, reach),
+                lambda: PlacesService._fetch_from_google(c_lat, c_lng, reach, category, google_api_key)),
+            result_cap=PlacesService.GOOGLE_RESULT_CAP,
+        )
+
+    @staticmethod
+    def get_nearby_places_many(lat, lng, radius_km=2, categories=('ATTRACTION',)):
+        """
+        get_nearby_places() for several categories at once, returning
+        {category: results or error}. OpenStreetMap misses are answered by
+        a single Overpass union query split by category here; Google has no
+        multi-type search, so its categories are requested in parallel.
+        """
+        google_api_key = getattr(settings, "GOOGLE_PLACES_API_KEY", None)
+        lat, lng, radius_km = float(lat), float(lng), min(float(radius_km), 50)
+
+        if not google_api_key or google_api_key == 'your-google-api-key-here':
+            return PlacesService.tile_cache.nearby_many(
+                'osm', categories, lat, lng, radius_km,
+                lambda c_lat, c_lng, reach, missing: PlacesService._guarded(
+                    'osm', ('union', missing, c_lat, c_lng, reach),
+                    lambda: PlacesService._fetch_from_osm_many(c_lat, c_lng, reach, missing)),
+            )
+
+        with ThreadPoolExecutor(max_workers=len(categories)) as pool:
+            results = pool.map(lambda category: PlacesService.get_nearby_places(lat, lng, radius_km, category), categories)
+            return dict(zip(categories, results))
+
+    @staticmethod
+    def _guarded(provider, request, fetch):
+        """
+        Call a provider through its circuit breaker. While the breaker is
+        open the call is refused at once with a circuit_open error.
+        Concurrent calls for the same `request` (the parts identifying it,
+        e.g. category and tile) share one upstream call.
+        """
+        def call():
+            provider_breaker = PlacesService.breakers[provider]
+            if not provider_breaker.allow():
+                return {"error": f"{provider} is temporarily unavailable", "circuit_open": True}
+            results = fetch()
+            failed = isinstance(results, dict) and "error" in results
+            provider_breaker.record(not failed, results["error"] if failed else None)
+            return results
+
+        return flight.do(request_key('places', provider, *request), call)
+
+    @staticmethod
+    def osm_filter(category):
+        return PlacesService.OSM_MAPPING.get(category, '["tourism"~"attraction"]')
+
+    @staticmethod
+    def osm_categories(tags, categories):
+        """The requested categories whose OSM tag filter matches an element's tags."""
+        matched = []
+        for category in categories:
+            key, pattern = OSM_FILTER.fullmatch(PlacesService.osm_filter(category)).groups()
+            # Overpass's ~ is an unanchored regex search
+            if key in tags and re.search(pattern, tags[key]):
+                matched.append(category)
+        return matched
 
     @staticmethod
     def _fetch_from_osm(lat, lng, radius_km, category):
         """Fetch data from OpenStreetMap Overpass API."""
-        # Ensure radius is an integer and cap it at 50km for safety
-        radius_meters = int(min(float(radius_km), 50) * 1000)
-        tag = PlacesService.OSM_MAPPING.get(category, '["tourism"~"attraction"]')
-        
-        # Adding [timeout:60] to the query itself and increasing requests timeout
-        query = f"""
-        [out:json][timeout:60];
-        (
+        results = PlacesService._fetch_from_osm_many(lat, lng, radius_km, [category])
+        return results if "error" in results else results[category]
+
+    @staticmethod
+    def _fetch_from_osm_many(lat, lng, radius_km, categories):
+        """
+        Fetch several categories from Overpass in one union query and
+        return {category: results}, or an error dict.
+        """
+        # Ensure radius is an integer and cap it for safety; the cap leaves room
+        # for the tile margin around a 50 km search
+        radius_meters = int(min(float(radius_km), PlacesService.MAX_OSM_RADIUS_KM) * 1000)
+        statements = ''.join(
+            f"""
           node(around:{radius_meters},{lat},{lng}){tag};
           way(around:{radius_meters},{lat},{lng}){tag};
-          relation(around:{radius_meters},{lat},{lng}){tag};
+          relation(around:{radius_meters},{lat},{lng}){tag};"""
+            for tag in dict.fromkeys(PlacesService.osm_filter(category) for category in categories)
+        )
+
+        # [timeout:60] bounds the query server-side; the client's read timeout allows for it
+        query = f"""
+        [out:json][timeout:60];
+        ({statements}
         );
         out center body;
         """
         
         try:
-            response = requests.post(PlacesService.OVERPASS_URL, data={'data': query}, timeout=65)
+            response = client.post('overpass', PlacesService.OVERPASS_URL, data={'data': query}, retry=True)
+            # A 429 or 5xx left after the retries is an error for the breaker, not an empty answer
+            response.raise_for_status()
             data = response.json()
             
-            results = []
+            results = {category: [] for category in categories}
             for element in data.get('elements', []):
                 tags = element.get('tags', {})
                 # Use 'center' if available (for ways/relations), otherwise lat/lon
@@ -75,15 +358,16 @@ class PlacesService:
                 lng_val = element.get('lon') or element.get('center', {}).get('lon')
                 
                 if lat_val and lng_val:
-                    results.append({
-                        'name': tags.get('name', 'Unnamed Place'),
-                        'lat': lat_val,
-                        'lng': lng_val,
-                        'category': category,
-                        'address': tags.get('addr:full', tags.get('addr:street', 'Nearby Area')),
-                        'rating': None,
-                        'source': 'OpenStreetMap'
-                    })
+                    for category in PlacesService.osm_categories(tags, categories):
+                        results[category].append({
+                            'name': tags.get('name', 'Unnamed Place'),
+                            'lat': lat_val,
+                            'lng': lng_val,
+                            'category': category,
+                            'address': tags.get('addr:full', tags.get('addr:street', 'Nearby Area')),
+                            'rating': None,
+                            'source': 'OpenStreetMap'
+                        })
             return results
         except Exception as e:
             return {"error": f"OSM API Error: {str(e)}"}
@@ -91,7 +375,7 @@ class PlacesService:
     @staticmethod
     def _fetch_from_google(lat, lng, radius_km, category, api_key):
         """Fetch data from Google Places API."""
-        radius_meters = radius_km * 1000
+        radius_meters = int(min(float(radius_km), PlacesService.MAX_GOOGLE_RADIUS_KM) * 1000)
         place_type = PlacesService.GOOGLE_MAPPING.get(category, 'tourist_attraction')
         
         params = {
@@ -102,7 +386,7 @@ class PlacesService:
         }
         
         try:
-            response = requests.get(PlacesService.GOOGLE_PLACES_URL, params=params, timeout=10)
+            response = client.get('google_places', PlacesService.GOOGLE_PLACES_URL, params=params)
             data = response.json()
             
             if data.get('status') != 'OK' and data.get('status') != 'ZERO_RESULTS':
@@ -0,0 +1,81 @@
+import threading
+
+
+def request_key(namespace, *parts):
+    """
+    Normalised key for an upstream request: strings are lower-cased with
+    whitespace collapsed and floats rounded, so trivially different
+    spellings of the same request coalesce.
+    """
+    normalised = []
+    for part in parts:
+        if isinstance(part, str):
+            part = ' '.join(part.lower().split())
+        elif isinstance(part, float):
+            part = round(part, 6)
+        elif isinstance(part, (list, tuple)):
+            part = tuple(part)
+        normalised.append(part)
+    return (namespace, *normalised)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical upstream calls.
+
+    The first caller with a given key runs the call; callers arriving with
+    the same key while it is in flight wait for it and receive the same
+    result (or exception) instead of sending their own request. Nothing is
+    kept once the call finishes; caching is left to the callers.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.followers += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self):
+        with self._lock:
+            return {'upstream_calls': self.leaders, 'coalesced_calls': self.followers, 'in_flight': len(self._calls)}
+
+
+flight = SingleFlight()
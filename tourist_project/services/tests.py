@@ -0,0 +1,350 @@
+import io
+import threading
+import time
+from unittest import mock
+
+import requests
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from explorer.tests import make_place
+from .circuit_breaker import CircuitBreaker
+from .http_client import HttpClient
+from .places_service import PlacesService, PlacesTileCache
+from .singleflight import SingleFlight, flight, request_key
+from .weather_service import WeatherService
+
+
+class PlacesTileCacheTests(TestCase):
+    """Real-time nearby lookups reuse provider results fetched for the same tile."""
+
+    # Around Charminar: one a few hundred metres away, one ~1.5 km, one ~4 km
+    PLACES = [
+        {'name': 'Mecca Masjid', 'lat': 17.3604, 'lng': 78.4736},
+        {'name': 'Chowmahalla Palace', 'lat': 17.3578, 'lng': 78.4717},
+        {'name': 'Salar Jung Museum', 'lat': 17.3713, 'lng': 78.4804},
+        {'name': 'Golconda side road', 'lat': 17.3850, 'lng': 78.4500},
+    ]
+
+    def setUp(self):
+        self.now = 0
+        self.spawned = []
+        self.fetches = []
+        self.cache = PlacesTileCache(max_entries=2, ttl=60, stale_ttl=600, clock=lambda: self.now,
+                                     spawn=self.spawned.append)
+        PlacesService.tile_cache.clear()
+
+    def fetch(self, lat, lng, reach):
+        self.fetches.append((lat, lng, reach))
+        return list(self.PLACES)
+
+    def names(self, lat, lng, radius, category='ATTRACTION'):
+        return [p['name'] for p in self.cache.nearby('osm', category, lat, lng, radius, self.fetch)]
+
+    def test_same_tile_served_from_cache_at_exact_radius(self):
+        self.assertEqual(self.names(17.3616, 78.4747, 1), ['Mecca Masjid', 'Chowmahalla Palace'])
+        self.assertEqual(len(self.fetches), 1)
+        _, _, reach = self.fetches[0]
+        self.assertGreater(reach, 1)
+        # A step away in the same tile, with a smaller radius in the same bucket
+        self.assertEqual(self.names(17.3620, 78.4750, 0.3), ['Mecca Masjid'])
+        self.assertEqual(len(self.fetches), 1)
+
+    def test_stale_served_while_revalidating(self):
+        self.names(17.3616, 78.4747, 2)
+        self.now = 120
+        self.names(17.3616, 78.4747, 2)
+        self.names(17.3616, 78.4747, 2)
+        # Stale data answered immediately, with a single refresh queued
+        self.assertEqual(len(self.fetches), 1)
+        self.assertEqual(len(self.spawned), 1)
+        self.spawned[0]()
+        self.assertEqual(len(self.fetches), 2)
+        self.assertEqual(self.cache.get(('osm', 'ATTRACTION') + PlacesTileCache.tile_for(17.3616, 78.4747, 2)[0])[1], 'fresh')
+
+        self.now = 10_000
+        self.names(17.3616, 78.4747, 2)
+        self.assertEqual(len(self.fetches), 3)
+
+    def test_errors_not_cached_and_lru_bounded(self):
+        error = {"error": "OSM API Error: timeout"}
+        self.assertEqual(self.cache.nearby('osm', 'HOTEL', 17.36, 78.47, 2, lambda *args: error), error)
+        self.assertEqual(len(self.cache), 0)
+        for category in ('HOTEL', 'RESTAURANT', 'HOSPITAL'):
+            self.names(17.3616, 78.4747, 2, category)
+        self.assertEqual(len(self.cache), 2)
+        self.names(17.3616, 78.4747, 2, 'HOTEL')
+        self.assertEqual(len(self.fetches), 4)
+
+    def test_api_reuses_tile(self):
+        with mock.patch.object(PlacesService, '_fetch_from_osm', return_value=list(self.PLACES)) as osm:
+            for lat in ('17.3616', '17.3618'):
+                data = self.client.get(reverse('api-nearby-places'), {'lat': lat, 'lng': '78.4747', 'radius': 1}).json()
+                self.assertEqual([p['name'] for p in data['results']], ['Mecca Masjid', 'Chowmahalla Palace'])
+        self.assertEqual(osm.call_count, 1)
+
+
+class HttpClientTests(TestCase):
+    """Outbound calls share a pooled session with per-service timeouts, bounded retries and metrics."""
+
+    def setUp(self):
+        self.client_ = HttpClient(sleep=lambda seconds: None)
+
+    def response(self, status):
+        response = requests.Response()
+        response.status_code = status
+        response.raw = io.BytesIO(b'')
+        return response
+
+    def test_retries_connection_errors_and_5xx(self):
+        outcomes = [requests.ConnectionError('reset'), self.response(503), self.response(200)]
+        with mock.patch.object(self.client_.session, 'request', side_effect=outcomes) as send:
+            response = self.client_.get('google_places', 'https://example.test/places')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(send.call_count, 3)
+        self.assertEqual(send.call_args.kwargs['timeout'], HttpClient.POLICIES['google_places']['timeout'])
+        stats = self.client_.metrics()['google_places']
+        self.assertEqual((stats['calls'], stats['failures'], stats['retries']), (3, 2, 2))
+        self.assertIsNotNone(stats['p95_ms'])
+
+    def test_rate_limited_answers_count_as_failures(self):
+        with mock.patch.object(self.client_.session, 'request', return_value=self.response(429)) as send:
+            self.assertEqual(self.client_.get('overpass', 'https://example.test/overpass').status_code, 429)
+        self.assertEqual(send.call_count, HttpClient.POLICIES['overpass']['retries'] + 1)
+        stats = self.client_.metrics()['overpass']
+        self.assertEqual((stats['calls'], stats['failures']), (send.call_count, send.call_count))
+
+        # Overpass answers that are still rate-limited after the retries reach the breaker as errors
+        with mock.patch('tourist_project.services.places_service.client', self.client_), \
+                mock.patch.object(self.client_.session, 'request', return_value=self.response(429)):
+            result = PlacesService._fetch_from_osm_many(17.36, 78.47, 2, ['HOTEL'])
+        self.assertIn('429', result['error'])
+
+    def test_read_timeouts_and_unsafe_posts_not_retried(self):
+        with mock.patch.object(self.client_.session, 'request', side_effect=requests.ReadTimeout('slow')) as send:
+            with self.assertRaises(requests.ReadTimeout):
+                self.client_.get('openweather', 'https://example.test/weather')
+        self.assertEqual(send.call_count, 1)
+
+        with mock.patch.object(self.client_.session, 'request', return_value=self.response(502)) as send:
+            self.assertEqual(self.client_.post('google_places', 'https://example.test/post').status_code, 502)
+        self.assertEqual(send.call_count, 1)
+
+        # Retries are bounded by the service policy
+        with mock.patch.object(self.client_.session, 'request', return_value=self.response(503)) as send:
+            self.client_.post('overpass', 'https://example.test/overpass', retry=True)
+        self.assertEqual(send.call_count, HttpClient.POLICIES['overpass']['retries'] + 1)
+
+    def test_policy_overrides_and_backoff(self):
+        with override_settings(OUTBOUND_HTTP_POLICIES={'openweather': {'timeout': (1, 2)}}):
+            self.assertEqual(self.client_.policy('openweather'), {'timeout': (1, 2), 'retries': 2})
+        self.assertEqual(self.client_.timeout('unknown'), HttpClient.DEFAULT_POLICY['timeout'])
+        for attempt in range(6):
+            self.assertLessEqual(self.client_.backoff(attempt), HttpClient.BACKOFF_CAP)
+        limited = self.response(429)
+        limited.headers['Retry-After'] = '2'
+        self.assertGreaterEqual(self.client_.backoff(0, limited), 2)
+
+    def test_weather_uses_shared_client(self):
+        with mock.patch('tourist_project.services.weather_service.client.get', side_effect=requests.ReadTimeout('slow')) as get:
+            result = WeatherService.get_weather('Munnar')
+        self.assertIn('error', result)
+        self.assertEqual(get.call_args.args[0], 'openweather')
+
+
+class CircuitBreakerTests(TestCase):
+    """Failing providers are cut off quickly and requests fall back to cached or local data."""
+
+    def setUp(self):
+        self.now = 0
+        self.breaker = CircuitBreaker('test', window=10, min_calls=4, failure_rate=0.5, open_seconds=30,
+                                      clock=lambda: self.now)
+        PlacesService.tile_cache.clear()
+        for provider_breaker in PlacesService.breakers.values():
+            provider_breaker.reset()
+
+    def tearDown(self):
+        for provider_breaker in PlacesService.breakers.values():
+            provider_breaker.reset()
+
+    def test_opens_on_failure_rate_and_probes_half_open(self):
+        for ok in (True, False, True):
+            self.breaker.record(ok)
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record(False)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow())
+
+        self.now = 31
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        # Only one probe at a time
+        self.assertFalse(self.breaker.allow())
+        self.breaker.record(False, 'timeout')
+        self.assertEqual(self.breaker.status()['state'], 'open')
+
+        self.now = 62
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record(True)
+        self.assertEqual(self.breaker.status()['state'], 'closed')
+        self.assertEqual(self.breaker.status()['window_calls'], 0)
+
+    def test_open_breaker_falls_back_to_local_places(self):
+        make_place('Charminar', 17.3616, 78.4747, category='HISTORICAL', description='Mosque and monument.')
+        make_place('Birla Mandir', 17.4062, 78.4691, category='HISTORICAL', description='Hindu temple on a hill.')
+        failure = {"error": "OSM API Error: timeout"}
+        params = {'lat': '17.3850', 'lng': '78.4867', 'radius': 10}
+        with mock.patch.object(PlacesService, '_fetch_from_osm', return_value=failure) as osm:
+            for i in range(CircuitBreaker.MIN_CALLS):
+                # Distinct tiles so the tile cache cannot answer
+                self.client.get(reverse('api-nearby-places'), {**params, 'lat': str(17.0 + i)})
+            self.assertEqual(PlacesService.breakers['osm'].state, CircuitBreaker.OPEN)
+
+            data = self.client.get(reverse('api-nearby-places'), {**params, 'category': 'TEMPLE'}).json()
+        # Refused without calling Overpass, answered from our own tagged places
+        self.assertEqual(osm.call_count, CircuitBreaker.MIN_CALLS)
+        self.assertEqual(data['fallback'], 'local')
+        self.assertEqual([p['name'] for p in data['results']], ['Birla Mandir'])
+        self.assertEqual(data['results'][0]['source'], 'Local')
+
+    def test_cached_tile_served_when_provider_fails(self):
+        places = [{'name': 'Charminar', 'lat': 17.3616, 'lng': 78.4747}]
+        cache = PlacesTileCache(ttl=0, stale_ttl=0, clock=lambda: self.now)
+        cache.nearby('osm', 'ATTRACTION', 17.3616, 78.4747, 2, lambda *args: places)
+        self.now = 5
+        result = cache.nearby('osm', 'ATTRACTION', 17.3616, 78.4747, 2, lambda *args: {"error": "down"})
+        self.assertEqual(result, places)
+
+    def test_status_page(self):
+        PlacesService.breakers['google'].record(False, 'REQUEST_DENIED')
+        response = self.client.get(reverse('service-status'))
+        self.assertEqual(response.status_code, 302)
+
+        User.objects.create_user('ops', password='pw', is_staff=True)
+        self.client.login(username='ops', password='pw')
+        response = self.client.get(reverse('service-status'))
+        self.assertContains(response, 'REQUEST_DENIED')
+        self.assertIn('osm', [b['name'] for b in response.context['breakers']])
+
+
+class SingleFlightTests(TestCase):
+    """Concurrent identical upstream requests wait on one call and share its result."""
+
+    def run_together(self, flight_, count, call, release=None):
+        """Start `count` threads through call(), releasing the upstream only once all have joined."""
+        release = release or threading.Event()
+        results, errors = [], []
+
+        def worker():
+            try:
+                results.append(call(release))
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=worker) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for _ in range(200):
+            if flight_.leaders + flight_.followers == count:
+                break
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        return results, errors
+
+    def test_concurrent_callers_share_one_call(self):
+        flight_ = SingleFlight()
+        upstream = []
+
+        def call(release):
+            def fetch():
+                upstream.append(1)
+                release.wait(5)
+                return {'temp': 21}
+            return flight_.do(request_key('weather', ' Munnar '), fetch)
+
+        results, errors = self.run_together(flight_, 5, call)
+        self.assertEqual((len(upstream), errors), (1, []))
+        self.assertEqual(results, [{'temp': 21}] * 5)
+        self.assertEqual(flight_.stats(), {'upstream_calls': 1, 'coalesced_calls': 4, 'in_flight': 0})
+
+        # Nothing is cached once the call is done
+        flight_.do(request_key('weather', 'munnar'), lambda: upstream.append(1))
+        self.assertEqual(len(upstream), 2)
+
+    def test_errors_reach_every_waiter(self):
+        flight_ = SingleFlight()
+
+        def call(release):
+            def fetch():
+                release.wait(5)
+                raise requests.ConnectionError('reset')
+            return flight_.do(('gemini-places', 'forts'), fetch)
+
+        results, errors = self.run_together(flight_, 3, call)
+        self.assertEqual(results, [])
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(flight_.in_flight(), 0)
+
+    def test_request_keys_normalised(self):
+        self.assertEqual(request_key('weather', '  New   Delhi'), request_key('weather', 'new delhi'))
+        self.assertEqual(request_key('places', 'osm', ['HOTEL'], 17.1234567), ('places', 'osm', ('HOTEL',), 17.123457))
+
+    def test_weather_page_loads_coalesced(self):
+        response = mock.Mock(status_code=200)
+        response.json.return_value = {'main': {'temp': 24}, 'weather': [{'main': 'Clouds', 'description': 'haze', 'icon': '03d'}]}
+        flight.leaders = flight.followers = 0
+
+        release = threading.Event()
+
+        def slow_get(*args, **kwargs):
+            release.wait(5)
+            return response
+
+        with mock.patch('tourist_project.services.weather_service.client.get', side_effect=slow_get) as get:
+            results, errors = self.run_together(flight, 4, lambda _: WeatherService.get_weather(' shimla'), release)
+        self.assertEqual(errors, [])
+        self.assertEqual([result['temp'] for result in results], [24] * 4)
+        self.assertEqual(get.call_count, 1)
+
+
+class CappedProviderTileTests(TestCase):
+    """Tiles from a provider that truncates its answers are only used when complete."""
+
+    def setUp(self):
+        self.calls = []
+        self.cache = PlacesTileCache(spawn=lambda fn: fn())
+
+    def fetcher(self, count):
+        def fetch(lat, lng, reach):
+            self.calls.append((lat, lng, reach))
+            # The provider's top results all sit a few km north of the origin, outside a 1 km search
+            return [{'name': f'Far {i}', 'lat': 17.40 + i * 0.001, 'lng': 78.4747} for i in range(count)]
+        return fetch
+
+    def test_truncated_tile_falls_back_to_exact_query(self):
+        fetch = self.fetcher(20)
+        for _ in range(2):
+            self.cache.nearby('google', 'HOTEL', 17.3616, 78.4747, 1, fetch, result_cap=20)
+        # Tile query then exact query, each time: nothing cached
+        self.assertEqual(len(self.calls), 4)
+        self.assertEqual(self.calls[1], (17.3616, 78.4747, 1))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_complete_tile_cached(self):
+        fetch = self.fetcher(5)
+        for _ in range(2):
+            self.cache.nearby('google', 'HOTEL', 17.3616, 78.4747, 1, fetch, result_cap=20)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_google_path_passes_cap(self):
+        PlacesService.tile_cache.clear()
+        full_page = [{'name': f'Spot {i}', 'lat': 17.3616, 'lng': 78.4747} for i in range(20)]
+        with override_settings(GOOGLE_PLACES_API_KEY='key'), \
+                mock.patch.object(PlacesService, '_fetch_from_google', return_value=full_page) as google:
+            results = PlacesService.get_nearby_places(17.3616, 78.4747, 1, 'HOTEL')
+        self.assertEqual(len(results), 20)
+        self.assertEqual(google.call_count, 2)
+        self.assertEqual(google.call_args.args[2], 1)
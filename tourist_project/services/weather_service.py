@@ -1,6 +1,8 @@
-import requests
 from django.conf import settings
 
+from tourist_project.services.http_client import client
+from tourist_project.services.singleflight import flight, request_key
+
 class WeatherService:
     """
     Service helper to fetch real-time weather data.
@@ -13,13 +15,18 @@ class WeatherService:
         if not api_key:
             return {"error": "API Key missing", "temp": "N/A", "condition": "Unknown"}
 
+        # Page loads for the same city at the same moment share one request
+        return flight.do(request_key('weather', location), lambda: WeatherService._fetch(location, api_key))
+
+    @staticmethod
+    def _fetch(location, api_key):
         try:
             params = {
                 "q": location,
                 "appid": api_key,
                 "units": "metric"
             }
-            response = requests.get(WeatherService.API_URL, params=params)
+            response = client.get('openweather', WeatherService.API_URL, params=params)
             data = response.json()
             if response.status_code == 200:
                 return {
@@ -156,6 +156,11 @@ REST_FRAMEWORK = {
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Explorer geo lookups: 'rtree' (SQLite R*Tree table), 'grid' (in-process)
+# or 'snapshot' (memory-mapped file shared by all workers)
+EXPLORER_SPATIAL_INDEX = 'rtree'
+EXPLORER_SNAPSHOT_PATH = BASE_DIR / 'var' / 'poi_snapshot.bin'
+
 # API Keys Configuration
 GEMINI_API_KEY = 'your-gemini-api-key-here'
 OPENWEATHER_API_KEY = 'your-openweather-api-key-here'